@@ -1,22 +1,118 @@
+import os
+import time
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt # type: ignore
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from models.seller import Seller
 from models.customer import Customer
 from database import get_db
+from cache import TTLCache
 
 # Secret key and algorithm for JWT
 SECRET_KEY = "your_secret_key_here"  # Replace with a strong secret key
 ALGORITHM = "HS256"
 
-def get_current_seller(token: str, db: Session = Depends(get_db)):
+# Verified token payloads and authenticated principals are cached for a short time so that
+# repeat requests skip both the signature check and the database lookup.
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+token_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def decode_token(token: str) -> dict:
+    """
+    Verifies a JWT and returns its payload, reusing the result for tokens seen recently.
+
+    Raises:
+        JWTError: If the token is invalid or has expired.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.set(token, payload)
+    elif payload.get("exp") is not None and payload["exp"] <= time.time():
+        token_cache.invalidate(token)
+        raise JWTError("Signature has expired.")
+    return payload
+
+
+def _snapshot(principal):
+    """
+    Copies the column values of a loaded principal into a detached instance that can be
+    shared between requests and merged into a session without a query.
+    """
+    mapper = inspect(type(principal))
+    copy = mapper.class_(**{attr.key: getattr(principal, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+async def _get_principal(db: AsyncSession, model, role: str, payload: dict):
+    """
+    Resolves the token payload to a `model` instance attached to `db`.
+
+    Tokens carrying an `id` claim are looked up by primary key, older tokens by their `sub`
+    email. A cached principal is merged into the session with `load=False`, which issues no SQL.
+    """
+    if payload.get("role") not in (None, role):
+        return None
+    principal_id = payload.get("id")
+    key = (role, principal_id) if principal_id is not None else (role, payload.get("sub"))
+
+    cached = principal_cache.get(key)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    if principal_id is not None:
+        principal = await db.get(model, principal_id)
+    else:
+        principal = await db.scalar(select(model).where(model.email == payload.get("sub")))
+    if principal is not None:
+        principal_cache.set(key, _snapshot(principal))
+    return principal
+
+
+def invalidate_principal(role: str, principal) -> None:
+    """
+    Drops every cached entry for a seller or customer, including entries keyed by a
+    previous email address.
+    """
+    emails = {principal.email}
+    emails.update(inspect(principal).attrs.email.history.deleted or ())
+    principal_cache.invalidate((role, principal.id), *[(role, email) for email in emails])
+
+
+@event.listens_for(Seller, "after_update")
+@event.listens_for(Seller, "after_delete")
+def _invalidate_seller(mapper, connection, target):
+    invalidate_principal("seller", target)
+
+
+@event.listens_for(Customer, "after_update")
+@event.listens_for(Customer, "after_delete")
+def _invalidate_customer(mapper, connection, target):
+    invalidate_principal("customer", target)
+
+
+def cache_stats() -> dict:
+    """
+    Returns hit/miss counters for the token and principal caches.
+    """
+    return {"tokens": token_cache.stats(), "principals": principal_cache.stats()}
+
+
+async def get_current_seller(token: str, db: AsyncSession = Depends(get_db)):
     """
     Decodes the JWT token to get the current authenticated seller.
 
     Args:
         token (str): The JWT token provided in the Authorization header.
-        db (Session): SQLAlchemy session for database queries.
+        db (AsyncSession): SQLAlchemy session for database queries.
 
     Returns:
         Seller: The authenticated seller.
@@ -25,14 +121,14 @@ def get_current_seller(token: str, db: Session = Depends(get_db)):
         HTTPException: If the token is invalid or the seller does not exist.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid authentication token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
 
-    seller = db.query(Seller).filter(Seller.email == email).first()
+    seller = await _get_principal(db, Seller, "seller", payload)
     if seller is None:
         raise HTTPException(status_code=401, detail="Seller not found")
     return seller
@@ -40,17 +136,17 @@ def get_current_seller(token: str, db: Session = Depends(get_db)):
 
 #oauth2_scheme = OAuth2PasswordBearer(tokenUrl="customer/login/")
 
-def get_current_customer(token: str, db: Session = Depends(get_db)):
+async def get_current_customer(token: str, db: AsyncSession = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        
-        customer = db.query(Customer).filter(Customer.email == email).first()
+
+        customer = await _get_principal(db, Customer, "customer", payload)
         if customer is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        
+
         return customer
     except:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token")
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """
+    Runs an async job every `interval` seconds in the background of the application.
+
+    Started and stopped from the FastAPI lifespan. Jobs work through their backlog in bounded
+    batches, one transaction each, and yield to the event loop between batches so requests keep
+    being served. A failing run is logged and retried on the next tick, so one bad batch never
+    stops the job for good.
+    """
+
+    def __init__(self, name: str, job, interval: float):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self._task = None
+        self._current = None
+
+    async def _run(self):
+        while True:
+            # Shielded, so stopping never interrupts a run in the middle of a transaction
+            self._current = asyncio.ensure_future(self.job())
+            try:
+                await asyncio.shield(self._current)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Background job %s failed", self.name)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        Schedule the job on the running event loop.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        """
+        Stop scheduling the job and wait for a run in progress to finish.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._current is not None:
+            try:
+                await self._current
+            except Exception:
+                logger.exception("Background job %s failed", self.name)
+            self._current = None
@@ -0,0 +1,537 @@
+"""
+Load-testing suite for the API.
+
+Seeds a fresh database with synthetic sellers, products, customers, wallets and orders, then
+drives the application with concurrent requests and reports throughput and p50/p95/p99
+latency per scenario. Results are written as JSON so runs can be compared.
+
+Usage:
+    python benchmarks/load.py [--scenarios catalog search login orders holds wallet mixed] [--requests 2000]
+                              [--concurrency 50] [--output results.json] [--compare baseline.json]
+
+By default the app runs in-process behind httpx's ASGITransport, against a temporary SQLite
+database. Pass --base-url to drive a running server instead (e.g. `uvicorn main:app`); the
+server must use the same --database-url, since seeding writes to the database directly.
+
+Scenarios:
+    catalog  Product list pages (by ID and by price, per seller, following cursors), product
+             detail and full-text search.
+    search   Full-text product searches: whole words, several words, and words still being
+             typed (prefixes). The p99 latency is checked against --search-p99-ms.
+    login    Customer logins, including bcrypt verification.
+    orders   A burst of single-item orders on a few low-stock products (split over
+             --stock-shards counters each, if set). Afterwards the remaining stock is checked
+             against the orders placed, to detect overselling.
+    holds    A flash sale on the same hot products through cart holds: each request holds one
+             unit and then commits it to an order or releases it. Afterwards stock, orders and
+             reserved counts are reconciled.
+    wallet   Wallet debits by many customers. Afterwards balances are checked against the
+             ledger, to detect lost updates or negative balances.
+    mixed    Concurrent catalog reads, orders and wallet debits (see --write-ratio).
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("catalog", "search", "login", "orders", "holds", "wallet", "mixed")
+PASSWORD = "benchmark-password"
+SEARCH_WORDS = ("red", "blue", "shoe", "shirt", "lamp", "desk", "cable", "mug")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def drive(request, total: int, concurrency: int) -> dict:
+    """
+    Calls `request(i)` for i in range(total) from `concurrency` workers and summarizes the
+    latencies and status codes.
+    """
+    latencies = []
+    statuses = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                status = (await request(i)).status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2),
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+        "status_codes": statuses,
+    }
+
+
+class Benchmark:
+    """
+    Seeds the database and runs the scenarios. Application modules are imported lazily so
+    DATABASE_URL can be set from the command line first.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+
+    async def seed(self):
+        """
+        Bulk-inserts the synthetic dataset straight into the database.
+        """
+        from database import SessionLocal
+        from models.customer import Customer
+        from models.order import Order
+        from models.product import Product
+        from models.seller import Seller
+        from models.wallet import Wallet
+        from passwords import pwd_context
+        from schema import upgrade_database
+
+        args = self.args
+        rng = self.rng
+        await upgrade_database()
+        # Hash once; every synthetic account shares the password
+        hashed = pwd_context.hash(PASSWORD)
+        now = datetime.utcnow()
+        async with SessionLocal() as db:
+            await db.execute(insert(Seller), [
+                {"name": f"Seller {i}", "email": f"seller{i}@bench.test", "password": hashed,
+                 "store_name": f"Store {i}", "business_location": "Bench City", "niche": "general"}
+                for i in range(1, args.sellers + 1)
+            ])
+            product_sellers = [rng.randint(1, args.sellers) for _ in range(args.products)]
+            await db.execute(insert(Product), [
+                {"name": f"{rng.choice(SEARCH_WORDS)} {rng.choice(SEARCH_WORDS)} {i}",
+                 "description": f"Synthetic product {i} in {rng.choice(SEARCH_WORDS)}",
+                 "price": round(rng.uniform(1, 500), 2), "quantity": rng.randint(0, 1000),
+                 "seller_id": product_sellers[i - 1]}
+                for i in range(1, args.products + 1)
+            ])
+            await db.execute(insert(Customer), [
+                {"name": f"Customer {i}", "email": f"customer{i}@bench.test", "password": hashed}
+                for i in range(1, args.customers + 1)
+            ])
+            await db.execute(insert(Wallet), [
+                {"customer_id": i, "balance": args.wallet_balance} for i in range(1, args.customers + 1)
+            ])
+            orders = []
+            for _ in range(args.orders):
+                product_id = rng.randint(1, args.products)
+                orders.append({
+                    "product_id": product_id, "seller_id": product_sellers[product_id - 1],
+                    "customer_id": rng.randint(1, args.customers), "quantity": rng.randint(1, 3),
+                    "status": rng.choice(("pending", "shipped", "delivered")),
+                    "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+                })
+            if orders:
+                await db.execute(insert(Order), orders)
+            await db.commit()
+
+    def customer_token(self, customer_id: int) -> str:
+        from routers.customer import create_access_token
+
+        return create_access_token({"sub": f"customer{customer_id}@bench.test", "id": customer_id, "role": "customer"})
+
+    def catalog_request(self, client):
+        """
+        A request factory mixing product list pages, product details and searches.
+        """
+        args = self.args
+        rng = self.rng
+        cursors = []
+
+        async def request(i):
+            kind = rng.random()
+            if kind < 0.4:
+                params = {"limit": 50, "sort": rng.choice(("id", "price"))}
+                if rng.random() < 0.5:
+                    params["seller_id"] = rng.randint(1, args.sellers)
+                if cursors and rng.random() < 0.5:
+                    params.update(cursors.pop())
+                response = await client.get("/products/", params=params)
+                next_cursor = response.status_code == 200 and response.json().get("next_cursor")
+                if next_cursor:
+                    cursors.append({**params, "cursor": next_cursor})
+                return response
+            if kind < 0.8:
+                return await client.get(f"/products/{rng.randint(1, args.products)}")
+            return await client.get("/products/search", params={"q": rng.choice(SEARCH_WORDS)})
+
+        return request
+
+    def wallet_request(self, client):
+        """
+        A request factory debiting random customers' wallets.
+        """
+        args = self.args
+        tokens = {customer_id: self.customer_token(customer_id) for customer_id in range(1, args.customers + 1)}
+
+        async def request(i):
+            customer_id = self.rng.randint(1, args.customers)
+            return await client.put("/wallet/debit/", params={"token": tokens[customer_id], "amount": args.debit_amount})
+
+        return request
+
+    async def catalog(self, client) -> dict:
+        return await drive(self.catalog_request(client), self.args.requests, self.args.concurrency)
+
+    async def search(self, client) -> dict:
+        """
+        Searches the catalog the way a search box does, including partly typed last words.
+        """
+        rng = self.rng
+
+        async def request(i):
+            words = [rng.choice(SEARCH_WORDS) for _ in range(rng.randint(1, 2))]
+            if rng.random() < 0.5:
+                words[-1] = words[-1][:rng.randint(2, len(words[-1]))]
+            return await client.get("/products/search", params={"q": " ".join(words)})
+
+        result = await drive(request, self.args.requests, self.args.concurrency)
+        target = self.args.search_p99_ms
+        result["target"] = {"p99_ms": target, "ok": result["latency_ms"]["p99"] < target}
+        return result
+
+    async def login(self, client) -> dict:
+        args = self.args
+
+        async def request(i):
+            customer_id = self.rng.randint(1, args.customers)
+            return await client.post("/login/", json={"email": f"customer{customer_id}@bench.test", "password": PASSWORD})
+
+        return await drive(request, args.login_requests, args.concurrency)
+
+    async def orders(self, client) -> dict:
+        """
+        Fires more orders at a few hot products than they have stock for.
+        """
+        from database import SessionLocal
+        from models.order import Order
+        from models.product import Product
+        from crud.inventory import redistribute_stock
+        from cache import invalidate_products
+
+        args = self.args
+        hot = list(range(1, args.hot_products + 1))
+        async with SessionLocal() as db:
+            await db.execute(update(Product).where(Product.id.in_(hot)).values(quantity=args.hot_stock))
+            for product_id in hot:
+                await redistribute_stock(db, product_id, args.stock_shards)
+            first_new_order = (await db.scalar(select(func.max(Order.id))) or 0) + 1
+            await db.commit()
+        await invalidate_products(*hot)
+
+        async def request(i):
+            return await client.post("/create/", json={
+                "product_id": self.rng.choice(hot),
+                "customer_id": self.rng.randint(1, args.customers),
+                "quantity": 1,
+            })
+
+        result = await drive(request, args.requests, args.concurrency)
+
+        async with SessionLocal() as db:
+            remaining = dict((await db.execute(select(Product.id, Product.total_quantity).where(Product.id.in_(hot)))).all())
+            sold = dict((await db.execute(
+                select(Order.product_id, func.sum(Order.quantity))
+                .where(Order.id >= first_new_order, Order.product_id.in_(hot))
+                .group_by(Order.product_id)
+            )).all())
+        oversold = {
+            product_id: sold.get(product_id, 0) - args.hot_stock
+            for product_id in hot
+            if remaining[product_id] < 0 or sold.get(product_id, 0) + remaining[product_id] != args.hot_stock
+        }
+        result["consistency"] = {
+            "initial_stock": args.hot_stock * len(hot),
+            "sold": sum(sold.values()),
+            "remaining": sum(remaining.values()),
+            "ok": not oversold,
+            "inconsistent_products": oversold,
+        }
+        return result
+
+    async def holds(self, client) -> dict:
+        """
+        Fires more carts at a few hot products than they have stock for. Each cart holds one
+        unit, then commits the hold (two thirds of the time) or releases it.
+        """
+        from database import SessionLocal
+        from models.order import Order
+        from models.product import Product, ProductStockShard
+        from models.reservation import StockHold
+
+        args = self.args
+        hot = list(range(1, args.hot_products + 1))
+        async with SessionLocal() as db:
+            # Undo any sharding left by the orders scenario
+            await db.execute(delete(ProductStockShard).where(ProductStockShard.product_id.in_(hot)))
+            await db.execute(
+                update(Product).where(Product.id.in_(hot)).values(quantity=args.hot_stock, reserved=0, stock_shards=0)
+            )
+            first_new_order = (await db.scalar(select(func.max(Order.id))) or 0) + 1
+            await db.commit()
+        tokens = {customer_id: self.customer_token(customer_id) for customer_id in range(1, args.customers + 1)}
+
+        async def request(i):
+            token = tokens[self.rng.randint(1, args.customers)]
+            response = await client.post("/holds/", params={"token": token}, json={"product_id": self.rng.choice(hot), "quantity": 1})
+            if response.status_code != 200:
+                return response
+            hold_id = response.json()["id"]
+            if self.rng.random() < 2 / 3:
+                return await client.post(f"/holds/{hold_id}/commit", params={"token": token})
+            return await client.delete(f"/holds/{hold_id}", params={"token": token})
+
+        result = await drive(request, args.requests, args.concurrency)
+
+        async with SessionLocal() as db:
+            stock = {row.id: row for row in (await db.execute(
+                select(Product.id, Product.quantity, Product.reserved).where(Product.id.in_(hot))
+            )).all()}
+            sold = dict((await db.execute(
+                select(Order.product_id, func.sum(Order.quantity))
+                .where(Order.id >= first_new_order, Order.product_id.in_(hot))
+                .group_by(Order.product_id)
+            )).all())
+            open_holds = await db.scalar(select(func.count()).select_from(StockHold).where(StockHold.product_id.in_(hot)))
+        inconsistent = {
+            product_id: {"quantity": row.quantity, "reserved": row.reserved, "sold": sold.get(product_id, 0)}
+            for product_id, row in stock.items()
+            if row.quantity < 0 or row.reserved != 0 or sold.get(product_id, 0) + row.quantity != args.hot_stock
+        }
+        result["consistency"] = {
+            "initial_stock": args.hot_stock * len(hot),
+            "sold": sum(sold.values()),
+            "open_holds": open_holds,
+            "ok": not inconsistent and not open_holds,
+            "inconsistent_products": inconsistent,
+        }
+        return result
+
+    async def wallet(self, client) -> dict:
+        """
+        Debits random wallets, then reconciles every balance with its ledger.
+        """
+        result = await drive(self.wallet_request(client), self.args.requests, self.args.concurrency)
+        result["consistency"] = await self.check_wallets()
+        return result
+
+    async def mixed(self, client) -> dict:
+        """
+        Reads and writes at once: catalog reads, with `--write-ratio` of the requests split
+        between orders on random products and wallet debits.
+        """
+        args = self.args
+        read = self.catalog_request(client)
+        debit = self.wallet_request(client)
+
+        async def order(i):
+            return await client.post("/create/", json={
+                "product_id": self.rng.randint(1, args.products),
+                "customer_id": self.rng.randint(1, args.customers),
+                "quantity": 1,
+            })
+
+        async def request(i):
+            if self.rng.random() >= args.write_ratio:
+                return await read(i)
+            return await (order if self.rng.random() < 0.5 else debit)(i)
+
+        result = await drive(request, args.requests, args.concurrency)
+        result["consistency"] = await self.check_wallets()
+        return result
+
+    async def check_wallets(self) -> dict:
+        """
+        Reconciles every wallet balance with the starting balance plus its ledger entries.
+        """
+        from database import SessionLocal
+        from models.wallet import Wallet, WalletTransaction
+
+        args = self.args
+        async with SessionLocal() as db:
+            ledger = dict((await db.execute(
+                select(WalletTransaction.wallet_id, func.sum(WalletTransaction.amount)).group_by(WalletTransaction.wallet_id)
+            )).all())
+            wallets = (await db.execute(select(Wallet.id, Wallet.balance))).all()
+        mismatched = [
+            wallet_id for wallet_id, balance in wallets
+            if balance < 0 or balance != args.wallet_balance + ledger.get(wallet_id, 0)
+        ]
+        return {"wallets": len(wallets), "ok": not mismatched, "mismatched_wallets": mismatched[:20]}
+
+    async def run(self) -> dict:
+        import httpx
+        from database import engine
+
+        args = self.args
+        seed_start = time.perf_counter()
+        await self.seed()
+        seed_elapsed = time.perf_counter() - seed_start
+
+        results = {}
+        if args.base_url:
+            async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+                for name in args.scenarios:
+                    results[name] = await getattr(self, name)(client)
+        else:
+            from main import app, lifespan
+
+            async with lifespan(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                    for name in args.scenarios:
+                        results[name] = await getattr(self, name)(client)
+        await engine.dispose()
+
+        return {"meta": self.meta(seed_elapsed), "scenarios": results}
+
+    def meta(self, seed_elapsed: float) -> dict:
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        args = self.args
+        return {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.base_url or "asgi",
+            "database": args.database_url,
+            "sqlite_tuning": os.environ.get("SQLITE_TUNING", "true"),
+            "seed_s": round(seed_elapsed, 3),
+            "scale": {
+                "sellers": args.sellers, "products": args.products, "customers": args.customers, "orders": args.orders,
+            },
+        }
+
+
+def compare(current: dict, baseline: dict):
+    """
+    Prints throughput and latency changes against a previous results file.
+    """
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):")
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        changes = []
+        for label, now, before in (
+            ("rps", result["throughput_rps"], previous["throughput_rps"]),
+            ("p50", result["latency_ms"]["p50"], previous["latency_ms"]["p50"]),
+            ("p95", result["latency_ms"]["p95"], previous["latency_ms"]["p95"]),
+            ("p99", result["latency_ms"]["p99"], previous["latency_ms"]["p99"]),
+        ):
+            change = (now - before) / before * 100 if before else 0.0
+            changes.append(f"{label} {before:g} -> {now:g} ({change:+.1f}%)")
+        print(f"  {name:<8} " + ", ".join(changes))
+
+
+def report(results: dict):
+    print(f"{'scenario':<8} {'requests':>8} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status codes")
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        print(f"{name:<8} {result['requests']:>8} {result['throughput_rps']:>9} {latency['p50']:>8} "
+              f"{latency['p95']:>8} {latency['p99']:>8}  {result['status_codes']}")
+        if "consistency" in result:
+            print(f"{'':<8} consistency: {result['consistency']}")
+        if "target" in result:
+            print(f"{'':<8} target: {result['target']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario (login uses --login-requests)")
+    parser.add_argument("--login-requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sellers", type=int, default=20)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=20000, help="Pre-existing orders to seed")
+    parser.add_argument("--hot-products", type=int, default=5, help="Products targeted by the order burst")
+    parser.add_argument("--hot-stock", type=int, default=100, help="Stock of each hot product before the burst")
+    parser.add_argument("--stock-shards", type=int, default=0, help="Stock counters per hot product in the orders scenario")
+    parser.add_argument("--wallet-balance", type=int, default=1000)
+    parser.add_argument("--debit-amount", type=int, default=7)
+    parser.add_argument("--search-p99-ms", type=float, default=20, help="p99 latency target for the search scenario")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="Share of writes in the mixed scenario")
+    parser.add_argument("--bcrypt-rounds", type=int, help="Override BCRYPT_ROUNDS for the app under test")
+    parser.add_argument("--database-url", help="Database to seed (default: a temporary SQLite file)")
+    parser.add_argument("--base-url", help="Drive a running server instead of the in-process app")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for data and request mix")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="A previous results file to compare against")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    temp_db = None
+    if not args.database_url:
+        temp_db = os.path.join(tempfile.mkdtemp(prefix="bench-load-"), "bench.db")
+        args.database_url = f"sqlite+aiosqlite:///{temp_db}"
+    os.environ["DATABASE_URL"] = args.database_url
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    sys.path.insert(0, ROOT)
+
+    try:
+        results = asyncio.run(Benchmark(args).run())
+    finally:
+        if temp_db and os.path.exists(temp_db):
+            os.remove(temp_db)
+
+    report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compares the cost of building list responses through the ORM and Pydantic against the
+row-based fast path (FAST_JSON).
+
+Usage:
+    python benchmarks/serialization.py [--sizes 1000 10000 100000] [--repeat 3]
+
+Each variant fetches `size` rows with the same CRUD function the endpoint uses and encodes
+the response body the way FastAPI would. Query and serialization times are reported
+separately; the best of `--repeat` runs is kept.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench-serialization-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from models.customer import Customer  # noqa: E402
+from models.order import Order  # noqa: E402
+from models.product import Product  # noqa: E402
+from models.seller import Seller  # noqa: E402
+from crud.product import get_products_page  # noqa: E402
+from crud.order import get_order_history_page  # noqa: E402
+from schemas.product import ProductPage  # noqa: E402
+from schemas.order import OrderHistoryPage  # noqa: E402
+from schema import upgrade_database  # noqa: E402
+from serialization import FastJSONResponse, orjson  # noqa: E402
+
+
+async def seed(rows: int):
+    """
+    Inserts one seller and customer, `rows` products and `rows` orders.
+    """
+    await upgrade_database()
+    async with SessionLocal() as db:
+        await db.execute(insert(Seller).values(
+            id=1, name="bench", email="bench@example.com", password="x", store_name="Bench Store",
+            business_location="nowhere", niche="bench",
+        ))
+        await db.execute(insert(Customer).values(id=1, name="bench", email="bench@example.com", password="x"))
+        await db.execute(insert(Product), [
+            {"name": f"Product {i}", "description": "A product used for benchmarking", "price": 10 + i % 100,
+             "quantity": 100, "seller_id": 1}
+            for i in range(rows)
+        ])
+        now = datetime.utcnow()
+        await db.execute(insert(Order), [
+            {"product_id": i + 1, "seller_id": 1, "customer_id": 1, "quantity": 1, "status": "pending", "created_at": now}
+            for i in range(rows)
+        ])
+        await db.commit()
+
+
+def orm_body(adapter: TypeAdapter, content: dict, response_class) -> bytes:
+    """
+    What FastAPI does for a `response_model` endpoint: validate, dump to JSON-compatible
+    Python objects, then render with the response class.
+    """
+    value = adapter.validate_python(content, from_attributes=True)
+    return response_class(adapter.dump_python(value, mode="json")).body
+
+
+async def measure(fetch, encode, repeat: int):
+    best_query = best_encode = float("inf")
+    for _ in range(repeat):
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            items, next_cursor = await fetch(db)
+            fetched = time.perf_counter()
+            body = encode({"items": items, "next_cursor": next_cursor})
+            done = time.perf_counter()
+        best_query = min(best_query, fetched - start)
+        best_encode = min(best_encode, done - fetched)
+    return best_query, best_encode, len(body)
+
+
+async def run(sizes: list[int], repeat: int):
+    await seed(max(sizes))
+    products = TypeAdapter(ProductPage)
+    orders = TypeAdapter(OrderHistoryPage)
+
+    print(f"JSON encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    print(f"{'endpoint':<10} {'rows':>7}  {'variant':<24} {'query ms':>9} {'encode ms':>10} {'total ms':>9} {'speedup':>8}")
+    for size in sizes:
+        for name, fetch, adapter in (
+            ("products", lambda db, **kw: get_products_page(db, limit=size, **kw), products),
+            ("orders", lambda db, **kw: get_order_history_page(db, seller_id=1, limit=size, **kw), orders),
+        ):
+            variants = (
+                ("orm + pydantic + json", lambda db: fetch(db), lambda c: orm_body(adapter, c, JSONResponse)),
+                ("orm + pydantic + orjson", lambda db: fetch(db), lambda c: orm_body(adapter, c, FastJSONResponse)),
+                ("rows + orjson", lambda db: fetch(db, as_dicts=True), lambda c: FastJSONResponse(c).body),
+            )
+            baseline = None
+            for label, variant_fetch, encode in variants:
+                query, encoded, _ = await measure(variant_fetch, encode, repeat)
+                total = query + encoded
+                baseline = baseline or total
+                print(f"{name:<10} {size:>7}  {label:<24} {query * 1000:>9.1f} {encoded * 1000:>10.1f} "
+                      f"{total * 1000:>9.1f} {baseline / total:>7.1f}x")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.sizes, args.repeat))
+    finally:
+        os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
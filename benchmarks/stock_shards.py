@@ -0,0 +1,84 @@
+"""
+Measures order throughput on a single hot product as its stock is split over more and more
+counters (see crud/inventory.py).
+
+Usage:
+    python benchmarks/stock_shards.py [--shards 0 1 2 4 8 16] [--requests 2000] [--concurrency 100]
+                                      [--database-url URL_WITH_{shards}] [--output results.json]
+
+Each shard count runs the `orders` scenario of `benchmarks/load.py` in a fresh process, with
+every order going to product 1 and enough stock that it never sells out. Shard count 0 is
+the unsharded baseline. Any other arguments are passed through to load.py.
+
+Sharding removes contention on the product's row lock, so the gains show on databases with
+row-level locking such as PostgreSQL. SQLite serializes all writers on one database lock
+(and, in tuned mode, the writer queue), so there the numbers only show the overhead of the
+sharded path.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_shards(shards: int, args, extra: list[str]) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench-shards-") as directory:
+        output = os.path.join(directory, "results.json")
+        if args.database_url:
+            database_url = args.database_url.format(shards=shards)
+        else:
+            database_url = f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}"
+        command = [
+            sys.executable, os.path.join(HERE, "load.py"),
+            "--scenarios", "orders",
+            "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency),
+            "--hot-products", "1",
+            "--hot-stock", str(args.requests),
+            "--stock-shards", str(shards),
+            "--database-url", database_url,
+            "--output", output,
+            *extra,
+        ]
+        subprocess.run(command, env={"SLOW_QUERY_THRESHOLD_MS": "0", **os.environ}, check=True, stdout=subprocess.DEVNULL)
+        with open(output) as f:
+            return json.load(f)["scenarios"]["orders"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", nargs="+", type=int, default=[0, 1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--database-url",
+        help="Empty database per run, with {shards} replaced by the shard count "
+             "(e.g. postgresql+asyncpg://localhost/bench_{shards}; default: a temporary SQLite file)",
+    )
+    parser.add_argument("--output", help="Write every run as JSON to this file")
+    args, extra = parser.parse_known_args()
+
+    results = {}
+    for shards in args.shards:
+        print(f"Running with {shards} shards...", flush=True)
+        results[shards] = run_shards(shards, args, extra)
+
+    print(f"\n{'shards':>6} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>9}  {'errors':>6}  consistent")
+    for shards, result in results.items():
+        latency = result["latency_ms"]
+        errors = sum(count for status, count in result["status_codes"].items() if status != "200")
+        print(f"{shards:>6} {result['throughput_rps']:>9} {latency['p50']:>8} {latency['p95']:>8} "
+              f"{latency['p99']:>9}  {errors:>6}  {result['consistency']['ok']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
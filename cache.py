@@ -0,0 +1,296 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    A bounded, thread-safe LRU cache whose entries expire after a fixed time-to-live.
+
+    Hit and miss counts are kept so the cache's effectiveness can be checked under load.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for `key`, or `default` if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float | None = None):
+        """
+        Store `value` under `key`, evicting the least recently used entry when full.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys):
+        """
+        Remove the given keys from the cache, ignoring keys that are not present.
+        """
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Return the current size and hit/miss counters.
+        """
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoryBackend:
+    """
+    Response cache backend that keeps entries in this process, in a `TTLCache`.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self._entries = TTLCache(maxsize=maxsize)
+        # Generation counters, bounded like the entries and evicted least recently used first.
+        # Every counter takes its values from one shared sequence, and a missing counter reads
+        # as the highest value evicted so far, so an evicted key's generation never goes back
+        # to a value that a stale entry may still be stored under.
+        self._counters = OrderedDict()
+        self._maxsize = maxsize
+        self._sequence = 0
+        self._floor = 0
+
+    async def get(self, key: str):
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        self._entries.invalidate(*keys)
+
+    async def get_counter(self, key: str) -> int:
+        value = self._counters.get(key)
+        if value is None:
+            return self._floor
+        self._counters.move_to_end(key)
+        return value
+
+    async def incr(self, key: str) -> int:
+        self._sequence += 1
+        self._counters[key] = self._sequence
+        self._counters.move_to_end(key)
+        while len(self._counters) > self._maxsize:
+            _, evicted = self._counters.popitem(last=False)
+            self._floor = max(self._floor, evicted)
+        return self._sequence
+
+
+class RedisBackend:
+    """
+    Response cache backend shared by all workers through a Redis-compatible server.
+
+    `client` is any object with the async `redis.asyncio.Redis` interface (`get`, `set`,
+    `delete`, `incr`), e.g. `fakeredis.aioredis.FakeRedis()` for local runs.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str):
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def delete(self, *keys: str):
+        await self.client.delete(*keys)
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self.client.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class CachedResponse:
+    """
+    A cached JSON response body and its ETag.
+    """
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """
+        Whether an `If-None-Match` request header already names this response.
+        """
+        if not if_none_match:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags
+
+
+class ResponseCache:
+    """
+    Caches serialized JSON responses in a pluggable backend.
+
+    Every key includes a generation number: one per object for single-object entries, and one
+    shared by all list entries. Callers read the key before querying the database, and a change
+    bumps the generation after it commits (`invalidate`, `invalidate_lists`), so a response
+    built from data read before the change is stored under a key no one looks up any more and
+    can never overwrite the fresh one. Stale entries age out of the backend on their own.
+    Backend errors are logged and treated as misses, so the cache can never fail a request.
+
+    With the memory backend, entries and generations live in each worker process, so a change
+    only invalidates the worker that made it; deployments with more than one worker need the
+    Redis backend.
+    """
+
+    def __init__(self, backend, ttl: float = 30.0, namespace: str = "cache"):
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _generation(self, name: str):
+        try:
+            return await self.backend.get_counter(self._key(name))
+        except Exception:
+            logger.warning("Response cache backend unavailable", exc_info=True)
+            return None
+
+    async def list_key(self, key: str) -> str:
+        """
+        The cache key for a list response under the current list generation.
+        """
+        return f"lists:{await self._generation('generation')}:{key}"
+
+    async def object_key(self, key: str) -> str:
+        """
+        The cache key for a single-object response under the object's current generation.
+        """
+        return f"{key}:{await self._generation(f'generation:{key}')}"
+
+    async def get(self, key: str):
+        """
+        Return the `CachedResponse` stored under `key`, or None.
+        """
+        try:
+            value = await self.backend.get(self._key(key))
+        except Exception:
+            logger.warning("Response cache backend unavailable", exc_info=True)
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag, _, body = value.partition(b"\n")
+        return CachedResponse(etag.decode(), body)
+
+    async def set(self, key: str, body: bytes) -> CachedResponse:
+        """
+        Store a serialized response body under `key` and return it with its ETag.
+        """
+        entry = CachedResponse(make_etag(body), body)
+        try:
+            await self.backend.set(self._key(key), entry.etag.encode() + b"\n" + body, self.ttl)
+        except Exception:
+            logger.warning("Response cache backend unavailable", exc_info=True)
+        return entry
+
+    async def invalidate(self, *keys: str):
+        """
+        Make the cached single-object entries for the given keys stale.
+        """
+        try:
+            for key in keys:
+                await self.backend.incr(self._key(f"generation:{key}"))
+        except Exception:
+            logger.warning("Response cache backend unavailable", exc_info=True)
+
+    async def invalidate_lists(self):
+        """
+        Make every cached list response stale.
+        """
+        try:
+            await self.backend.incr(self._key("generation"))
+        except Exception:
+            logger.warning("Response cache backend unavailable", exc_info=True)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def make_etag(body: bytes) -> str:
+    """
+    A strong ETag derived from the response body.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def make_backend(kind: str, redis_url: str | None = None):
+    """
+    Build a response cache backend from configuration: "memory" or "redis".
+    """
+    if kind == "redis":
+        import redis.asyncio as redis  # Optional dependency, only needed for the Redis backend
+
+        return RedisBackend(redis.from_url(redis_url or "redis://localhost:6379/0"))
+    return MemoryBackend()
+
+
+# Catalog response cache settings
+CATALOG_CACHE_BACKEND = os.getenv("CATALOG_CACHE_BACKEND", "memory")  # "memory" or "redis"
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "30"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+catalog_cache = ResponseCache(make_backend(CATALOG_CACHE_BACKEND, REDIS_URL), ttl=CATALOG_CACHE_TTL, namespace="catalog")
+
+
+async def invalidate_products(*product_ids: int):
+    """
+    Drop cached responses for the given products and every cached product list. Called after
+    any committed change to product data, including stock changes from orders.
+    """
+    if product_ids:
+        await catalog_cache.invalidate(*[f"product:{product_id}" for product_id in product_ids])
+    await catalog_cache.invalidate_lists()
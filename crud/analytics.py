@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import logging
+import os
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from sqlalchemy import Date, cast, delete, func, insert, literal, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.analytics import SellerDailySales
+from models.order import Order, ArchivedOrder
+from models.product import Product
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Days of order history recomputed per transaction by the rebuild job
+ANALYTICS_REBUILD_CHUNK_DAYS = int(os.getenv("ANALYTICS_REBUILD_CHUNK_DAYS", "7"))
+ANALYTICS_UPSERT_CHUNK_SIZE = 1000  # Rollup rows per upsert statement
+
+SALES_KEY = ("seller_id", "day", "product_id", "status", "slot")
+SALES_GROUPS = {
+    "day": SellerDailySales.day,
+    "product": SellerDailySales.product_id,
+    "status": SellerDailySales.status,
+}
+
+
+def _order_sales(order, status: str, sign: int, unit_price: float, slot: int = 0) -> dict:
+    return {
+        "seller_id": order.seller_id,
+        "day": order.created_at.date(),
+        "product_id": order.product_id,
+        "status": status,
+        "slot": slot,
+        "orders": sign,
+        "units": sign * order.quantity,
+        "revenue": sign * order.quantity * unit_price,
+    }
+
+
+async def add_sales(db: AsyncSession, deltas):
+    """
+    Adds sales deltas to the rollup in one INSERT ... ON CONFLICT DO UPDATE, creating
+    missing buckets and incrementing existing ones. Runs in the caller's transaction, so
+    the rollup changes commit or roll back together with the orders they describe.
+
+    Args:
+        deltas (iterable): Dicts with the `SALES_KEY` columns and the `orders`, `units` and
+            `revenue` to add (negative to subtract).
+    """
+    merged = {}
+    for delta in deltas:
+        totals = merged.setdefault(tuple(delta[name] for name in SALES_KEY), [0, 0, 0.0])
+        totals[0] += delta["orders"]
+        totals[1] += delta["units"]
+        totals[2] += delta["revenue"]
+    if not merged:
+        return
+
+    # Both SQLite and PostgreSQL spell the upsert the same way; only the construct differs
+    upsert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    rows = [
+        dict(zip(SALES_KEY, key), orders=orders, units=units, revenue=revenue)
+        for key, (orders, units, revenue) in merged.items()
+    ]
+    # Chunked to stay under the bound parameter limit on large bulk updates
+    for start in range(0, len(rows), ANALYTICS_UPSERT_CHUNK_SIZE):
+        statement = upsert(SellerDailySales).values(rows[start:start + ANALYTICS_UPSERT_CHUNK_SIZE])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=list(SALES_KEY),
+            set_={
+                "orders": SellerDailySales.orders + statement.excluded.orders,
+                "units": SellerDailySales.units + statement.excluded.units,
+                "revenue": SellerDailySales.revenue + statement.excluded.revenue,
+            },
+        ))
+
+
+async def _unit_prices(db: AsyncSession, orders) -> list:
+    """
+    The price each of `orders` is counted at, in order: the price it was placed at, or for orders
+    placed before prices were recorded, the product's current price (0 if the product is
+    gone). `rebuild_sales_chunk` applies the same rule in SQL.
+    """
+    unpriced = {order.product_id for order in orders if order.unit_price is None}
+    current = {}
+    if unpriced:
+        current = dict((await db.execute(select(Product.id, Product.price).filter(Product.id.in_(unpriced)))).all())
+    return [
+        order.unit_price if order.unit_price is not None else current.get(order.product_id, 0.0)
+        for order in orders
+    ]
+
+
+async def record_orders(db: AsyncSession, orders, slots: int = 1):
+    """
+    Counts newly placed orders in the rollup. Call before committing the orders.
+
+    With `slots` above 1 (orders for sharded products), each order is counted in a randomly
+    chosen slot row of its bucket, so concurrent orders do not all update the same row.
+    """
+    prices = await _unit_prices(db, orders)
+    await add_sales(db, [
+        _order_sales(order, order.status, 1, unit_price, random.randrange(slots) if slots > 1 else 0)
+        for order, unit_price in zip(orders, prices)
+    ])
+
+
+async def record_status_change(db: AsyncSession, order, old_status: str):
+    """
+    Moves an order from its `old_status` bucket to its current one. Call before committing
+    the status change.
+    """
+    await record_status_changes(db, [(order, old_status)])
+
+
+async def record_status_changes(db: AsyncSession, changes):
+    """
+    Moves many orders between status buckets with one rollup upsert. Call before committing
+    the status changes.
+
+    Args:
+        changes (iterable): `(order, old_status)` pairs, where `order.status` is the new status.
+    """
+    changes = [(order, old_status) for order, old_status in changes if old_status != order.status]
+    prices = await _unit_prices(db, [order for order, _ in changes])
+    deltas = []
+    for (order, old_status), unit_price in zip(changes, prices):
+        deltas.append(_order_sales(order, old_status, -1, unit_price))
+        deltas.append(_order_sales(order, order.status, 1, unit_price))
+    await add_sales(db, deltas)
+
+
+async def get_sales_summary(
+    db: AsyncSession,
+    seller_id: int,
+    group_by: str = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+):
+    """
+    Aggregates a seller's sales from the rollup, grouped by day, product or status.
+
+    Reads at most one row per day, product, status and slot in the range, however many
+    orders those days contain. Canceled orders are left out unless `status` asks for them,
+    so revenue only counts orders that still stand.
+
+    Returns:
+        list: Rows with `key`, `orders`, `units` and `revenue`, ordered by key.
+    """
+    key = SALES_GROUPS[group_by]
+    query = select(
+        key.label("key"),
+        func.sum(SellerDailySales.orders).label("orders"),
+        func.sum(SellerDailySales.units).label("units"),
+        func.sum(SellerDailySales.revenue).label("revenue"),
+    ).filter(SellerDailySales.seller_id == seller_id)
+    if date_from is not None:
+        query = query.filter(SellerDailySales.day >= date_from)
+    if date_to is not None:
+        query = query.filter(SellerDailySales.day < date_to)
+    if status is not None:
+        query = query.filter(SellerDailySales.status == status)
+    else:
+        query = query.filter(SellerDailySales.status != "canceled")
+    # Buckets whose orders all moved to another status net out to zero
+    query = query.group_by(key).having(func.sum(SellerDailySales.orders) != 0).order_by(key)
+    return (await db.execute(query)).all()
+
+
+def _order_day(db: AsyncSession, created_at):
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(created_at, Date)
+    # SQLite stores dates as 'YYYY-MM-DD' text, which is exactly what date() returns
+    return func.date(created_at)
+
+
+async def rebuild_sales_chunk(db: AsyncSession, start: date, end: date, seller_id: Optional[int] = None) -> int:
+    """
+    Recomputes the rollup for the days in [start, end) from the orders placed on them,
+    hot and archived, in one transaction.
+
+    The old rows are deleted before the orders are read, and concurrent order writes are
+    held off until the chunk commits (by SQLite's single writer, or a table lock on
+    PostgreSQL), so an order is never counted twice or missed.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    start_at, end_at = datetime.combine(start, time.min), datetime.combine(end, time.min)
+    sources = []
+    for model in (Order, ArchivedOrder):
+        source = select(
+            model.seller_id, model.product_id, model.status, model.quantity, model.unit_price, model.created_at
+        ).filter(model.created_at >= start_at, model.created_at < end_at)
+        if seller_id is not None:
+            source = source.filter(model.seller_id == seller_id)
+        sources.append(source)
+    orders = union_all(*sources).subquery()
+
+    day = _order_day(db, orders.c.created_at)
+    price = func.coalesce(orders.c.unit_price, Product.price, literal(0.0))
+    aggregate = (
+        select(
+            orders.c.seller_id, day, orders.c.product_id, orders.c.status, literal(0),
+            func.count(), func.sum(orders.c.quantity), func.sum(orders.c.quantity * price),
+        )
+        .outerjoin(Product, Product.id == orders.c.product_id)
+        .group_by(orders.c.seller_id, day, orders.c.product_id, orders.c.status)
+    )
+
+    stale = delete(SellerDailySales).where(SellerDailySales.day >= start, SellerDailySales.day < end)
+    if seller_id is not None:
+        stale = stale.where(SellerDailySales.seller_id == seller_id)
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            # Conflicts with the ROW EXCLUSIVE lock taken by order writes that update the rollup
+            await db.execute(text("LOCK TABLE seller_sales_daily IN SHARE ROW EXCLUSIVE MODE"))
+        await db.execute(stale)
+        written = (await db.execute(
+            insert(SellerDailySales).from_select(list(SALES_KEY) + ["orders", "units", "revenue"], aggregate)
+        )).rowcount
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return written
+
+
+async def rebuild_sales_rollup(seller_id: Optional[int] = None, chunk_days: int = ANALYTICS_REBUILD_CHUNK_DAYS) -> int:
+    """
+    Recomputes the rollup from the live and archived order history, `chunk_days` days per
+    transaction, so order writes only ever wait for one chunk. Safe to run while the
+    application is serving orders, and safe to re-run.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    async with SessionLocal() as db:
+        bounds = []
+        for model in (Order, ArchivedOrder):
+            query = select(func.min(model.created_at), func.max(model.created_at))
+            if seller_id is not None:
+                query = query.filter(model.seller_id == seller_id)
+            bounds.extend(value.date() for value in (await db.execute(query)).one() if value is not None)
+        # Also clear rollup days that no longer have any orders
+        query = select(func.min(SellerDailySales.day), func.max(SellerDailySales.day))
+        if seller_id is not None:
+            query = query.filter(SellerDailySales.seller_id == seller_id)
+        bounds.extend(value for value in (await db.execute(query)).one() if value is not None)
+        if not bounds:
+            return 0
+
+        day, last_day = min(bounds), max(bounds)
+        total = 0
+        while day <= last_day:
+            end = day + timedelta(days=chunk_days)
+            total += await rebuild_sales_chunk(db, day, end, seller_id)
+            day = end
+            await asyncio.sleep(0)
+    logger.info("Rebuilt %d seller sales rollup rows", total)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the seller sales rollup from the order history.")
+    parser.add_argument("--seller-id", type=int, help="Only rebuild this seller's rows")
+    parser.add_argument("--chunk-days", type=int, default=ANALYTICS_REBUILD_CHUNK_DAYS)
+    args = parser.parse_args()
+
+    # Load every model so the mappers' relationships can be resolved outside the application
+    import models.seller, models.customer, models.wallet  # noqa: E401, F401
+    from database import engine
+
+    async def run():
+        try:
+            print(f"Wrote {await rebuild_sales_rollup(args.seller_id, args.chunk_days)} rollup rows")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, literal, select
+from models.order import Order, ArchivedOrder
+from database import SessionLocal
+
+# Order archiving settings. Archiving is off unless ORDER_ARCHIVE_AFTER_DAYS is set.
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "0"))
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "1000"))
+ORDER_ARCHIVE_INTERVAL = float(os.getenv("ORDER_ARCHIVE_INTERVAL", "3600"))  # Seconds between runs
+
+# Orders in these states never change again and can leave the hot table
+TERMINAL_STATUSES = ("delivered", "canceled")
+
+ARCHIVED_COLUMNS = ["id", "product_id", "seller_id", "customer_id", "quantity", "status", "created_at", "unit_price"]
+
+
+async def archive_orders_batch(db, cutoff: datetime, batch_size: int = ORDER_ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Moves up to `batch_size` terminal orders created before `cutoff` into `orders_archive`
+    in one short transaction.
+
+    Returns:
+        int: The number of orders archived.
+    """
+    ids = (await db.scalars(
+        select(Order.id)
+        .filter(Order.status.in_(TERMINAL_STATUSES), Order.created_at < cutoff)
+        .order_by(Order.id)
+        .limit(batch_size)
+    )).all()
+    if not ids:
+        return 0
+
+    columns = [getattr(Order, name) for name in ARCHIVED_COLUMNS]
+    try:
+        await db.execute(
+            insert(ArchivedOrder).from_select(
+                ARCHIVED_COLUMNS + ["archived_at"],
+                select(*columns, literal(datetime.utcnow())).filter(Order.id.in_(ids)),
+            )
+        )
+        await db.execute(delete(Order).where(Order.id.in_(ids)))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return len(ids)
+
+
+async def archive_orders(
+    older_than_days: int = ORDER_ARCHIVE_AFTER_DAYS, batch_size: int = ORDER_ARCHIVE_BATCH_SIZE
+) -> int:
+    """
+    Moves delivered and canceled orders older than `older_than_days` into the archive,
+    `batch_size` orders per transaction, until none are left. Does nothing when archiving
+    is disabled (`older_than_days` of 0).
+
+    Returns:
+        int: The total number of orders archived.
+    """
+    if older_than_days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    total = 0
+    async with SessionLocal() as db:
+        while True:
+            archived = await archive_orders_batch(db, cutoff, batch_size)
+            total += archived
+            if archived < batch_size:
+                return total
+            await asyncio.sleep(0)
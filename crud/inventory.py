@@ -0,0 +1,181 @@
+import logging
+import os
+import random
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.product import Product, ProductStockShard
+from database import SessionLocal
+from cache import invalidate_products
+
+logger = logging.getLogger(__name__)
+
+# Sharded inventory settings
+STOCK_MAX_SHARDS = int(os.getenv("STOCK_MAX_SHARDS", "64"))
+STOCK_REBALANCE_INTERVAL = float(os.getenv("STOCK_REBALANCE_INTERVAL", "5"))  # Seconds between rebalancing runs
+STOCK_REBALANCE_BATCH_SIZE = int(os.getenv("STOCK_REBALANCE_BATCH_SIZE", "100"))  # Products rebalanced per run
+
+
+async def take_from_shards(db: AsyncSession, product_id: int, quantity: int, shards: int) -> bool:
+    """
+    Deducts `quantity` from a sharded product's stock counters.
+
+    A randomly chosen shard is tried first, so concurrent orders for the product mostly
+    update different rows. If it runs short, the fullest shard is tried, and only then are
+    all the shards locked and drained together, for orders larger than any one shard. Every
+    step is a conditional UPDATE, so a shard can never go below zero.
+
+    Returns:
+        bool: Whether the shards held enough stock. Nothing is deducted otherwise.
+    """
+    shard = ProductStockShard
+    taken = await db.scalar(
+        update(shard)
+        .where(shard.product_id == product_id, shard.shard == random.randrange(shards), shard.quantity >= quantity)
+        .values(quantity=shard.quantity - quantity)
+        .returning(shard.shard)
+    )
+    if taken is not None:
+        return True
+
+    fullest = select(shard.shard).where(shard.product_id == product_id).order_by(shard.quantity.desc()).limit(1)
+    taken = await db.scalar(
+        update(shard)
+        .where(shard.product_id == product_id, shard.shard == fullest.scalar_subquery(), shard.quantity >= quantity)
+        .values(quantity=shard.quantity - quantity)
+        .returning(shard.shard)
+    )
+    if taken is not None:
+        return True
+
+    rows = (await db.execute(
+        select(shard.shard, shard.quantity)
+        .where(shard.product_id == product_id, shard.quantity > 0)
+        .order_by(shard.shard)
+        .with_for_update()
+    )).all()
+    if sum(row.quantity for row in rows) < quantity:
+        return False
+    deductions = {}
+    remaining = quantity
+    for row in rows:
+        deductions[row.shard] = min(row.quantity, remaining)
+        remaining -= deductions[row.shard]
+        if not remaining:
+            break
+    await db.execute(
+        update(shard)
+        .where(shard.product_id == product_id, shard.shard.in_(deductions))
+        .values(quantity=shard.quantity - case(deductions, value=shard.shard))
+    )
+    return True
+
+
+async def redistribute_stock(db: AsyncSession, product_id: int, shards: Optional[int] = None, total: Optional[int] = None):
+    """
+    Spreads a product's free stock evenly over `shards` counters (the current number if
+    None), in the caller's transaction. With `shards` 0 the stock moves back onto the
+    product row.
+
+    Units held by cart reservations always stay on the product row. With `total`, the
+    product's stock is first set to `total` units, as if by a product update.
+
+    Returns:
+        bool: Whether the product exists.
+    """
+    # A no-op UPDATE rather than SELECT ... FOR UPDATE, which SQLite ignores: it also takes
+    # SQLite's writer lock before the counters are read, so no order can slip in between
+    product = (await db.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(stock_shards=Product.stock_shards)
+        .returning(Product.quantity, Product.reserved, Product.stock_shards)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if product is None:
+        return False
+    counters = dict((await db.execute(
+        select(ProductStockShard.shard, ProductStockShard.quantity)
+        .where(ProductStockShard.product_id == product_id)
+        .with_for_update()
+    )).all())
+    count = product.stock_shards if shards is None else shards
+    if total is None:
+        free = product.quantity - product.reserved + sum(counters.values())
+    else:
+        free = total - product.reserved
+
+    # A deficit (stock lowered below the reserved units) stays on the product row
+    per_shard, extra = divmod(max(free, 0), count) if count else (0, 0)
+    spread = {index: per_shard + (index < extra) for index in range(count)}
+    if any(index >= count for index in counters):
+        await db.execute(
+            delete(ProductStockShard).where(ProductStockShard.product_id == product_id, ProductStockShard.shard >= count)
+        )
+    # Existing counters are updated in place, so concurrent orders waiting on them see the new values
+    existing = {index: quantity for index, quantity in spread.items() if index in counters}
+    if existing:
+        await db.execute(
+            update(ProductStockShard)
+            .where(ProductStockShard.product_id == product_id, ProductStockShard.shard.in_(existing))
+            .values(quantity=case(existing, value=ProductStockShard.shard))
+        )
+    missing = [{"product_id": product_id, "shard": index, "quantity": quantity}
+               for index, quantity in spread.items() if index not in counters]
+    if missing:
+        await db.execute(insert(ProductStockShard), missing)
+    await db.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(quantity=product.reserved + free - sum(spread.values()), stock_shards=count)
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+
+async def set_stock_shards(db: AsyncSession, product_id: int, shards: int):
+    """
+    Splits a product's stock over `shards` counters, or merges it back with 0.
+
+    Raises:
+        HTTPException: If the product does not exist.
+    """
+    try:
+        if not await redistribute_stock(db, product_id, shards):
+            raise HTTPException(status_code=404, detail="Product not found")
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(product_id)
+
+
+async def rebalance_stock_shards(batch_size: int = STOCK_REBALANCE_BATCH_SIZE) -> int:
+    """
+    Evens out sharded products where some counters have run dry while the others could
+    refill them, one product per transaction. The total stock does not change, so the
+    catalog cache is left alone.
+
+    Returns:
+        int: The number of products rebalanced.
+    """
+    shard = ProductStockShard
+    skewed = (
+        select(shard.product_id)
+        .group_by(shard.product_id)
+        .having(func.min(shard.quantity) == 0, func.sum(shard.quantity) >= func.count())
+        .limit(batch_size)
+    )
+    async with SessionLocal() as db:
+        product_ids = (await db.scalars(skewed)).all()
+        for product_id in product_ids:
+            try:
+                await redistribute_stock(db, product_id)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+    if product_ids:
+        logger.debug("Rebalanced the stock shards of %d products", len(product_ids))
+    return len(product_ids)
@@ -1,50 +1,489 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
 from fastapi import Depends, HTTPException
-from sqlalchemy.orm import Session
-from models.order import Order
+from sqlalchemy import case, exists, insert, literal, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from models.customer import Customer
+from models.order import Order, ArchivedOrder
 from models.product import Product
-from schemas.order import OrderCreate
+from models.seller import Seller
+from models.wallet import Wallet
+from schemas.order import OrderCreate, OrderBatchCreate, OrderItem, OrderStatusFilter, MAX_BULK_STATUS_ORDERS
+from crud.wallet import apply_balance_change, get_transaction_by_key
+from crud.pagination import encode_cursor, decode_cursor
+from crud.analytics import record_orders, record_status_changes
+from crud.inventory import take_from_shards
+from crud.outbox import add_events, order_payload, ORDER_CREATED, ORDER_STATUS_CHANGED
+from cache import invalidate_products
 
-def create_order(db: Session, order: OrderCreate):
+async def reserve_stock(db: AsyncSession, product_id: int, quantity: int):
     """
-    Creates a new order, updates the product stock, and saves the order to the database.
+    Atomically deducts `quantity` from a product's stock in a single conditional UPDATE.
+
+    The `quantity - reserved >= :q` guard is evaluated by the database against the current
+    row, so concurrent orders can never take the stock below zero, overwrite each other's
+    deduction or sell units held by cart reservations. Sharded products keep their free
+    stock in separate counters, which are only touched when the product row runs short.
+
+    Returns:
+        Row: The product's `seller_id`, current `price` and `stock_shards`.
+
+    Raises:
+        HTTPException: If the product does not exist or has too little stock.
+    """
+    reserved = (await db.execute(
+        update(Product)
+        .where(Product.id == product_id, Product.quantity - Product.reserved >= quantity)
+        .values(quantity=Product.quantity - quantity)
+        .returning(Product.seller_id, Product.price, Product.stock_shards)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if reserved is not None:
+        return reserved
+    product = (await db.execute(
+        select(Product.seller_id, Product.price, Product.stock_shards).filter(Product.id == product_id)
+    )).first()
+    if product is not None and product.stock_shards and await take_from_shards(db, product_id, quantity, product.stock_shards):
+        return product
+    await raise_stock_error(db, product_id)
+
+async def raise_stock_error(db: AsyncSession, product_id: int):
+    """
+    Explains why stock could not be taken from a product. Only called on the (rare) path
+    where a conditional stock UPDATE matched nothing.
     """
-    # Fetch the product details
-    product = db.query(Product).filter(Product.id == order.product_id).first()
+    product = await db.scalar(select(Product).filter(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    
+    raise HTTPException(
+        status_code=400,
+        detail=f"Not enough stock for product {product.name}. Only {product.available_quantity} items available."
+    )
 
-    # Check product stock
-    if product.quantity < order.quantity:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Not enough stock for product {product.name}. Only {product.stock} items available."
+async def create_order(db: AsyncSession, order: OrderCreate):
+    """
+    Creates a new order, updates the product stock, and saves the order to the database.
+
+    The stock deduction and the order insert run in one transaction. The insert selects from
+    `customers`, so an unknown customer inserts nothing and the stock deduction is rolled back.
+    """
+    try:
+        reserved = await reserve_stock(db, order.product_id, order.quantity)
+        db_order = await db.scalar(
+            insert(Order)
+            .from_select(
+                ["product_id", "seller_id", "customer_id", "quantity", "status", "unit_price"],
+                select(
+                    literal(order.product_id),
+                    literal(reserved.seller_id),
+                    Customer.id,
+                    literal(order.quantity),
+                    literal(order.status),
+                    literal(reserved.price),
+                ).where(Customer.id == order.customer_id),
+            )
+            .returning(Order)
+        )
+        if db_order is None:
+            raise HTTPException(status_code=404, detail="Customer not found")
+        await record_orders(db, [db_order], slots=reserved.stock_shards)
+        await add_events(db, ORDER_CREATED, [order_payload(db_order)])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(order.product_id)
+    return db_order
+
+def order_total(price: float, quantity: int) -> int:
+    """
+    The amount charged to a wallet for `quantity` items at `price`, in whole wallet units.
+
+    Raises:
+        HTTPException: If the total is not a whole number of wallet units, rather than
+        rounding the charge up or down.
+    """
+    total = Decimal(str(price)) * quantity
+    if total != total.to_integral_value():
+        raise HTTPException(status_code=400, detail="Order total cannot be paid exactly from a wallet")
+    return int(total)
+
+async def checkout_with_wallet(db: AsyncSession, customer_id: int, item: OrderItem, idempotency_key: Optional[str] = None):
+    """
+    Buys a product with the customer's wallet balance: deducts the stock, inserts the order
+    and debits the wallet by `price * quantity` in one transaction.
+
+    Stock and balance are both changed by conditional UPDATEs, so the order is only placed if
+    both succeed, and there is never a window where stock is taken but payment is missing.
+    A retry with the same `idempotency_key` returns the original order and charge.
+
+    Returns:
+        tuple: The order and the wallet ledger entry that paid for it.
+
+    Raises:
+        HTTPException: 409 if the idempotency key was already used for another request, or
+        400 if the order total is not a whole number of wallet units.
+    """
+    if idempotency_key:
+        existing = await get_transaction_by_key(db, idempotency_key, customer_id=customer_id)
+        if existing:
+            return await _replay_checkout(db, existing, item)
+
+    try:
+        reserved = await reserve_stock(db, item.product_id, item.quantity)
+        db_order = await db.scalar(
+            insert(Order)
+            .values(
+                product_id=item.product_id,
+                seller_id=reserved.seller_id,
+                customer_id=customer_id,
+                quantity=item.quantity,
+                status="pending",
+                unit_price=reserved.price,
+            )
+            .returning(Order)
+        )
+        transaction = await apply_balance_change(
+            db,
+            -order_total(reserved.price, item.quantity),
+            customer_id=customer_id,
+            idempotency_key=idempotency_key,
+            order_id=db_order.id,
+        )
+        if transaction is None:
+            if await db.scalar(select(Wallet.id).filter(Wallet.customer_id == customer_id)) is None:
+                raise HTTPException(status_code=404, detail="Wallet not found")
+            raise HTTPException(status_code=400, detail="Insufficient balance")
+        await record_orders(db, [db_order], slots=reserved.stock_shards)
+        await add_events(db, ORDER_CREATED, [order_payload(db_order)])
+        await db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key already placed this order
+        await db.rollback()
+        existing = await get_transaction_by_key(db, idempotency_key, customer_id=customer_id) if idempotency_key else None
+        if existing is None:
+            raise
+        return await _replay_checkout(db, existing, item)
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(item.product_id)
+    return db_order, transaction
+
+async def _replay_checkout(db: AsyncSession, transaction, item: OrderItem):
+    """
+    Returns the order paid for by an earlier checkout with the same idempotency key.
+
+    Raises:
+        HTTPException: If the key was used for a wallet credit or debit, or for a checkout
+        of a different item.
+    """
+    order = await get_order_by_id(db, transaction.order_id) if transaction.order_id is not None else None
+    if order is None or (order.product_id, order.quantity) != (item.product_id, item.quantity):
+        raise HTTPException(status_code=409, detail="Idempotency key was already used for a different request")
+    return order, transaction
+
+async def create_orders_batch(db: AsyncSession, batch: OrderBatchCreate):
+    """
+    Checks out a cart: deducts stock for every line and inserts one order per product,
+    all or nothing.
+
+    Stock for all products is deducted by a single conditional UPDATE (guarded per row by a
+    CASE on the product ID), and the orders are written by a single multi-row INSERT, so the
+    number of round-trips does not grow with the number of lines. Only lines for sharded
+    products that their product row cannot cover take extra statements, against the shards.
+    """
+    # Merge repeated products into one line; lock rows in a stable order
+    quantities = {}
+    for item in batch.items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    product_ids = sorted(quantities)
+    requested = case(quantities, value=Product.id)
+
+    try:
+        result = await db.execute(
+            update(Product)
+            .where(
+                Product.id.in_(product_ids),
+                Product.quantity - Product.reserved >= requested,
+                exists().where(Customer.id == batch.customer_id),
+            )
+            .values(quantity=Product.quantity - requested)
+            .returning(Product.id, Product.seller_id, Product.price, Product.stock_shards)
+            .execution_options(synchronize_session=False)
         )
+        reserved = {row.id: row for row in result.all()}
 
-    # Deduct stock
-    product.quantity -= order.quantity
-    db.add(product)
+        short = [product_id for product_id in product_ids if product_id not in reserved]
+        if short and await db.get(Customer, batch.customer_id) is not None:
+            # Sharded products keep most of their stock off the product row
+            sharded = (await db.execute(
+                select(Product.id, Product.seller_id, Product.price, Product.stock_shards)
+                .filter(Product.id.in_(short), Product.stock_shards > 0)
+            )).all()
+            for row in sharded:
+                if await take_from_shards(db, row.id, quantities[row.id], row.stock_shards):
+                    reserved[row.id] = row
+        if len(reserved) != len(product_ids):
+            await _raise_checkout_error(db, batch.customer_id, quantities)
 
-    db_order = Order(
-        product_id=order.product_id,
-        seller_id=product.seller_id,
-        customer_id=order.customer_id,
-        quantity=order.quantity,
-        status=order.status
+        db_orders = (await db.scalars(
+            insert(Order).returning(Order, sort_by_parameter_order=True),
+            [
+                {
+                    "product_id": product_id,
+                    "seller_id": reserved[product_id].seller_id,
+                    "customer_id": batch.customer_id,
+                    "quantity": quantities[product_id],
+                    "status": "pending",
+                    "unit_price": reserved[product_id].price,
+                }
+                for product_id in product_ids
+            ],
+        )).all()
+        await record_orders(db, db_orders, slots=max(row.stock_shards for row in reserved.values()))
+        await add_events(db, ORDER_CREATED, [order_payload(db_order) for db_order in db_orders])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(*product_ids)
+    return db_orders
+
+async def _raise_checkout_error(db: AsyncSession, customer_id: int, quantities: dict):
+    """
+    Explains why a checkout could not deduct stock for every line.
+    """
+    if await db.get(Customer, customer_id) is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    result = await db.execute(select(Product.id, Product.available_quantity).filter(Product.id.in_(quantities)))
+    available = dict(result.all())
+    missing = [product_id for product_id in quantities if product_id not in available]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+    short = [product_id for product_id, quantity in quantities.items() if available[product_id] < quantity]
+    raise HTTPException(
+        status_code=400,
+        detail={"message": "Not enough stock", "available": {product_id: available[product_id] for product_id in short}},
     )
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    return db_order
 
-def get_orders_by_customer(db: Session, customer_id: int, skip: int = 0, limit: int = 100):
+# Statuses an order can move to from each status; delivered and canceled orders are final
+ORDER_STATUS_TRANSITIONS = {
+    "pending": ("processing", "shipped", "canceled"),
+    "processing": ("shipped", "canceled"),
+    "shipped": ("delivered",),
+}
+
+async def update_orders_status(
+    db: AsyncSession,
+    seller_id: int,
+    status: str,
+    order_ids: Optional[list[int]] = None,
+    filter: Optional[OrderStatusFilter] = None,
+    limit: int = MAX_BULK_STATUS_ORDERS,
+):
+    """
+    Moves many of a seller's orders to `status` in one transaction, selected by ID or by
+    `filter` (at most `limit` of them, lowest IDs first).
+
+    Ownership and the allowed transitions are checked by the UPDATE itself: one statement
+    per status that may move to `status`, each guarded by `seller_id = :sid AND status = :old`,
+    so no order is read first and a concurrent change can never be overwritten. The sales
+    rollup and the outbox are updated with one batched write each.
+
+    Returns:
+        tuple: The updated orders (rows with their new status) and one result dict per
+        requested ID (per updated order when selecting by filter).
+    """
+    updated = []
+    try:
+        for old_status in [old for old, targets in ORDER_STATUS_TRANSITIONS.items() if status in targets]:
+            guard = (Order.seller_id == seller_id, Order.status == old_status)
+            if order_ids is not None:
+                selected = Order.id.in_(order_ids)
+            else:
+                query = select(Order.id).filter(*guard, *_order_filter(filter))
+                selected = Order.id.in_(query.order_by(Order.id).limit(limit - len(updated)).scalar_subquery())
+            rows = (await db.execute(
+                update(Order)
+                .where(*guard, selected)
+                .values(status=status)
+                .returning(
+                    Order.id, Order.product_id, Order.seller_id, Order.customer_id, Order.quantity,
+                    Order.unit_price, Order.status, Order.created_at,
+                )
+                .execution_options(synchronize_session=False)
+            )).all()
+            updated.extend((row, old_status) for row in rows)
+            if order_ids is None and len(updated) >= limit:
+                break
+
+        await record_status_changes(db, updated)
+        await add_events(db, ORDER_STATUS_CHANGED, [{**order_payload(row), "old_status": old} for row, old in updated])
+
+        if order_ids is None:
+            results = [{"order_id": row.id, "outcome": "updated", "status": status} for row, _ in updated]
+        else:
+            results = await _order_status_results(db, seller_id, status, order_ids, {row.id for row, _ in updated})
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return [row for row, _ in updated], results
+
+async def change_order_status(db: AsyncSession, order_id: int, seller_id: int, status: str):
+    """
+    Moves one of a seller's orders to `status`, under the same transition rules as
+    `update_orders_status`. Setting the status an order already has changes nothing.
+
+    Returns:
+        list: The updated order (as a row with its new status), or nothing if it already had `status`.
+
+    Raises:
+        HTTPException: 404 if the order does not exist, 403 if it belongs to another seller,
+        409 if its status cannot move to `status`.
+    """
+    updated, [result] = await update_orders_status(db, seller_id, status, order_ids=[order_id])
+    if result["outcome"] == "not_found":
+        if await db.scalar(select(Order.id).filter(Order.id == order_id)) is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        raise HTTPException(status_code=403, detail="Unauthorized to update this order")
+    if result["outcome"] == "invalid_transition":
+        raise HTTPException(
+            status_code=409, detail=f"Cannot change the status of a {result['status']} order to {status}"
+        )
+    return updated
+
+def _order_filter(filter: OrderStatusFilter) -> list:
+    conditions = []
+    if filter.status is not None:
+        conditions.append(Order.status == filter.status.value)
+    if filter.product_id is not None:
+        conditions.append(Order.product_id == filter.product_id)
+    if filter.created_from is not None:
+        conditions.append(Order.created_at >= filter.created_from)
+    if filter.created_to is not None:
+        conditions.append(Order.created_at < filter.created_to)
+    return conditions
+
+async def _order_status_results(db: AsyncSession, seller_id: int, status: str, order_ids: list[int], updated: set) -> list:
+    """
+    Explains, in one query, why the orders that were not updated kept their status.
+    """
+    remaining = [order_id for order_id in order_ids if order_id not in updated]
+    current = {}
+    if remaining:
+        current = dict((await db.execute(
+            select(Order.id, Order.status).filter(Order.seller_id == seller_id, Order.id.in_(remaining))
+        )).all())
+    results = []
+    for order_id in order_ids:
+        if order_id in updated:
+            results.append({"order_id": order_id, "outcome": "updated", "status": status})
+        elif order_id not in current:
+            results.append({"order_id": order_id, "outcome": "not_found", "status": None})
+        else:
+            outcome = "unchanged" if current[order_id] == status else "invalid_transition"
+            results.append({"order_id": order_id, "outcome": outcome, "status": current[order_id]})
+    return results
+
+async def get_orders_by_customer(db: AsyncSession, customer_id: int, skip: int = 0, limit: int = 100):
     """
     Retrieves a list of orders for a specific customer with optional pagination.
     """
-    return db.query(Order).filter(Order.customer_id == customer_id).offset(skip).limit(limit).all()
+    result = await db.scalars(select(Order).filter(Order.customer_id == customer_id).offset(skip).limit(limit))
+    return result.all()
+
+async def get_order_history_page(
+    db: AsyncSession,
+    customer_id: Optional[int] = None,
+    seller_id: Optional[int] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    as_dicts: bool = False,
+):
+    """
+    Retrieves one page of a customer's or seller's order history, newest first, with the
+    product and seller of each order loaded in the same query.
+
+    Orders are paged by `(created_at, id)` with keyset pagination, which walks the
+    `(customer_id | seller_id, created_at, id)` index instead of OFFSET-scanning the history.
+
+    With `as_dicts`, only the response columns are selected and each order is returned as a
+    plain dict shaped like `OrderDetailResponse`, skipping ORM object construction.
+
+    Returns:
+        tuple: The orders on the page and the cursor for the next page (None on the last page).
+    """
+    if as_dicts:
+        query = (
+            select(
+                Order.id, Order.product_id, Order.quantity, Order.status, Order.created_at,
+                Product.id.label("product__id"), Product.name.label("product__name"), Product.price.label("product__price"),
+                Seller.id.label("seller__id"), Seller.store_name.label("seller__store_name"),
+            )
+            .outerjoin(Product, Order.product_id == Product.id)
+            .outerjoin(Seller, Order.seller_id == Seller.id)
+        )
+    else:
+        query = select(Order).options(joinedload(Order.product), joinedload(Order.seller))
+    if customer_id is not None:
+        query = query.filter(Order.customer_id == customer_id)
+    if seller_id is not None:
+        query = query.filter(Order.seller_id == seller_id)
+    if status is not None:
+        query = query.filter(Order.status == status)
+    if created_from is not None:
+        query = query.filter(Order.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(Order.created_at < created_to)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, "orders", 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        query = query.filter(tuple_(Order.created_at, Order.id) < tuple_(created_at, last_id))
+
+    query = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+    result = await db.execute(query) if as_dicts else await db.scalars(query)
+    orders = result.all()
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        next_cursor = encode_cursor("orders", [last.created_at.isoformat(), last.id])
+    if as_dicts:
+        orders = [_order_detail_dict(row) for row in orders]
+    return orders, next_cursor
+
+def _order_detail_dict(row) -> dict:
+    """
+    Nests the `product__*` and `seller__*` columns of an order history row.
+    """
+    return {
+        "id": row.id,
+        "product_id": row.product_id,
+        "quantity": row.quantity,
+        "status": row.status,
+        "created_at": row.created_at,
+        "product": {"id": row.product__id, "name": row.product__name, "price": row.product__price}
+        if row.product__id is not None else None,
+        "seller": {"id": row.seller__id, "store_name": row.seller__store_name}
+        if row.seller__id is not None else None,
+    }
 
-def get_order_by_id(db: Session, order_id: int):
+async def get_order_by_id(db: AsyncSession, order_id: int):
     """
-    Retrieves the details of a specific order by its ID.
+    Retrieves the details of a specific order by its ID, looking in the archive for orders
+    that have been moved out of the hot table.
     """
-    return db.query(Order).filter(Order.id == order_id).first()
+    return await db.get(Order, order_id) or await db.get(ArchivedOrder, order_id)
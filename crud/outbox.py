@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.outbox import OutboxEvent, DeadLetterEvent
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Outbox dispatcher settings
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))  # Seconds between polls when idle
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))  # Claimed events are redelivered after this
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))  # Then the event moves to the dead-letter table
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "1"))  # First retry delay, doubled per attempt
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "300"))
+
+# Event topics
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+WALLET_TRANSACTION = "wallet.transaction"
+
+# Handlers per topic, called by the dispatcher with each event
+_handlers: dict[str, list] = {}
+
+
+def register_handler(topic: str, handler=None):
+    """
+    Registers an async `handler(event)` for events on `topic`. Can be used as a decorator.
+
+    Delivery is at least once: an event is retried, on every handler of its topic, until all
+    of them succeed in the same run, so handlers must tolerate seeing an event twice.
+    """
+    def register(handler):
+        _handlers.setdefault(topic, []).append(handler)
+        return handler
+
+    return register if handler is None else register(handler)
+
+
+async def add_events(db: AsyncSession, topic: str, payloads):
+    """
+    Writes events to the outbox in the caller's transaction, so they are delivered if and
+    only if the change they describe commits. Nothing else happens on the request path.
+    """
+    payloads = list(payloads)
+    if payloads:
+        await db.execute(insert(OutboxEvent), [{"topic": topic, "payload": payload} for payload in payloads])
+
+
+def order_payload(order) -> dict:
+    return {
+        "order_id": order.id,
+        "product_id": order.product_id,
+        "seller_id": order.seller_id,
+        "customer_id": order.customer_id,
+        "quantity": order.quantity,
+        "status": order.status,
+        "unit_price": order.unit_price,
+    }
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS))
+
+
+async def _claim_events(db: AsyncSession, now: datetime, batch_size: int):
+    """
+    Leases up to `batch_size` due events by pushing their `available_at` past the lease, in
+    one short transaction, so other dispatchers skip them while they are being handled and
+    they come back on their own if this process dies.
+    """
+    due = (
+        select(OutboxEvent.id)
+        .filter(OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.available_at, OutboxEvent.id)
+        .limit(batch_size)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        due = due.with_for_update(skip_locked=True)
+    try:
+        events = (await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due.scalar_subquery()))
+            .values(available_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS), attempts=OutboxEvent.attempts + 1)
+            .returning(
+                OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload, OutboxEvent.created_at, OutboxEvent.attempts
+            )
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return sorted(events, key=lambda event: event.id)
+
+
+async def _deliver(event) -> Optional[str]:
+    """
+    Runs every handler of the event's topic. Returns the first error, or None on success.
+    """
+    for handler in _handlers.get(event.topic, ()):
+        try:
+            await handler(event)
+        except Exception as e:
+            logger.warning(
+                "Outbox handler %s failed on event %d (%s)", getattr(handler, "__name__", handler), event.id, event.topic,
+                exc_info=True,
+            )
+            return f"{type(e).__name__}: {e}"
+    return None
+
+
+async def dispatch_outbox_batch(db: AsyncSession, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Claims one batch of due events, delivers them, and records the outcome in one
+    transaction: delivered events are deleted, failed ones are rescheduled with exponential
+    backoff, and those out of attempts are moved to the dead-letter table.
+
+    Returns:
+        int: The number of events claimed.
+    """
+    now = datetime.utcnow()
+    events = await _claim_events(db, now, batch_size)
+    if not events:
+        return 0
+
+    delivered, retries, dead = [], {}, []
+    for event in events:
+        error = await _deliver(event)
+        if error is None:
+            delivered.append(event.id)
+        elif event.attempts >= OUTBOX_MAX_ATTEMPTS:
+            dead.append((event, error))
+        else:
+            retries[event.id] = error
+
+    finished = datetime.utcnow()
+    try:
+        if delivered or dead:
+            await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(delivered + [event.id for event, _ in dead])))
+        if dead:
+            await db.execute(insert(DeadLetterEvent), [
+                {"id": event.id, "topic": event.topic, "payload": event.payload, "created_at": event.created_at,
+                 "failed_at": finished, "attempts": event.attempts, "last_error": error}
+                for event, error in dead
+            ])
+            logger.error("Moved %d outbox events to the dead-letter table", len(dead))
+        if retries:
+            attempts = {event.id: event.attempts for event in events}
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(retries))
+                .values(
+                    available_at=case({id: finished + _backoff(attempts[id]) for id in retries}, value=OutboxEvent.id),
+                    last_error=case(retries, value=OutboxEvent.id),
+                )
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return len(events)
+
+
+async def dispatch_outbox(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Claims and delivers due events `batch_size` at a time until none are left. Failed
+    deliveries are rescheduled with backoff, so they are not retried within the same call.
+
+    Returns:
+        int: The number of events handled.
+    """
+    total = 0
+    async with SessionLocal() as db:
+        while True:
+            handled = await dispatch_outbox_batch(db, batch_size)
+            total += handled
+            if handled < batch_size:
+                return total
+            await asyncio.sleep(0)
+
+
+async def log_event(event):
+    """
+    Default handler: records the event in the application log. Notification, search or
+    webhook integrations register their own handlers next to it.
+    """
+    logger.debug("Outbox event %d %s: %s", event.id, event.topic, event.payload)
+
+
+for _topic in (ORDER_CREATED, ORDER_STATUS_CHANGED, WALLET_TRANSACTION):
+    register_handler(_topic, log_event)
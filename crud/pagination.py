@@ -0,0 +1,25 @@
+import base64
+import json
+from fastapi import HTTPException
+
+def encode_cursor(sort: str, key: list) -> str:
+    """
+    Encodes the sort key of the last row on a page into an opaque, URL-safe cursor.
+    """
+    raw = json.dumps({"s": sort, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, size: int) -> list:
+    """
+    Decodes a cursor produced by `encode_cursor` and checks it belongs to the requested sort order
+    and carries a key of the expected size.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = data["k"]
+        if data["s"] != sort or not isinstance(key, list) or len(key) != size:
+            raise ValueError
+        return key
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
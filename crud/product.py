@@ -0,0 +1,269 @@
+import codecs
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Optional
+from pydantic import ValidationError
+from fastapi import HTTPException
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.product import Product
+from schemas.product import ProductCreate
+from crud.pagination import encode_cursor, decode_cursor
+from database import SessionLocal
+from crud.inventory import redistribute_stock
+from cache import invalidate_products
+
+# Bulk import/export settings
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))  # Per-row errors reported back; the rest are only counted
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_FIELDS = ["id", "name", "description", "price", "quantity", "seller_id"]
+
+# Columns selected by the row-based list path, in `ProductResponse` field order. The quantity
+# reported is the total stock, including any stock shards; `available` excludes held units.
+PRODUCT_COLUMNS = (
+    Product.name, Product.description, Product.price, Product.total_quantity.label("quantity"), Product.id,
+    Product.seller_id, Product.available_quantity.label("available"),
+)
+
+async def get_products_page(
+    db: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    seller_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: bool = False,
+    as_dicts: bool = False,
+):
+    """
+    Retrieves one page of products using keyset pagination.
+
+    Products are ordered by `id`, or by `(price, id)` when `sort` is "price", and each page
+    starts strictly after the key stored in `cursor`. This keeps every page an index range scan
+    instead of an OFFSET over the whole catalog.
+
+    With `as_dicts`, only the response columns are selected and each product is returned as a
+    plain dict, skipping ORM object construction.
+
+    Returns:
+        tuple: The products on the page and the cursor for the next page (None on the last page).
+    """
+    query = select(*PRODUCT_COLUMNS) if as_dicts else select(Product)
+    if seller_id is not None:
+        query = query.filter(Product.seller_id == seller_id)
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    if in_stock:
+        query = query.filter(Product.available_quantity > 0)
+
+    if sort == "price":
+        order_by = (Product.price, Product.id)
+        if cursor:
+            price, last_id = decode_cursor(cursor, sort, 2)
+            query = query.filter(tuple_(Product.price, Product.id) > tuple_(price, last_id))
+    else:
+        order_by = (Product.id,)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, sort, 1)
+            query = query.filter(Product.id > last_id)
+
+    # Fetch one extra row to find out whether another page follows
+    query = query.order_by(*order_by).limit(limit + 1)
+    result = await db.execute(query) if as_dicts else await db.scalars(query)
+    products = result.all()
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        key = [last.price, last.id] if sort == "price" else [last.id]
+        next_cursor = encode_cursor(sort, key)
+    if as_dicts:
+        products = [dict(row._mapping) for row in products]
+    return products, next_cursor
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]):
+    """
+    Splits an async stream of UTF-8 bytes into lines without reading it all into memory.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+async def _iter_csv_rows(lines):
+    """
+    Yields `(row_number, data)` for each CSV record, using the first record as the header.
+    Quoted fields spanning several lines are joined back together before parsing.
+    """
+    header = None
+    pending = None
+    row_number = 0
+    async for line in lines:
+        record = line if pending is None else pending + "\n" + line
+        if record.count('"') % 2:
+            pending = record
+            continue
+        pending = None
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        # Empty cells mean "not provided", so optional fields fall back to their defaults
+        yield row_number, {key: value for key, value in zip(header, values) if value != ""}
+
+async def _iter_ndjson_rows(lines):
+    """
+    Yields `(row_number, data)` for each non-empty NDJSON line. Malformed lines yield the
+    decoding error instead of data.
+    """
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, e
+
+async def import_products(
+    db: AsyncSession,
+    seller_id: int,
+    chunks: AsyncIterator[bytes],
+    format: str = "csv",
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+):
+    """
+    Imports products for a seller from a streamed CSV or NDJSON upload.
+
+    Each row is validated with `ProductCreate`. Rows without an `id` create products; rows
+    with one update that product of the seller, so re-importing an export syncs the catalog
+    instead of duplicating it. Rows are written `chunk_size` at a time with one executemany
+    INSERT and one UPDATE, committed per chunk, so memory use and transaction size stay
+    bounded however large the upload is. Invalid rows, and rows naming another seller's or a
+    missing product, are skipped and reported.
+
+    Returns:
+        dict: The number of created, updated and failed rows, and the errors for the first failed rows.
+
+    Raises:
+        HTTPException: 500 if the import stops part way, with the number of rows already
+        committed by the earlier chunks.
+    """
+    lines = _iter_lines(chunks)
+    rows = _iter_ndjson_rows(lines) if format == "ndjson" else _iter_csv_rows(lines)
+
+    imported = 0
+    updated = 0
+    failed = 0
+    errors = []
+    creates = []
+    updates = []
+
+    def reject(row_number: int, detail):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"row": row_number, "errors": detail})
+
+    async def flush():
+        nonlocal imported, updated
+        if not (creates or updates):
+            return
+        if creates:
+            await db.execute(insert(Product), creates)
+        changed = []
+        if updates:
+            owned = dict((await db.execute(
+                select(Product.id, Product.stock_shards)
+                .filter(Product.seller_id == seller_id, Product.id.in_([values["id"] for _, values in updates]))
+            )).all())
+            for row_number, values in updates:
+                if values["id"] not in owned:
+                    reject(row_number, f"Product {values['id']} not found")
+                elif owned[values["id"]] and "quantity" in values:
+                    # The new stock is spread over the product's shards, as in a product update
+                    await redistribute_stock(db, values["id"], total=values.pop("quantity"))
+            changed = [values for _, values in updates if values["id"] in owned]
+            # Rows left with only their ID (a sharded product's new stock) have nothing more to update
+            if any(len(values) > 1 for values in changed):
+                await db.execute(update(Product), [values for values in changed if len(values) > 1])
+        await db.commit()
+        await invalidate_products(*[values["id"] for values in changed])
+        imported += len(creates)
+        updated += len(changed)
+        creates.clear()
+        updates.clear()
+
+    try:
+        async for row_number, data in rows:
+            try:
+                if isinstance(data, Exception):
+                    raise ValueError(str(data))
+                product_id = data.pop("id", None) if isinstance(data, dict) else None
+                if product_id is not None:
+                    product_id = int(product_id)
+                product = ProductCreate.model_validate(data)
+            except (ValidationError, ValueError) as e:
+                reject(row_number, e.errors(include_url=False, include_context=False) if isinstance(e, ValidationError) else str(e))
+                continue
+
+            if product_id is None:
+                creates.append({**product.model_dump(), "seller_id": seller_id})
+            else:
+                # Cells left empty keep the product's current values
+                updates.append((row_number, {**product.model_dump(exclude_unset=True), "id": product_id}))
+            if len(creates) + len(updates) >= chunk_size:
+                await flush()
+        await flush()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail={
+            "message": f"Import stopped: {e}", "imported": imported, "updated": updated,
+        }) from e
+
+    return {"imported": imported, "updated": updated, "failed": failed, "errors": errors}
+
+async def export_products(seller_id: int, format: str = "csv", batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Streams a seller's products as CSV or NDJSON.
+
+    Rows are read through a server-side cursor in batches of `batch_size` and encoded batch by
+    batch, so the export never holds the whole catalog in memory. The generator opens its own
+    session because it keeps running after the request handler has returned.
+    """
+    columns = [
+        Product.total_quantity.label(name) if name == "quantity" else getattr(Product, name) for name in EXPORT_FIELDS
+    ]
+    query = select(*columns).filter(Product.seller_id == seller_id).order_by(Product.id)
+
+    if format == "csv":
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+
+    async with SessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            buffer = io.StringIO()
+            if format == "csv":
+                csv.writer(buffer).writerows(rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(row._mapping)) + "\n")
+            yield buffer.getvalue()
@@ -0,0 +1,220 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.order import Order
+from models.product import Product
+from models.reservation import StockHold
+from schemas.order import OrderItem
+from crud.order import raise_stock_error
+from crud.analytics import record_orders
+from crud.inventory import take_from_shards
+from crud.outbox import add_events, order_payload, ORDER_CREATED
+from database import SessionLocal
+from cache import invalidate_products
+
+# Stock hold settings
+HOLD_TTL_SECONDS = int(os.getenv("HOLD_TTL_SECONDS", "600"))  # How long a hold keeps its units
+HOLD_SWEEP_INTERVAL = float(os.getenv("HOLD_SWEEP_INTERVAL", "30"))  # Seconds between expiry sweeps
+HOLD_SWEEP_BATCH_SIZE = int(os.getenv("HOLD_SWEEP_BATCH_SIZE", "1000"))
+
+
+async def create_hold(db: AsyncSession, customer_id: int, item: OrderItem, ttl: int = HOLD_TTL_SECONDS):
+    """
+    Holds `item.quantity` units of a product for the customer for `ttl` seconds.
+
+    The units are added to `Product.reserved` by one conditional UPDATE guarded by
+    `quantity - reserved >= :q`, so holds and orders can never together take more than the
+    stock, and the hold row is inserted in the same short transaction. Held units of a
+    sharded product are moved off its stock counters onto the product row.
+
+    Raises:
+        HTTPException: If the product does not exist or has too few units available.
+    """
+    try:
+        held = await db.scalar(
+            update(Product)
+            .where(Product.id == item.product_id, Product.quantity - Product.reserved >= item.quantity)
+            .values(reserved=Product.reserved + item.quantity)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        if held is None and not await _hold_from_shards(db, item):
+            await raise_stock_error(db, item.product_id)
+        hold = await db.scalar(
+            insert(StockHold)
+            .values(
+                product_id=item.product_id,
+                customer_id=customer_id,
+                quantity=item.quantity,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl),
+            )
+            .returning(StockHold)
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(item.product_id)
+    return hold
+
+
+async def _hold_from_shards(db: AsyncSession, item: OrderItem) -> bool:
+    """
+    Takes the held units from a sharded product's counters and puts them on the product
+    row as reserved, where commit and release expect them.
+    """
+    shards = await db.scalar(select(Product.stock_shards).filter(Product.id == item.product_id))
+    if not shards or not await take_from_shards(db, item.product_id, item.quantity, shards):
+        return False
+    await db.execute(
+        update(Product)
+        .where(Product.id == item.product_id)
+        .values(quantity=Product.quantity + item.quantity, reserved=Product.reserved + item.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+
+async def release_hold(db: AsyncSession, hold_id: int, customer_id: int) -> bool:
+    """
+    Releases one of the customer's holds, returning its units to the available stock.
+
+    The hold is claimed by DELETE ... RETURNING, so a concurrent commit, release or sweep of
+    the same hold can never give its units back twice.
+
+    Returns:
+        bool: Whether the hold existed.
+    """
+    try:
+        released = (await db.execute(
+            delete(StockHold)
+            .where(StockHold.id == hold_id, StockHold.customer_id == customer_id)
+            .returning(StockHold.product_id, StockHold.quantity)
+        )).first()
+        if released is None:
+            await db.rollback()
+            return False
+        await db.execute(
+            update(Product)
+            .where(Product.id == released.product_id)
+            .values(reserved=Product.reserved - released.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(released.product_id)
+    return True
+
+
+async def commit_hold(db: AsyncSession, hold_id: int, customer_id: int):
+    """
+    Turns an unexpired hold into a pending order. The held units move from `reserved` to
+    sold in one UPDATE, so committing cannot fail for lack of stock that other buyers took.
+
+    Raises:
+        HTTPException: If the hold does not exist or has expired, or the seller has since
+            lowered the stock below the held quantity.
+    """
+    try:
+        claimed = (await db.execute(
+            delete(StockHold)
+            .where(StockHold.id == hold_id, StockHold.customer_id == customer_id, StockHold.expires_at > datetime.utcnow())
+            .returning(StockHold.product_id, StockHold.quantity)
+        )).first()
+        if claimed is None:
+            raise HTTPException(status_code=404, detail="Hold not found or expired")
+        product = (await db.execute(
+            update(Product)
+            .where(Product.id == claimed.product_id, Product.quantity >= claimed.quantity)
+            .values(quantity=Product.quantity - claimed.quantity, reserved=Product.reserved - claimed.quantity)
+            .returning(Product.seller_id, Product.price, Product.stock_shards)
+            .execution_options(synchronize_session=False)
+        )).first()
+        if product is None:
+            raise HTTPException(status_code=409, detail="The held stock is no longer available")
+        db_order = await db.scalar(
+            insert(Order)
+            .values(
+                product_id=claimed.product_id,
+                seller_id=product.seller_id,
+                customer_id=customer_id,
+                quantity=claimed.quantity,
+                status="pending",
+                unit_price=product.price,
+            )
+            .returning(Order)
+        )
+        await record_orders(db, [db_order], slots=product.stock_shards)
+        await add_events(db, ORDER_CREATED, [order_payload(db_order)])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(claimed.product_id)
+    return db_order
+
+
+async def release_expired_holds_batch(db: AsyncSession, now: datetime, batch_size: int = HOLD_SWEEP_BATCH_SIZE) -> int:
+    """
+    Deletes up to `batch_size` expired holds and returns their units to the available stock
+    in one short transaction: one DELETE ... RETURNING and one UPDATE for all the products
+    involved.
+
+    Returns:
+        int: The number of holds released.
+    """
+    expired = (
+        select(StockHold.id)
+        .filter(StockHold.expires_at <= now)
+        .order_by(StockHold.expires_at)
+        .limit(batch_size)
+    )
+    try:
+        rows = (await db.execute(
+            delete(StockHold)
+            .where(StockHold.id.in_(expired.scalar_subquery()))
+            .returning(StockHold.product_id, StockHold.quantity)
+        )).all()
+        if not rows:
+            await db.rollback()
+            return 0
+        released = {}
+        for product_id, quantity in rows:
+            released[product_id] = released.get(product_id, 0) + quantity
+        await db.execute(
+            update(Product)
+            .where(Product.id.in_(released))
+            .values(reserved=Product.reserved - case(released, value=Product.id))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await invalidate_products(*released)
+    return len(rows)
+
+
+async def release_expired_holds(batch_size: int = HOLD_SWEEP_BATCH_SIZE) -> int:
+    """
+    Returns the units of every hold that had expired when the sweep started to their
+    products, `batch_size` holds per transaction. Holds expiring during the sweep are left
+    for the next one.
+
+    Returns:
+        int: The total number of holds released.
+    """
+    now = datetime.utcnow()
+    total = 0
+    async with SessionLocal() as db:
+        while True:
+            released = await release_expired_holds_batch(db, now, batch_size)
+            total += released
+            if released < batch_size:
+                return total
+            await asyncio.sleep(0)
@@ -0,0 +1,51 @@
+import re
+from sqlalchemy import select, func, literal_column, table, column
+from sqlalchemy.dialects import postgresql  # noqa: F401  registers the typed full-text search functions
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.product import Product, SEARCH_DOCUMENT_SQL
+
+# Weight matches in the product name above matches in the description when ranking
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+_products_fts = table("products_fts", column("rowid"))
+_search_document = literal_column(SEARCH_DOCUMENT_SQL)
+_simple = literal_column("'simple'::regconfig")
+
+def search_terms(q: str) -> list[str]:
+    """
+    Splits a free-text query into search terms, dropping punctuation and FTS operators.
+    """
+    return [term.lower() for term in _TERM.findall(q)]
+
+async def search_products(db: AsyncSession, q: str, limit: int = 20, offset: int = 0):
+    """
+    Full-text search over product names and descriptions.
+
+    Every term must match, and the last term of the query is treated as a prefix so
+    results show up while the user is still typing. On SQLite results are ranked with
+    FTS5's BM25; on PostgreSQL with `ts_rank_cd` over the GIN-indexed tsvector.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+        ts_query = func.to_tsquery(_simple, tsquery)
+        matched = _search_document.op("@@")(ts_query)
+        rank = func.ts_rank_cd(_search_document, ts_query).desc()
+        query = select(Product).filter(matched)
+    else:
+        match = " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+        fts = literal_column("products_fts")
+        rank = func.bm25(fts, NAME_WEIGHT, DESCRIPTION_WEIGHT)
+        query = (
+            select(Product)
+            .join(_products_fts, _products_fts.c.rowid == Product.id)
+            .filter(fts.op("MATCH")(match))
+        )
+
+    result = await db.scalars(query.order_by(rank, Product.id).limit(limit).offset(offset))
+    return result.all()
@@ -1,35 +1,158 @@
-from sqlalchemy.orm import Session
-from models.wallet import Wallet
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.wallet import Wallet, WalletTransaction
 from schemas.wallet import WalletCreate
+from crud.pagination import encode_cursor, decode_cursor
+from crud.outbox import add_events, WALLET_TRANSACTION
 
-def get_wallet_by_customer(db: Session, customer_id: int):
+async def get_wallet_by_customer(db: AsyncSession, customer_id: int):
     """
     Retrieve a wallet by customer ID.
     """
     # Query the Wallet table to find the wallet associated with the customer
-    return db.query(Wallet).filter(Wallet.customer_id == customer_id).first()
+    return await db.scalar(select(Wallet).filter(Wallet.customer_id == customer_id))
 
-def create_wallet(db: Session, wallet: WalletCreate):
+async def create_wallet(db: AsyncSession, wallet: WalletCreate):
     """
     Create a new wallet for a customer with an initial balance of zero.
     """
     # Initialize a new wallet with the provided customer ID and a balance of 0
     db_wallet = Wallet(customer_id=wallet.customer_id, balance=0)
     db.add(db_wallet)     # Add the wallet to the session
-    db.commit()           # Commit the transaction to save the wallet
-    db.refresh(db_wallet)    # Refresh the session to include the newly created wallet
+    await db.commit()           # Commit the transaction to save the wallet
+    await db.refresh(db_wallet)    # Refresh the session to include the newly created wallet
     return db_wallet
 
-def update_wallet_balance(db: Session, wallet_id: int, amount: int):
+def _wallet_filter(wallet_id: Optional[int], customer_id: Optional[int]):
+    return Wallet.id == wallet_id if wallet_id is not None else Wallet.customer_id == customer_id
+
+async def get_transaction_by_key(
+    db: AsyncSession, idempotency_key: str, wallet_id: Optional[int] = None, customer_id: Optional[int] = None
+):
+    """
+    Retrieve the ledger entry recorded for an idempotency key on a wallet, given either the
+    wallet ID or its customer ID.
+    """
+    query = select(WalletTransaction).filter(WalletTransaction.idempotency_key == idempotency_key)
+    if wallet_id is not None:
+        query = query.filter(WalletTransaction.wallet_id == wallet_id)
+    else:
+        query = query.join(Wallet).filter(Wallet.customer_id == customer_id)
+    return await db.scalar(query)
+
+async def apply_balance_change(
+    db: AsyncSession,
+    amount: int,
+    wallet_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    idempotency_key: Optional[str] = None,
+    order_id: Optional[int] = None,
+):
     """
-    Update the balance of a wallet by a specified amount.
+    Changes a wallet balance and appends the ledger entry without committing, so callers can
+    make it part of a larger transaction. The wallet is identified by its ID or its customer ID.
+    A `wallet.transaction` outbox event is written alongside the ledger entry.
+
+    The balance is changed by one conditional UPDATE that only matches while the result stays
+    non-negative, so concurrent debits can neither overdraw the wallet nor lose each other's updates.
+
+    Returns:
+        WalletTransaction: The new ledger entry, or None if the wallet is missing or would be overdrawn.
     """
-    # Retrieve the wallet by its ID
-    wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
-    if not wallet:
+    row = (await db.execute(
+        update(Wallet)
+        .where(_wallet_filter(wallet_id, customer_id), Wallet.balance + amount >= 0)
+        .values(balance=Wallet.balance + amount)
+        .returning(Wallet.id, Wallet.balance)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if row is None:
         return None
+    transaction = await db.scalar(
+        insert(WalletTransaction)
+        .values(
+            wallet_id=row.id,
+            amount=amount,
+            balance_after=row.balance,
+            idempotency_key=idempotency_key,
+            order_id=order_id,
+        )
+        .returning(WalletTransaction)
+    )
+    await add_events(db, WALLET_TRANSACTION, [{
+        "transaction_id": transaction.id,
+        "wallet_id": row.id,
+        "amount": amount,
+        "balance_after": row.balance,
+        "order_id": order_id,
+    }])
+    return transaction
+
+async def update_wallet_balance(db: AsyncSession, wallet_id: int, amount: int, idempotency_key: Optional[str] = None):
+    """
+    Update the balance of a wallet by a specified amount and record it in the ledger.
+
+    When `idempotency_key` is given, a retry of a request that already went through returns
+    the original ledger entry instead of applying the change again.
+
+    Returns:
+        tuple: The ledger entry and whether it was replayed from an earlier request.
+
+    Raises:
+        HTTPException: If the change would make the balance negative, or (409) if the
+        idempotency key was already used for another request.
+    """
+    if idempotency_key:
+        existing = await get_transaction_by_key(db, idempotency_key, wallet_id=wallet_id)
+        if existing:
+            return _replay_balance_change(existing, amount), True
+
+    try:
+        transaction = await apply_balance_change(db, amount, wallet_id=wallet_id, idempotency_key=idempotency_key)
+        if transaction is None:
+            raise HTTPException(status_code=400, detail="Insufficient balance")
+        await db.commit()
+        return transaction, False
+    except IntegrityError:
+        # A concurrent request with the same key won the race; undo ours and return theirs
+        await db.rollback()
+        existing = await get_transaction_by_key(db, idempotency_key, wallet_id=wallet_id) if idempotency_key else None
+        if existing is None:
+            raise
+        return _replay_balance_change(existing, amount), True
+    except Exception:
+        await db.rollback()
+        raise
+
+def _replay_balance_change(transaction: WalletTransaction, amount: int) -> WalletTransaction:
+    """
+    Checks that an earlier ledger entry with the same idempotency key was the same credit
+    or debit, and not a checkout or a different amount.
+    """
+    if transaction.order_id is not None or transaction.amount != amount:
+        raise HTTPException(status_code=409, detail="Idempotency key was already used for a different request")
+    return transaction
+
+async def get_wallet_transactions(db: AsyncSession, wallet_id: int, limit: int = 50, cursor: Optional[str] = None):
+    """
+    Retrieves one page of a wallet's ledger, newest first, using keyset pagination on the entry ID.
+
+    Returns:
+        tuple: The ledger entries on the page and the cursor for the next page (None on the last page).
+    """
+    query = select(WalletTransaction).filter(WalletTransaction.wallet_id == wallet_id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, "wallet_transactions", 1)
+        query = query.filter(WalletTransaction.id < last_id)
+
+    result = await db.scalars(query.order_by(WalletTransaction.id.desc()).limit(limit + 1))
+    transactions = result.all()
 
-    wallet.balance += amount
-    db.commit()
-    db.refresh(wallet)
-    return wallet
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        next_cursor = encode_cursor("wallet_transactions", [transactions[-1].id])
+    return transactions, next_cursor
@@ -1,13 +1,56 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import seller, product, order, customer, wallet
+from fastapi.responses import JSONResponse, PlainTextResponse
+from routers import seller, product, order, customer, wallet, reservation
 from fastapi.staticfiles import StaticFiles
-from database import Base, engine
+from database import engine
+from schema import check_schema_revision
+from replicas import replica_set, REPLICA_HEALTH_INTERVAL
+from passwords import password_hasher
+from background import PeriodicTask
+from serialization import FAST_JSON, FastJSONResponse
+from authentication import cache_stats
+from cache import catalog_cache
+from metrics import (
+    METRICS_ENABLED, CONTENT_TYPE, MetricsMiddleware, registry, instrument_engine, cache_collector, pool_collector,
+    replica_collector,
+)
+from crud.archive import archive_orders, ORDER_ARCHIVE_AFTER_DAYS, ORDER_ARCHIVE_INTERVAL
+from crud.reservation import release_expired_holds, HOLD_SWEEP_INTERVAL
+from crud.inventory import rebalance_stock_shards, STOCK_REBALANCE_INTERVAL
+from crud.outbox import dispatch_outbox, OUTBOX_POLL_INTERVAL
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
 
-# Initialize the database
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: check the database schema and start background jobs on startup, and on
+    shutdown stop them, release pooled connections and stop the password hashing workers.
+    """
+    await check_schema_revision()
+    password_hasher.start()
+    background_tasks = [
+        PeriodicTask("hold-sweeper", release_expired_holds, HOLD_SWEEP_INTERVAL),
+        PeriodicTask("stock-rebalance", rebalance_stock_shards, STOCK_REBALANCE_INTERVAL),
+        PeriodicTask("outbox-dispatcher", dispatch_outbox, OUTBOX_POLL_INTERVAL),
+    ]
+    if replica_set.replicas:
+        await replica_set.check()
+        background_tasks.append(PeriodicTask("replica-health", replica_set.check, REPLICA_HEALTH_INTERVAL))
+    if ORDER_ARCHIVE_AFTER_DAYS > 0:
+        background_tasks.append(PeriodicTask("order-archive", archive_orders, ORDER_ARCHIVE_INTERVAL))
+    for task in background_tasks:
+        task.start()
+    yield
+    for task in background_tasks:
+        await task.stop()
+    password_hasher.shutdown()
+    await replica_set.dispose()
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse if FAST_JSON else JSONResponse)
 
 # Include routers
 # These routers will be responsible for different functionalities such as seller, product, order, etc.
@@ -16,6 +59,7 @@ app.include_router(product.router)
 app.include_router(order.router)
 app.include_router(customer.router)
 app.include_router(wallet.router)
+app.include_router(reservation.router)
 
 @app.get("/")
 def read_root():
@@ -25,6 +69,24 @@ def read_root():
     return {"message": "Welcome to the Amazon Seller Page API"}
 
 
+if METRICS_ENABLED:
+    # Request latency, SQL statement counts and cache effectiveness, scraped by Prometheus
+    instrument_engine(engine)
+    for replica in replica_set.replicas:
+        instrument_engine(replica.engine)
+    registry.register_collector(cache_collector(lambda: {**cache_stats(), "catalog": catalog_cache.stats()}))
+    registry.register_collector(pool_collector(engine))
+    registry.register_collector(replica_collector(replica_set))
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """
+        Prometheus metrics in the text exposition format.
+        """
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
 # Allow all origins for now, or restrict it to specific URLs
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,321 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Instrumentation settings
+# Off by default: /metrics has no authentication, so only enable it where the scraper alone can reach it
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))  # 0 disables slow-query logging
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Metric updates happen on the event loop thread (SQLAlchemy runs its sync hooks in a greenlet on
+# the same thread), so plain dicts are enough and no locking is needed on the hot path.
+
+
+def _format_labels(labelnames, values) -> str:
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Base class for metrics kept in a `Registry`. Label values are passed positionally, in
+    the order of `labelnames`.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def samples(self):
+        for labels, value in list(self._values.items()):
+            yield self.name, self.labelnames, labels, value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for name, labelnames, labels, value in self.samples():
+            yield f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels, value: float):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value: float):
+        entry = self._values.get(labels)
+        if entry is None:
+            # Per-bucket (non-cumulative) counts plus a final +Inf bucket, then sum
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        bucket_labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", bucket_labelnames, labels + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, total
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+
+
+class Registry:
+    """
+    Holds the application's metrics and renders them in the Prometheus text format.
+
+    Collectors are callables run at scrape time that return extra metrics, for values that
+    are owned elsewhere (cache counters, pool usage) and are cheaper to read than to mirror.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                for metric in collector():
+                    lines.extend(metric.render())
+            except Exception:
+                logger.warning("Metrics collector %r failed", collector, exc_info=True)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests handled, by route template and status code.", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, by route template.", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request, by route template.", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS))
+http_request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per HTTP request, by route template.",
+    ("method", "route")))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency, by statement type.", ("operation",)))
+db_slow_queries = registry.register(Counter(
+    "db_slow_queries_total", "SQL statements slower than the slow-query threshold.", ("operation",)))
+
+
+class RequestStats:
+    """
+    SQL statement count and time accumulated while handling one request.
+    """
+    __slots__ = ("scope", "queries", "query_time")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.query_time = 0.0
+
+
+_request_stats: ContextVar = ContextVar("request_stats", default=None)
+
+
+def route_label(scope) -> str:
+    """
+    The route template the request matched (e.g. "/products/{product_id}"), so that label
+    cardinality stays bounded by the number of routes.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records per-route latency, status codes, in-flight requests and
+    the number and duration of SQL statements run by each request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            _request_stats.reset(token)
+            method = scope["method"]
+            route = route_label(scope)
+            http_requests.inc(method, route, str(status))
+            http_request_duration.observe(method, route, value=elapsed)
+            http_request_db_queries.observe(method, route, value=stats.queries)
+            http_request_db_duration.observe(method, route, value=stats.query_time)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    db_query_duration.observe(operation, value=elapsed)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+
+    if SLOW_QUERY_THRESHOLD_MS and elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        db_slow_queries.inc(operation)
+        # Parameters are left out of the log since they may contain personal data
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s",
+            elapsed * 1000,
+            route_label(stats.scope) if stats is not None else "background",
+            " ".join(statement.split())[:1000],
+        )
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine):
+    """
+    Attach query timing hooks to an engine (sync or async).
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def cache_collector(stats_by_cache):
+    """
+    Build a collector that exposes hit/miss counters and sizes from `stats()` methods.
+
+    Args:
+        stats_by_cache (callable): Returns a dict mapping a cache name to its stats dict.
+    """
+    def collect():
+        hits = Counter("cache_hits_total", "Cache lookups that found an entry.", ("cache",))
+        misses = Counter("cache_misses_total", "Cache lookups that found nothing.", ("cache",))
+        size = Gauge("cache_entries", "Entries currently held by in-process caches.", ("cache",))
+        for name, stats in stats_by_cache().items():
+            hits.inc(name, amount=stats.get("hits", 0))
+            misses.inc(name, amount=stats.get("misses", 0))
+            if "size" in stats:
+                size.set(name, value=stats["size"])
+        return [hits, misses, size]
+    return collect
+
+
+def pool_collector(engine):
+    """
+    Build a collector that exposes connection pool usage for pools that report it.
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+
+    def collect():
+        metrics = []
+        for name, documentation, read in (
+            ("db_pool_size", "Connections the pool keeps open.", lambda: pool.size()),
+            ("db_pool_checked_out", "Connections currently checked out of the pool.", lambda: pool.checkedout()),
+            # QueuePool counts overflow from -pool_size until the pool is full
+            ("db_pool_overflow", "Connections open beyond the pool size.", lambda: max(pool.overflow(), 0)),
+        ):
+            try:
+                value = read()
+            except AttributeError:  # Pools such as StaticPool do not track usage
+                continue
+            gauge = Gauge(name, documentation)
+            gauge.set(value=value)
+            metrics.append(gauge)
+        return metrics
+    return collect
+
+
+def replica_collector(replica_set):
+    """
+    Build a collector that exposes the health of each read replica.
+    """
+    def collect():
+        healthy = Gauge("db_replica_healthy", "Whether a read replica passed its last health check.", ("replica",))
+        for name, is_healthy in replica_set.stats().items():
+            healthy.set(name, value=int(is_healthy))
+        return [healthy]
+    return collect
@@ -0,0 +1,81 @@
+import asyncio
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy.engine import make_url
+from database import Base, DATABASE_URL, engine
+# Import every model module so that Base.metadata describes the whole schema
+import models.seller  # noqa: F401
+import models.customer  # noqa: F401
+import models.product  # noqa: F401
+import models.order  # noqa: F401
+import models.wallet  # noqa: F401
+import models.analytics  # noqa: F401
+import models.reservation  # noqa: F401
+import models.outbox  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Leave the SQLite full-text search table (and its shadow tables) out of autogenerate,
+    since it is managed by hand-written DDL rather than the models.
+    """
+    return not (type_ == "table" and name.startswith("products_fts"))
+
+
+def _configure(dialect_name: str, **kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        compare_type=True,
+        # SQLite cannot ALTER most things in place; batch mode recreates the table instead
+        render_as_batch=dialect_name == "sqlite",
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    """
+    Emit the migration SQL to stdout instead of running it (`alembic upgrade head --sql`).
+    """
+    _configure(
+        make_url(DATABASE_URL).get_backend_name(),
+        url=DATABASE_URL,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection):
+    _configure(connection.dialect.name, connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations():
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+        await connection.commit()
+    await engine.dispose()
+
+
+def run_migrations_online():
+    # Called from the application (see schema.py) with an open connection
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,99 @@
+"""initial schema
+
+The schema of the first release, which created its tables with `Base.metadata.create_all`:
+sellers, customers, products, orders and wallets, with `orders.created_at` still a FLOAT.
+Everything added since lives in the later revisions.
+
+Databases created by that release match this revision exactly; mark them with
+`alembic stamp 0001` and then run `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 19:51:11.328828
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sellers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.Column('store_name', sa.String(), nullable=False),
+    sa.Column('business_location', sa.String(), nullable=True),
+    sa.Column('niche', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sellers_email', 'sellers', ['email'], unique=True)
+    op.create_index('ix_sellers_id', 'sellers', ['id'], unique=False)
+
+    op.create_table('customers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('password', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_customers_email', 'customers', ['email'], unique=True)
+    op.create_index('ix_customers_id', 'customers', ['id'], unique=False)
+    op.create_index('ix_customers_name', 'customers', ['name'], unique=False)
+
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['seller_id'], ['sellers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_products_id', 'products', ['id'], unique=False)
+
+    # The first release declared a FLOAT with a CURRENT_TIMESTAMP default, which SQLite
+    # accepts (storing text) but PostgreSQL rejects, so the default is SQLite-only
+    created_at_default = sa.func.now() if op.get_bind().dialect.name == 'sqlite' else None
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.Float(), server_default=created_at_default, nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['seller_id'], ['sellers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_id', 'orders', ['id'], unique=False)
+
+    op.create_table('wallets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('customer_id')
+    )
+    op.create_index('ix_wallets_id', 'wallets', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('wallets')
+    op.drop_table('orders')
+    op.drop_table('products')
+    op.drop_table('customers')
+    op.drop_table('sellers')
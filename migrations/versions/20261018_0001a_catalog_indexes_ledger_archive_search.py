@@ -0,0 +1,158 @@
+"""catalog indexes, wallet ledger, order archive and search
+
+Brings a first-release database up to the schema the application had when migrations were
+introduced: the composite indexes behind keyset pagination of the catalog and order history,
+`orders.created_at` as a DATETIME, the wallet_transactions ledger, the orders_archive table,
+and the full-text search index on products (a GIN index on PostgreSQL, an FTS5 table with
+sync triggers on SQLite, filled from the existing products).
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 19:51:11.328828
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001a'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_DOCUMENT_SQL = "to_tsvector('simple'::regconfig, coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    # Index the products that were already in the catalog
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+# SQLite stores datetimes as text in the format SQLAlchemy binds them in, so keyset
+# comparisons against existing rows stay correct. The first release wrote CURRENT_TIMESTAMP
+# text ('YYYY-MM-DD HH:MM:SS'); Unix timestamps are converted too, and missing values become now.
+SQLITE_CREATED_AT_SQL = """
+    UPDATE orders SET created_at_new = strftime('%Y-%m-%d %H:%M:%f', CASE
+        WHEN created_at IS NULL THEN 'now'
+        WHEN typeof(created_at) IN ('integer', 'real') THEN datetime(created_at, 'unixepoch')
+        ELSE created_at
+    END) || '000'
+"""
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_seller_id_id', 'products', ['seller_id', 'id'], unique=False)
+    op.create_index('ix_products_seller_id_price_id', 'products', ['seller_id', 'price', 'id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # Converted through a new column: changing the type in batch mode would CAST the
+        # old text values to a number on the way
+        op.add_column('orders', sa.Column('created_at_new', sa.DateTime(), nullable=True))
+        op.execute(SQLITE_CREATED_AT_SQL)
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.drop_column('created_at')
+            batch_op.alter_column('created_at_new', new_column_name='created_at', existing_type=sa.DateTime(),
+                                  nullable=False)
+    else:
+        op.execute('UPDATE orders SET created_at = extract(epoch from now()) WHERE created_at IS NULL')
+        op.alter_column('orders', 'created_at', existing_type=sa.Float(), type_=sa.DateTime(),
+                        server_default=None, nullable=False,
+                        postgresql_using="to_timestamp(created_at) AT TIME ZONE 'UTC'")
+    op.create_index('ix_orders_customer_id_created_at_id', 'orders', ['customer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_seller_id_created_at_id', 'orders', ['seller_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_archive_customer_id_created_at_id', 'orders_archive', ['customer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_archive_seller_id_created_at_id', 'orders_archive', ['seller_id', 'created_at', 'id'], unique=False)
+
+    op.create_table('wallet_transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('wallet_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('balance_after', sa.Integer(), nullable=False),
+    sa.Column('idempotency_key', sa.String(), nullable=True),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('wallet_id', 'idempotency_key', name='uq_wallet_transactions_idempotency_key')
+    )
+    op.create_index('ix_wallet_transactions_wallet_id_id', 'wallet_transactions', ['wallet_id', 'id'], unique=False)
+
+    if dialect == 'postgresql':
+        op.create_index('ix_products_search', 'products', [sa.text(SEARCH_DOCUMENT_SQL)], postgresql_using='gin')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_products_search', table_name='products')
+    elif dialect == 'sqlite':
+        for trigger in ('products_fts_au', 'products_fts_ad', 'products_fts_ai'):
+            op.execute(f'DROP TRIGGER {trigger}')
+        op.execute('DROP TABLE products_fts')
+
+    op.drop_index('ix_wallet_transactions_wallet_id_id', table_name='wallet_transactions')
+    op.drop_table('wallet_transactions')
+    op.drop_index('ix_orders_archive_seller_id_created_at_id', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_customer_id_created_at_id', table_name='orders_archive')
+    op.drop_table('orders_archive')
+
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_seller_id_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_customer_id_created_at_id', table_name='orders')
+    if dialect == 'sqlite':
+        op.add_column('orders', sa.Column('created_at_old', sa.Float(), nullable=True))
+        op.execute('UPDATE orders SET created_at_old = created_at')
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.drop_column('created_at')
+            batch_op.alter_column('created_at_old', new_column_name='created_at', existing_type=sa.Float(),
+                                  server_default=sa.func.now())
+    else:
+        op.alter_column('orders', 'created_at', existing_type=sa.DateTime(), type_=sa.Float(), nullable=True,
+                        postgresql_using="extract(epoch from created_at AT TIME ZONE 'UTC')")
+
+    op.drop_index('ix_products_seller_id_price_id', table_name='products')
+    op.drop_index('ix_products_seller_id_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
@@ -0,0 +1,47 @@
+"""seller sales rollup
+
+Adds the per-day seller sales rollup and records the unit price on orders. The rollup starts
+empty; fill it from the existing order history with `python -m crud.analytics`.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18 20:05:23.248234
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('seller_sales_daily',
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('seller_id', 'day', 'product_id', 'status')
+    )
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_price', sa.Float(), nullable=True))
+
+    with op.batch_alter_table('orders_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_price', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('orders_archive', schema=None) as batch_op:
+        batch_op.drop_column('unit_price')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('unit_price')
+
+    op.drop_table('seller_sales_daily')
@@ -0,0 +1,45 @@
+"""stock holds
+
+Adds cart reservations: the stock_holds table and the reserved-units counter on products.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 20:07:50.067227
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stock_holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_holds_expires_at', 'stock_holds', ['expires_at'], unique=False)
+    # A plain ADD COLUMN on every dialect; batch mode would rebuild `products` on SQLite
+    # and drop the full-text search triggers defined on it
+    op.add_column('products', sa.Column('reserved', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ALTER TABLE products DROP COLUMN reserved')  # SQLite 3.35+
+    else:
+        op.drop_column('products', 'reserved')
+    op.drop_index('ix_stock_holds_expires_at', table_name='stock_holds')
+    op.drop_table('stock_holds')
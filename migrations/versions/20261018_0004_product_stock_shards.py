@@ -0,0 +1,93 @@
+"""product stock shards
+
+Adds sharded inventory: the product_stock_shards counters, the shard count on products, and
+a slot column in the seller sales rollup's primary key so orders for a sharded product can
+spread their rollup updates over several rows.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 20:14:35.558181
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SALES_KEY = ['seller_id', 'day', 'product_id', 'status']
+
+
+def _create_sales_table(key):
+    # SQLite cannot change a primary key in place, so the rollup table is recreated with the
+    # new key declared up front and the rows copied over
+    op.create_table('seller_sales_daily',
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    *([sa.Column('slot', sa.Integer(), server_default='0', nullable=False)] if 'slot' in key else []),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint(*key)
+    )
+
+
+def upgrade() -> None:
+    op.create_table('product_stock_shards',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('product_id', 'shard')
+    )
+    # A plain ADD COLUMN on every dialect; batch mode would rebuild `products` on SQLite
+    # and drop the full-text search triggers defined on it
+    op.add_column('products', sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False))
+
+    # Existing rollup rows become slot 0
+    if op.get_bind().dialect.name == 'sqlite':
+        op.rename_table('seller_sales_daily', 'seller_sales_daily_old')
+        _create_sales_table(SALES_KEY + ['slot'])
+        op.execute(
+            'INSERT INTO seller_sales_daily (seller_id, day, product_id, status, slot, orders, units, revenue) '
+            'SELECT seller_id, day, product_id, status, 0, orders, units, revenue FROM seller_sales_daily_old'
+        )
+        op.drop_table('seller_sales_daily_old')
+    else:
+        op.add_column('seller_sales_daily', sa.Column('slot', sa.Integer(), server_default='0', nullable=False))
+        op.drop_constraint('seller_sales_daily_pkey', 'seller_sales_daily', type_='primary')
+        op.create_primary_key('seller_sales_daily_pkey', 'seller_sales_daily', SALES_KEY + ['slot'])
+
+
+def downgrade() -> None:
+    # Fold the slots back into one row per bucket before the slot column goes away
+    op.execute(
+        'CREATE TABLE seller_sales_daily_merged AS '
+        'SELECT seller_id, day, product_id, status, SUM(orders) AS orders, SUM(units) AS units, '
+        'SUM(revenue) AS revenue FROM seller_sales_daily GROUP BY seller_id, day, product_id, status'
+    )
+    if op.get_bind().dialect.name == 'sqlite':
+        op.drop_table('seller_sales_daily')
+        _create_sales_table(SALES_KEY)
+    else:
+        op.execute('DELETE FROM seller_sales_daily')
+        op.drop_constraint('seller_sales_daily_pkey', 'seller_sales_daily', type_='primary')
+        op.drop_column('seller_sales_daily', 'slot')
+        op.create_primary_key('seller_sales_daily_pkey', 'seller_sales_daily', SALES_KEY)
+    op.execute(
+        'INSERT INTO seller_sales_daily (seller_id, day, product_id, status, orders, units, revenue) '
+        'SELECT seller_id, day, product_id, status, orders, units, revenue FROM seller_sales_daily_merged'
+    )
+    op.drop_table('seller_sales_daily_merged')
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ALTER TABLE products DROP COLUMN stock_shards')  # SQLite 3.35+
+    else:
+        op.drop_column('products', 'stock_shards')
+    op.drop_table('product_stock_shards')
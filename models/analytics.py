@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Float, String, Date
+from database import Base
+
+class SellerDailySales(Base):
+    """
+    Pre-aggregated sales per seller, day, product and order status.
+
+    Kept up to date by the order write paths (see crud/analytics.py), so dashboards read
+    one row per day and product instead of scanning the order history. `day` is the UTC
+    date the orders were placed on. A bucket may be split over several `slot` rows; readers
+    always sum over them.
+    """
+    __tablename__ = 'seller_sales_daily'
+
+    # The primary key leads with seller_id and day, which is how every dashboard query filters
+    seller_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    status = Column(String, primary_key=True)
+    # Orders for sharded products spread over several rows per bucket to avoid one hot row
+    slot = Column(Integer, primary_key=True, default=0, server_default="0")
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<SellerDailySales(seller_id={self.seller_id}, day={self.day}, product_id={self.product_id}, status={self.status})>"
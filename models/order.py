@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, Float
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, ForeignKey, String, DateTime, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from database import Base
 
 class Order(Base):
@@ -8,6 +8,13 @@ class Order(Base):
     Represents a order entity in the database.
     """
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Keyset-paginated order history per customer and per seller, newest first
+        Index("ix_orders_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_orders_seller_id_created_at_id", "seller_id", "created_at", "id"),
+        # Finds orders in terminal states that are old enough to archive
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
@@ -15,7 +22,11 @@ class Order(Base):
     customer_id = Column(Integer, ForeignKey('customers.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
     status = Column(String, default='pending')  # Example statuses: 'pending', 'shipped', 'delivered'
-    created_at = Column(Float, server_default=func.now())
+    # Set by the application rather than the database so every row is stored in the same
+    # format that query parameters are bound in (SQLite compares datetimes as text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Product price when the order was placed; NULL for orders placed before it was recorded
+    unit_price = Column(Float, nullable=True)
 
     product = relationship('Product', back_populates='orders')
     seller = relationship('Seller', back_populates='orders')
@@ -23,3 +34,29 @@ class Order(Base):
 
     def __repr__(self):
         return f"<Order(id={self.id}, product_id={self.product_id}, quantity={self.quantity}, status={self.status})>"
+
+
+
+class ArchivedOrder(Base):
+    """
+    Represents an order moved out of the hot `orders` table by the archive job.
+    Rows keep the ID they had in `orders`.
+    """
+    __tablename__ = 'orders_archive'
+    __table_args__ = (
+        Index("ix_orders_archive_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_orders_archive_seller_id_created_at_id", "seller_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    product_id = Column(Integer, nullable=False)
+    seller_id = Column(Integer, nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    unit_price = Column(Float, nullable=True)
+    archived_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedOrder(id={self.id}, product_id={self.product_id}, status={self.status})>"
@@ -0,0 +1,48 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from database import Base
+
+class OutboxEvent(Base):
+    """
+    An event written in the same transaction as the order or wallet change it describes.
+
+    The outbox dispatcher (see crud/outbox.py) delivers pending events to the in-process
+    handlers after the request has returned, and deletes them once every handler succeeded.
+    `available_at` is pushed into the future while an event is being handled or is waiting
+    for a retry.
+    """
+    __tablename__ = 'outbox_events'
+    __table_args__ = (
+        # The dispatcher polls for due events in ID order
+        Index("ix_outbox_events_available_at_id", "available_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, topic={self.topic}, attempts={self.attempts})>"
+
+
+class DeadLetterEvent(Base):
+    """
+    An outbox event whose handlers kept failing until it ran out of attempts. Kept for
+    inspection and manual replay; rows keep the ID they had in `outbox_events`.
+    """
+    __tablename__ = 'outbox_dead_letters'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    topic = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    failed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<DeadLetterEvent(id={self.id}, topic={self.topic}, attempts={self.attempts})>"
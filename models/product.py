@@ -1,20 +1,120 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, case, event, func, select, text
+from sqlalchemy.orm import column_property, relationship
 from database import Base
 
+# Full-text search document on PostgreSQL. Queries must use this exact expression to hit the GIN index.
+SEARCH_DOCUMENT_SQL = "to_tsvector('simple'::regconfig, coalesce(name, '') || ' ' || coalesce(description, ''))"
+
 class Product(Base):
     """
     Represents a product entity in the database.
     """
     __tablename__ = "products"
+    __table_args__ = (
+        # Composite indexes backing the keyset-paginated catalog filters
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_seller_id_id", "seller_id", "id"),
+        Index("ix_products_seller_id_price_id", "seller_id", "price", "id"),
+        Index("ix_products_search", text(SEARCH_DOCUMENT_SQL), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     price = Column(Float, nullable=False)
     quantity = Column(Integer, nullable=False)
+    # Units held by unexpired cart reservations; only `quantity - reserved` can be ordered
+    reserved = Column(Integer, nullable=False, default=0, server_default="0")
+    # Number of ProductStockShard rows the free stock is spread over; 0 keeps it all in `quantity`
+    stock_shards = Column(Integer, nullable=False, default=0, server_default="0")
     seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
 
     seller = relationship("Seller", back_populates="products")
     # Relationship with the Order model (one-to-many relationship)
     orders = relationship('Order', back_populates='product')
+
+
+class ProductStockShard(Base):
+    """
+    One slice of a hot product's free stock.
+
+    Orders for a sharded product decrement a randomly chosen shard instead of the single
+    `products` row, so concurrent buyers of the same product mostly lock different rows
+    (see crud/inventory.py). The product's stock is `Product.quantity` plus every shard.
+    """
+    __tablename__ = "product_stock_shards"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ProductStockShard(product_id={self.product_id}, shard={self.shard}, quantity={self.quantity})>"
+
+
+# Total stock, including the shards. Unsharded products skip the subquery, which SQLite and
+# PostgreSQL only evaluate when the CASE branch is taken.
+_total_quantity = case(
+    (
+        Product.stock_shards > 0,
+        Product.quantity + func.coalesce(
+            select(func.sum(ProductStockShard.quantity))
+            .where(ProductStockShard.product_id == Product.id)
+            .correlate_except(ProductStockShard)
+            .scalar_subquery(),
+            0,
+        ),
+    ),
+    else_=Product.quantity,
+)
+Product.total_quantity = column_property(_total_quantity)
+# Stock that can still be ordered: the total minus the units held by cart reservations
+Product.available_quantity = column_property(_total_quantity - Product.reserved)
+
+
+# SQLite full-text index over name and description. The FTS5 table reads its content from
+# `products` and the triggers keep it in step with every insert, update and delete.
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    # Index any rows that were already in the catalog before the search table existed
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+@event.listens_for(Base.metadata, "after_create")
+def create_sqlite_search_index(target, connection, **kw):
+    """
+    Creates the FTS5 search table and its sync triggers on SQLite, if they do not exist yet.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+    ).first()
+    if exists:
+        return
+    for statement in SQLITE_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
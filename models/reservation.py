@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from database import Base
+
+class StockHold(Base):
+    """
+    Represents a short-lived hold on product stock, e.g. while a cart is being checked out.
+
+    The held units are counted in `Product.reserved` until the hold is committed to an
+    order, released, or swept after `expires_at`.
+    """
+    __tablename__ = 'stock_holds'
+    __table_args__ = (
+        # Lets the sweeper find expired holds without scanning live ones
+        Index("ix_stock_holds_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    customer_id = Column(Integer, ForeignKey('customers.id'), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<StockHold(id={self.id}, product_id={self.product_id}, quantity={self.quantity}, expires_at={self.expires_at})>"
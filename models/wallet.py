@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from database import Base
 
 class Wallet(Base):
@@ -13,3 +14,32 @@ class Wallet(Base):
     balance = Column(Integer, default=0, nullable=False)
 
     customer = relationship("Customer", back_populates="wallet")
+    transactions = relationship("WalletTransaction", back_populates="wallet")
+
+
+class WalletTransaction(Base):
+    """
+    Represents one entry in a wallet's append-only ledger. Credits have a positive amount,
+    debits a negative one.
+    """
+    __tablename__ = "wallet_transactions"
+    __table_args__ = (
+        # A retried request with the same key finds the original entry instead of charging twice
+        UniqueConstraint("wallet_id", "idempotency_key", name="uq_wallet_transactions_idempotency_key"),
+        # Newest-first history pages
+        Index("ix_wallet_transactions_wallet_id_id", "wallet_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=False)
+    amount = Column(Integer, nullable=False)
+    balance_after = Column(Integer, nullable=False)
+    idempotency_key = Column(String, nullable=True)
+    # Set when the entry paid for an order. Not a foreign key, since the order may later be archived.
+    order_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    wallet = relationship("Wallet", back_populates="transactions")
+
+    def __repr__(self):
+        return f"<WalletTransaction(id={self.id}, wallet_id={self.wallet_id}, amount={self.amount})>"
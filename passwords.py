@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext # type: ignore
+
+# Password hashing settings, all overridable through the environment.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Cost factor for newly created hashes
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))  # 0 runs hashing in threads
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(2 * max(PASSWORD_HASH_WORKERS, 1))))
+
+# Hashes created with a different cost factor are reported as needing an update on login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str):
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification off the event loop in a dedicated process pool.
+
+    At most `concurrency` operations are queued or running at once; further callers wait on
+    a semaphore instead of piling work onto the pool, so a login burst cannot starve the
+    threadpool or event loop used by the rest of the API.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, concurrency: int = PASSWORD_HASH_CONCURRENCY):
+        self.workers = workers
+        self.concurrency = concurrency
+        self._executor = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def start(self):
+        """
+        Create the worker pool. Called from the application lifespan; otherwise the pool is
+        created on first use.
+        """
+        if self._executor is None and self.workers > 0:
+            # Spawn rather than fork so workers never inherit the event loop's threads and locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run(self, func, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.start(), func, *args)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a plain password with the configured cost factor.
+        """
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Verify if the plain password matches the hashed password.
+        """
+        valid, _ = await self._run(_verify_and_update, password, hashed_password)
+        return valid
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        """
+        Verify a password and, when the stored hash uses an outdated cost factor, return a
+        replacement hash.
+
+        Returns:
+            tuple: Whether the password is valid, and the new hash (None if no update is needed).
+        """
+        return await self._run(_verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        """
+        Stop the worker processes. Called from the application lifespan.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
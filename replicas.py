@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+import logging
+import os
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from database import SessionLocal, engine_options, tune_sqlite
+from authentication import decode_token
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Read replica settings. DATABASE_REPLICA_URLS is a comma-separated list of database URLs;
+# when it is empty every read goes to the primary.
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))  # Seconds between health checks
+REPLICA_HEALTH_TIMEOUT = float(os.getenv("REPLICA_HEALTH_TIMEOUT", "2"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))  # Reads stay on the primary this long after a write
+
+
+class Replica:
+    """
+    One read replica: its engine, a session factory bound to it, and its last known health.
+    """
+
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_async_engine(url, **engine_options(url))
+        tune_sqlite(self.engine, url)
+        self.sessionmaker = async_sessionmaker(bind=self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+
+
+class ReplicaSet:
+    """
+    Spreads reads over the healthy replicas in round-robin order.
+
+    A background health check pings every replica; replicas that fail are skipped until a
+    later check succeeds. With no healthy replica, `choose` returns None and reads go to the
+    primary.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+
+    def choose(self):
+        """
+        Return the next healthy replica, or None if there is none.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    async def _ping(self, replica: Replica):
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self):
+        """
+        Ping every replica and update its health. Called periodically from the lifespan.
+        """
+        for replica in self.replicas:
+            try:
+                await asyncio.wait_for(self._ping(replica), REPLICA_HEALTH_TIMEOUT)
+                healthy = True
+            except Exception:
+                healthy = False
+            if healthy != replica.healthy:
+                if healthy:
+                    logger.info("Read replica %s is healthy again", replica.name)
+                else:
+                    logger.warning("Read replica %s failed its health check; reading from other databases", replica.name)
+            replica.healthy = healthy
+
+    def stats(self) -> dict:
+        return {replica.name: replica.healthy for replica in self.replicas}
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_set = ReplicaSet(REPLICA_URLS)
+
+# Principals that wrote recently, keyed like the principal cache: (role, id)
+recent_writers = TTLCache(maxsize=100000, ttl=READ_YOUR_WRITES_SECONDS)
+
+
+def mark_write(role: str, principal_id: int):
+    """
+    Send the principal's reads to the primary for the next READ_YOUR_WRITES_SECONDS, so
+    they see their own writes even while the replicas are catching up.
+    """
+    if replica_set.replicas:
+        recent_writers.set((role, principal_id), True)
+
+
+def _wrote_recently(request: Request) -> bool:
+    keys = []
+    customer_id = request.path_params.get("customer_id")
+    if customer_id is not None and str(customer_id).isdigit():
+        keys.append(("customer", int(customer_id)))
+    token = request.query_params.get("token")
+    if token:
+        try:
+            payload = decode_token(token)
+        except Exception:
+            payload = {}  # Rejected by the authentication dependency
+        if payload.get("role") and payload.get("id") is not None:
+            keys.append((payload["role"], payload["id"]))
+    return any(recent_writers.get(key) for key in keys)
+
+
+async def get_read_db(request: Request):
+    """
+    Dependency that provides a session for read-only handlers.
+
+    The session is bound to a healthy replica, or to the primary when no replica is
+    configured or healthy, or when the caller wrote something within the last
+    READ_YOUR_WRITES_SECONDS.
+
+    Yields:
+        db: The session instance to run the handler's queries with.
+    """
+    replica = None if _wrote_recently(request) else replica_set.choose()
+    factory = replica.sessionmaker if replica is not None else SessionLocal
+    async with factory() as db:
+        yield db
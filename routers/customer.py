@@ -1,33 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext # type: ignore
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
+from replicas import get_read_db
 from datetime import datetime, timedelta
 from jose import JWTError, jwt # type: ignore
 from models.customer import Customer
 from models.order import Order
 from schemas.customer import CustomerCreate, CustomerResponse, CustomerLogin
-from schemas.order import OrderResponse
-from typing import List
+from schemas.order import OrderHistoryPage, OrderStatus
+from crud.order import get_order_history_page
+from typing import List, Optional
 from authentication import get_current_customer
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from passwords import password_hasher
+from serialization import FAST_JSON, FastJSONResponse
 
 router = APIRouter()
 
 @router.post("/register/", response_model=CustomerResponse)
-def register_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
+async def register_customer(customer: CustomerCreate, db: AsyncSession = Depends(get_db)):
     """
     Endpoint to register a new customer.
     """
     # Check if the email already exists
-    existing_customer = db.query(Customer).filter(Customer.email == customer.email).first()
+    existing_customer = await db.scalar(select(Customer).filter(Customer.email == customer.email))
     if existing_customer:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     try:
         # Hash the password before saving
-        hashed_password = pwd_context.hash(customer.password)
+        hashed_password = await password_hasher.hash(customer.password)
 
         new_customer = Customer(
             name=customer.name,
@@ -36,8 +38,8 @@ def register_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
         )
 
         db.add(new_customer)
-        db.commit()
-        db.refresh(new_customer)
+        await db.commit()
+        await db.refresh(new_customer)
 
         return new_customer
     except Exception as e:
@@ -48,8 +50,6 @@ SECRET_KEY = "your_secret_key_here"  # Change this to a secure key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)):
     """
     Utility to create access token
@@ -61,21 +61,32 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes
     return encoded_jwt
 
 @router.post("/login/")
-def login(customer: CustomerLogin, db: Session = Depends(get_db)):
+async def login(customer: CustomerLogin, db: AsyncSession = Depends(get_db)):
     """
     Endpoint to log in a customer.
     """
     try:
         # Fetch customer by email
-        customer_db = db.query(Customer).filter(Customer.email == customer.email).first()
+        customer_db = await db.scalar(select(Customer).filter(Customer.email == customer.email))
 
         # Validate credentials
-        if not customer_db or not pwd_context.verify(customer.password, customer_db.password):
+        if not customer_db:
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        valid, new_hash = await password_hasher.verify_and_update(customer.password, customer_db.password)
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
+        # Upgrade hashes created with an outdated cost factor
+        if new_hash:
+            customer_db.password = new_hash
+            await db.commit()
+
         # Generate access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(data={"sub": customer_db.email}, expires_delta=access_token_expires)
+        access_token = create_access_token(
+            data={"sub": customer_db.email, "id": customer_db.id, "role": "customer"},
+            expires_delta=access_token_expires,
+        )
 
         return {"access_token": access_token, "token_type": "bearer"}
     except HTTPException:
@@ -84,15 +95,34 @@ def login(customer: CustomerLogin, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error logging in: {str(e)}")
 
 
-@router.get("/customer/orders", response_model=List[OrderResponse])
-def get_customer_orders(
-    db: Session = Depends(get_db),
+@router.get("/customer/orders", response_model=OrderHistoryPage)
+async def get_customer_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[OrderStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_customer: Customer = Depends(get_current_customer)
     ):
     """
-    Retrieve the order history for the logged-in customer.
+    Retrieve the order history for the logged-in customer, newest first, optionally filtered
+    by status and by a `created_from` (inclusive) / `created_to` (exclusive) date range.
+    Pass the returned `next_cursor` back as `cursor` to fetch older orders.
     """
-    orders = db.query(Order).filter(Order.customer_id == current_customer.id).all()
-    if not orders:
+    orders, next_cursor = await get_order_history_page(
+        db,
+        customer_id=current_customer.id,
+        limit=limit,
+        cursor=cursor,
+        status=status.value if status else None,
+        created_from=created_from,
+        created_to=created_to,
+        as_dicts=FAST_JSON,
+    )
+    if not orders and not cursor:
         raise HTTPException(status_code=404, detail="No orders found for this customer.")
-    return orders
\ No newline at end of file
+    if FAST_JSON:
+        # The rows are already shaped like OrderHistoryPage, so skip revalidating them
+        return FastJSONResponse({"items": orders, "next_cursor": next_cursor})
+    return {"items": orders, "next_cursor": next_cursor}
\ No newline at end of file
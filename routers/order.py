@@ -1,42 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from schemas.order import OrderCreate, OrderResponse, OrderUpdateStatus
-from crud.order import create_order, get_orders_by_customer, get_order_by_id
+from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from schemas.order import (
+    OrderCreate, OrderBatchCreate, OrderItem, OrderResponse, OrderUpdateStatus, CheckoutResponse, OrderBulkStatusUpdate,
+    OrderBulkStatusResponse,
+)
+from crud.order import (
+    create_order, create_orders_batch, checkout_with_wallet, get_orders_by_customer, get_order_by_id, change_order_status,
+    update_orders_status,
+)
 from models.product import Product
 from models.customer import Customer
 from models.order import Order
 from models.seller import Seller
 from authentication import get_current_customer, get_current_seller
 from database import get_db
+from replicas import get_read_db, mark_write
 router = APIRouter()
 
 @router.post("/create/")
-def create_new_order(order: OrderCreate, db: Session = Depends(get_db)):
+async def create_new_order(order: OrderCreate, db: AsyncSession = Depends(get_db)):
     """
     Endpoint to create a new order.
     """
-    # Check if the product and customer exist (optional)
-    product = db.query(Product).filter(Product.id == order.product_id).first()
-    customer = db.query(Customer).filter(Customer.id == order.customer_id).first()
-
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
+    if order.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Invalid quantity")
 
     try:
-        # Create the order and update product stock
-        return create_order(db=db, order=order)
+        # Create the order and update product stock; missing products and customers are reported as 404
+        db_order = await create_order(db=db, order=order)
+        mark_write("customer", order.customer_id)
+        return db_order
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create order: {str(e)}")
 
+@router.post("/orders/batch", response_model=List[OrderResponse])
+async def create_orders_checkout(batch: OrderBatchCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint to check out a cart of several products in one request.
+    Either every line is ordered or, if any product is missing or short on stock, none are.
+    """
+    try:
+        db_orders = await create_orders_batch(db=db, batch=batch)
+        mark_write("customer", batch.customer_id)
+        return db_orders
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create orders: {str(e)}")
+
+@router.post("/orders/checkout", response_model=CheckoutResponse)
+async def checkout_order(
+    item: OrderItem,
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    db: AsyncSession = Depends(get_db),
+    current_customer: Customer = Depends(get_current_customer),
+    ):
+    """
+    Buy a product and pay for it from the current customer's wallet in one request.
+    Retrying with the same `Idempotency-Key` header returns the original order instead of buying twice.
+    """
+    customer_id = current_customer.id
+    try:
+        order, transaction = await checkout_with_wallet(db, customer_id, item, idempotency_key)
+        mark_write("customer", customer_id)
+        return {
+            "order": order,
+            "amount_charged": -transaction.amount,
+            "balance": transaction.balance_after,
+            "transaction_id": transaction.id,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to check out: {str(e)}")
+
 @router.get("/orders/{customer_id}/")
-def get_orders(customer_id: int, db: Session = Depends(get_db)):
+async def get_orders(customer_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Endpoint to get all orders by a specific customer.
     """
     try:
-        orders = get_orders_by_customer(db=db, customer_id=customer_id)
+        orders = await get_orders_by_customer(db=db, customer_id=customer_id)
         if not orders:
             raise HTTPException(status_code=404, detail="No orders found for this customer")
         return orders
@@ -44,12 +91,12 @@ def get_orders(customer_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve orders: {str(e)}")
 
 @router.get("/order/{order_id}/")
-def get_order(order_id: int, db: Session = Depends(get_db)):
+async def get_order(order_id: int, db: AsyncSession = Depends(get_db)):
     """
     Endpoint to get a specific order by its ID.
     """
     try:
-        order = get_order_by_id(db=db, order_id=order_id)
+        order = await get_order_by_id(db=db, order_id=order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         return order
@@ -57,7 +104,7 @@ def get_order(order_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve order: {str(e)}")
 
 # @router.post("/place/", response_model=OrderResponse)
-# def place_order(order: OrderCreate, db: Session = Depends(get_db), customer: Customer = Depends(get_current_customer)):
+# def place_order(order: OrderCreate, db: AsyncSession = Depends(get_db), customer: Customer = Depends(get_current_customer)):
 #     # Check if the product exists
 #     product = db.query(Product).filter(Product.id == order.product_id).first()
 #     if not product:
@@ -78,26 +125,50 @@ def get_order(order_id: int, db: Session = Depends(get_db)):
 #     return new_order
 
 @router.put("/order/{order_id}/status", response_model=dict)
-def update_order_status(
+async def update_order_status(
     order_id: int,
     order_update: OrderUpdateStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_seller: Seller = Depends(get_current_seller),
     ):
     """
-    Update the status of an existing order. Only the seller of the product can update its status.
+    Update the status of an existing order. Only the seller of the product can update its status,
+    and only along the allowed transitions (delivered and canceled orders are final).
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    updated = await change_order_status(db, order_id, current_seller.id, order_update.status.value)
+    for order in updated:
+        mark_write("seller", order.seller_id)
+        mark_write("customer", order.customer_id)
 
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    return {"detail": "Order status updated successfully"}
 
-    if order.seller_id != current_seller.id:
-        raise HTTPException(status_code=403, detail="Unauthorized to update this order")
+@router.put("/orders/status", response_model=OrderBulkStatusResponse)
+async def update_orders_status_bulk(
+    bulk_update: OrderBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_seller: Seller = Depends(get_current_seller),
+    ):
+    """
+    Move many of the seller's orders to a new status in one request and one transaction,
+    selected by ID or by filter. Orders that belong to another seller, or whose status cannot
+    move to the new one (e.g. delivered or canceled orders), are left alone and reported
+    per ID. When selecting by filter, repeat the request until nothing is updated.
+    """
+    if (bulk_update.order_ids is None) == (bulk_update.filter is None):
+        raise HTTPException(status_code=400, detail="Give either order_ids or filter")
 
-    # Update the status
-    order.status = order_update.status
-    db.commit()
-    db.refresh(order)
+    seller_id = current_seller.id
+    try:
+        updated, results = await update_orders_status(
+            db, seller_id, bulk_update.status.value, order_ids=bulk_update.order_ids, filter=bulk_update.filter
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update orders: {str(e)}")
+    if updated:
+        mark_write("seller", seller_id)
+        for customer_id in {order.customer_id for order in updated}:
+            mark_write("customer", customer_id)
+    return {"status": bulk_update.status, "updated": len(updated), "results": results}
 
-    return {"detail": "Order status updated successfully"}
\ No newline at end of file
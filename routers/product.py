@@ -1,18 +1,40 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from models.product import Product
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.product import Product, ProductStockShard
+from models.reservation import StockHold
 from models.seller import Seller
-from schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductPage, ProductSort, BulkFormat, ProductImportResult,
+)
+from crud.product import get_products_page, import_products, export_products, IMPORT_CHUNK_SIZE
+from crud.search import search_products
+from crud.inventory import redistribute_stock, set_stock_shards, STOCK_MAX_SHARDS
 from database import get_db
 from authentication import get_current_seller
+from cache import catalog_cache, invalidate_products, CachedResponse
+from serialization import FAST_JSON, dumps
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+
+def _cached_response(entry: CachedResponse, if_none_match: Optional[str]) -> Response:
+    """
+    Builds the response for a cached catalog body: 304 Not Modified when the client already
+    holds the current version, otherwise the body itself. Clients must revalidate every time.
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if entry.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
 # Create a product
 @router.post("/", response_model=ProductResponse)
-def create_product(
+async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_seller: Seller = Depends(get_current_seller)
 ):
     """
@@ -27,77 +49,228 @@ def create_product(
             seller_id=current_seller.id,
         )
         db.add(db_product)
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        await invalidate_products()
         return db_product
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating product: {str(e)}")
 
-# Retrieve all products
-@router.get("/", response_model=list[ProductResponse])
-def get_products(db: Session = Depends(get_db)):
+# Retrieve products, one page at a time
+@router.get("/", response_model=ProductPage)
+async def get_products(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: ProductSort = ProductSort.id,
+    seller_id: Optional[int] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    ):
     """
-    Retrieve all products in the database.
+    Retrieve a page of products, optionally filtered by seller, price range and stock.
+    Pass the returned `next_cursor` back as `cursor` to fetch the following page.
+    Pages are served from the catalog cache and carry an ETag for conditional requests.
     """
+    # Misses read from the primary: a lagging replica could refill the cache with rows from
+    # before the change that just invalidated it
+    key = await catalog_cache.list_key(
+        f"products:limit={limit}:cursor={cursor}:sort={sort.value}:seller_id={seller_id}"
+        f":min_price={min_price}:max_price={max_price}:in_stock={in_stock}"
+    )
+    entry = await catalog_cache.get(key)
+    if entry is not None:
+        return _cached_response(entry, if_none_match)
+
     try:
-        return db.query(Product).all()
+        items, next_cursor = await get_products_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            sort=sort.value,
+            seller_id=seller_id,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            as_dicts=FAST_JSON,
+        )
+        if FAST_JSON:
+            body = dumps({"items": items, "next_cursor": next_cursor})
+        else:
+            page = ProductPage.model_validate({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+            body = page.model_dump_json().encode()
+        entry = await catalog_cache.set(key, body)
+        return _cached_response(entry, if_none_match)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving products: {str(e)}")
 
 
+# Full-text search over the catalog
+@router.get("/search", response_model=list[ProductResponse])
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_db),
+    ):
+    """
+    Search products by name and description, best matches first.
+    The last word of the query also matches as a prefix (e.g. "sho" finds "shoes").
+    """
+    try:
+        return await search_products(db, q, limit=limit, offset=offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching products: {str(e)}")
+
+# Bulk import products from a streamed CSV or NDJSON upload
+@router.post("/import", response_model=ProductImportResult)
+async def import_catalog(
+    request: Request,
+    format: BulkFormat = BulkFormat.csv,
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db),
+    current_seller: Seller = Depends(get_current_seller)
+    ):
+    """
+    Import many products for the logged-in seller. The request body is the raw file
+    (CSV with a header row, or NDJSON) and is parsed as it arrives. Rows with an `id`
+    update that product, so an export can be edited and imported back. Rows that fail
+    validation are skipped and reported by row number.
+    """
+    try:
+        return await import_products(
+            db, current_seller.id, request.stream(), format=format.value, chunk_size=chunk_size
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing products: {str(e)}")
+
+# Bulk export the seller's products as a stream
+@router.get("/export")
+async def export_catalog(
+    format: BulkFormat = BulkFormat.csv,
+    current_seller: Seller = Depends(get_current_seller)
+    ):
+    """
+    Stream every product of the logged-in seller as CSV or NDJSON.
+    """
+    media_type = "text/csv" if format == BulkFormat.csv else "application/x-ndjson"
+    return StreamingResponse(
+        export_products(current_seller.id, format=format.value),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{format.value}"'},
+    )
+
 # Retrieve a specific product
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    ):
     """
     Retrieve a specific product by its ID.
+    The product is served from the catalog cache and carries an ETag for conditional requests.
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    # Misses read from the primary, as for product pages
+    key = await catalog_cache.object_key(f"product:{product_id}")
+    entry = await catalog_cache.get(key)
+    if entry is None:
+        product = await db.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        body = ProductResponse.model_validate(product, from_attributes=True).model_dump_json().encode()
+        entry = await catalog_cache.set(key, body)
+    return _cached_response(entry, if_none_match)
 
 # Update a product
 @router.put("/{product_id}", response_model=ProductResponse)
-def update_product(
+async def update_product(
     product_id: int,
     product: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_seller: Seller = Depends(get_current_seller)
     ):
     """
     Update a product. Only available to the seller who created it.
     """
-    db_product = db.query(Product).filter(Product.id == product_id, Product.seller_id == current_seller.id).first()
+    db_product = await db.scalar(
+        select(Product).filter(Product.id == product_id, Product.seller_id == current_seller.id)
+    )
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found or unauthorized")
 
     try:
-        for key, value in product.dict(exclude_unset=True).items():
+        updates = product.dict(exclude_unset=True)
+        if db_product.stock_shards and "quantity" in updates:
+            # The new stock is spread over the product's shards
+            await redistribute_stock(db, product_id, total=updates.pop("quantity"))
+        for key, value in updates.items():
             setattr(db_product, key, value)
 
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        await invalidate_products(product_id)
         return db_product
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating product: {str(e)}")
 
+# Split a hot product's stock over several counters
+@router.put("/{product_id}/stock-shards", response_model=ProductResponse)
+async def shard_product_stock(
+    product_id: int,
+    shards: int = Query(..., ge=0, le=STOCK_MAX_SHARDS),
+    db: AsyncSession = Depends(get_db),
+    current_seller: Seller = Depends(get_current_seller)
+    ):
+    """
+    Spread a product's stock over `shards` counters, so concurrent orders for it update
+    different rows instead of queueing on one. Pass 0 to merge the stock back.
+    Only available to the seller who created the product.
+    """
+    db_product = await db.scalar(
+        select(Product).filter(Product.id == product_id, Product.seller_id == current_seller.id)
+    )
+    if not db_product:
+        raise HTTPException(status_code=404, detail="Product not found or unauthorized")
+
+    try:
+        await set_stock_shards(db, product_id, shards)
+        await db.refresh(db_product)
+        return db_product
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error sharding product stock: {str(e)}")
+
 # Delete a product
 @router.delete("/{product_id}")
-def delete_product(
+async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_seller: Seller = Depends(get_current_seller)
     ):
     """
     Delete a product. Only available to the seller who created it.
     """
-    db_product = db.query(Product).filter(Product.id == product_id, Product.seller_id == current_seller.id).first()
+    db_product = await db.scalar(
+        select(Product).filter(Product.id == product_id, Product.seller_id == current_seller.id)
+    )
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found or unauthorized")
 
     try:
-        db.delete(db_product)
-        db.commit()
+        # Holds on the product go with it; nobody can commit them any more
+        await db.execute(delete(StockHold).where(StockHold.product_id == product_id))
+        await db.execute(delete(ProductStockShard).where(ProductStockShard.product_id == product_id))
+        await db.delete(db_product)
+        await db.commit()
+        await invalidate_products(product_id)
         return {"detail": "Product deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting product: {str(e)}")
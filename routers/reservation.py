@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from schemas.order import OrderItem, OrderResponse
+from schemas.reservation import HoldResponse
+from crud.reservation import create_hold, commit_hold, release_hold
+from models.customer import Customer
+from authentication import get_current_customer
+from database import get_db
+from replicas import mark_write
+
+router = APIRouter(prefix="/holds", tags=["Holds"])
+
+@router.post("/", response_model=HoldResponse)
+async def hold_stock(
+    item: OrderItem,
+    db: AsyncSession = Depends(get_db),
+    current_customer: Customer = Depends(get_current_customer),
+    ):
+    """
+    Hold units of a product for the current customer while they check out. Held units
+    cannot be ordered by anyone else until the hold is committed, released or expires.
+    """
+    return await create_hold(db, current_customer.id, item)
+
+@router.post("/{hold_id}/commit", response_model=OrderResponse)
+async def commit_held_stock(
+    hold_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_customer: Customer = Depends(get_current_customer),
+    ):
+    """
+    Place an order for the units of an unexpired hold.
+    """
+    customer_id = current_customer.id
+    order = await commit_hold(db, hold_id, customer_id)
+    mark_write("customer", customer_id)
+    return order
+
+@router.delete("/{hold_id}")
+async def release_held_stock(
+    hold_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_customer: Customer = Depends(get_current_customer),
+    ):
+    """
+    Release a hold, making its units available to other customers again.
+    """
+    if not await release_hold(db, hold_id, current_customer.id):
+        raise HTTPException(status_code=404, detail="Hold not found")
+    return {"detail": "Hold released successfully"}
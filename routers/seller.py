@@ -1,23 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from schemas.order import OrderResponse
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from schemas.order import OrderHistoryPage, OrderStatus
+from crud.order import get_order_history_page
+from crud.analytics import get_sales_summary
+from schemas.analytics import SalesGroupBy, SellerAnalytics
 from schemas.seller import SellerCreate, SellerResponse
 from models.seller import Seller
 from models.order import Order
 from models.product import Product
 from database import get_db
-from passlib.hash import bcrypt # type: ignore
-from passlib.context import CryptContext # type: ignore
+from replicas import get_read_db
+from passwords import password_hasher
+from serialization import FAST_JSON, FastJSONResponse
 from jose import JWTError, jwt # type: ignore
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from authentication import get_current_seller
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/sellers", tags=["Sellers"])
 
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # JWT secret and algorithm
 SECRET_KEY = "your_secret_key_here"
 ALGORITHM = "HS256"
@@ -25,18 +27,18 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
 # Hash the password
-def hash_password(password: str) -> str:
+async def hash_password(password: str) -> str:
     """
-    Hash a plain password.
+    Hash a plain password in the password hashing worker pool.
     """
-    return pwd_context.hash(password)
+    return await password_hasher.hash(password)
 
 # Verify the password
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify if the plain password matches the hashed password.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_hasher.verify(plain_password, hashed_password)
 
 # Create a JWT token
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -50,31 +52,39 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 # Login endpoint
 @router.post("/login")
-def login(email: str, password: str, db: Session = Depends(get_db)):
+async def login(email: str, password: str, db: AsyncSession = Depends(get_db)):
     """
     Authenticate the seller using email and password and return a JWT token.
     """
-    seller = db.query(Seller).filter(Seller.email == email).first()
-    if not seller or not verify_password(password, seller.password):
+    seller = await db.scalar(select(Seller).filter(Seller.email == email))
+    if not seller:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await password_hasher.verify_and_update(password, seller.password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    # Create JWT token
-    access_token = create_access_token(data={"sub": seller.email})
+    # Upgrade hashes created with an outdated cost factor
+    if new_hash:
+        seller.password = new_hash
+        await db.commit()
+
+    # Create JWT token; the id and role claims let authenticated requests skip the email lookup
+    access_token = create_access_token(data={"sub": seller.email, "id": seller.id, "role": "seller"})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/", response_model=SellerResponse)
-def register_seller(seller: SellerCreate, db: Session = Depends(get_db)):
+async def register_seller(seller: SellerCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new seller account.
     """
     # Check if email is already registered
-    existing_seller = db.query(Seller).filter(Seller.email == seller.email).first()
+    existing_seller = await db.scalar(select(Seller).filter(Seller.email == seller.email))
     if existing_seller:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Hash the password before saving
-    hashed_password = hash_password(seller.password)
+    hashed_password = await hash_password(seller.password)
 
     # Create a new seller instance and save to the database
     new_seller = Seller(
@@ -87,29 +97,91 @@ def register_seller(seller: SellerCreate, db: Session = Depends(get_db)):
         niche=seller.niche
     )
     db.add(new_seller)
-    db.commit()
-    db.refresh(new_seller)
+    await db.commit()
+    await db.refresh(new_seller)
     return new_seller
     
     #return create_seller(db, seller)
 
 
 @router.get("/me", response_model=SellerResponse)
-def get_seller_profile(current_seller: Seller = Depends(get_current_seller)):
+async def get_seller_profile(current_seller: Seller = Depends(get_current_seller)):
     """
     Retrieve the profile information of the currently authenticated seller.
     """
     return current_seller
 
-@router.get("/seller/orders", response_model=List[OrderResponse])
-def get_seller_orders(
-    db: Session = Depends(get_db),
+@router.get("/seller/orders", response_model=OrderHistoryPage)
+async def get_seller_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[OrderStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_seller: Seller = Depends(get_current_seller)
 ):
     """
-    Retrieve the order history for the logged-in seller.
+    Retrieve the order history for the logged-in seller, newest first, optionally filtered
+    by status and by a `created_from` (inclusive) / `created_to` (exclusive) date range.
+    Pass the returned `next_cursor` back as `cursor` to fetch older orders.
     """
-    orders = db.query(Order).join(Product).filter(Product.seller_id == current_seller.id).all()
-    if not orders:
+    orders, next_cursor = await get_order_history_page(
+        db,
+        seller_id=current_seller.id,
+        limit=limit,
+        cursor=cursor,
+        status=status.value if status else None,
+        created_from=created_from,
+        created_to=created_to,
+        as_dicts=FAST_JSON,
+    )
+    if not orders and not cursor:
         raise HTTPException(status_code=404, detail="No orders found for this seller.")
-    return orders
+    if FAST_JSON:
+        # The rows are already shaped like OrderHistoryPage, so skip revalidating them
+        return FastJSONResponse({"items": orders, "next_cursor": next_cursor})
+    return {"items": orders, "next_cursor": next_cursor}
+
+
+@router.get("/analytics", response_model=SellerAnalytics)
+async def get_seller_analytics(
+    group_by: SalesGroupBy = SalesGroupBy.day,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[OrderStatus] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_seller: Seller = Depends(get_current_seller)
+):
+    """
+    Retrieve the logged-in seller's revenue, units sold and order counts, grouped by day,
+    product or order status, for an optional `date_from` (inclusive) / `date_to` (exclusive)
+    range of UTC days. Served from the pre-aggregated sales rollup.
+    Canceled orders are left out of the figures unless requested with `status=canceled`.
+    """
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+    rows = await get_sales_summary(
+        db,
+        current_seller.id,
+        group_by=group_by.value,
+        date_from=date_from,
+        date_to=date_to,
+        status=status.value if status else None,
+    )
+    buckets = [
+        {"key": row.key, "orders": row.orders, "units": row.units, "revenue": round(row.revenue, 2)}
+        for row in rows
+    ]
+    totals = {
+        "orders": sum(bucket["orders"] for bucket in buckets),
+        "units": sum(bucket["units"] for bucket in buckets),
+        "revenue": round(sum(row.revenue for row in rows), 2),
+    }
+    return {
+        "group_by": group_by,
+        "date_from": date_from,
+        "date_to": date_to,
+        "totals": totals,
+        "buckets": buckets,
+    }
@@ -1,78 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from schemas.wallet import WalletResponse, WalletCreate
-from crud.wallet import get_wallet_by_customer, create_wallet, update_wallet_balance
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from schemas.wallet import WalletResponse, WalletCreate, WalletTransactionPage
+from crud.wallet import get_wallet_by_customer, create_wallet, update_wallet_balance, get_wallet_transactions
 from models.customer import Customer
 from database import get_db
+from replicas import get_read_db, mark_write
 from authentication import get_current_customer
 
 router = APIRouter()
 
 @router.get("/wallet/", response_model=WalletResponse)
-def get_wallet_balance(
-    db: Session = Depends(get_db),
+async def get_wallet_balance(
+    db: AsyncSession = Depends(get_read_db),
     current_customer: Customer = Depends(get_current_customer),
     ):
     """
     Retrieve the wallet balance for the current customer.
     """
-    wallet = get_wallet_by_customer(db, current_customer.id)
+    wallet = await get_wallet_by_customer(db, current_customer.id)
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found")
     return wallet
 
 @router.post("/wallet/create/")
-def create_wallet_for_customer(
-    db: Session = Depends(get_db),
+async def create_wallet_for_customer(
+    db: AsyncSession = Depends(get_db),
     current_customer: Customer = Depends(get_current_customer),
     ):
     """
     Create a wallet for the current customer.
     """
-    existing_wallet = get_wallet_by_customer(db, current_customer.id)
+    existing_wallet = await get_wallet_by_customer(db, current_customer.id)
     if existing_wallet:
         raise HTTPException(status_code=400, detail="Wallet already exists")
     wallet_data = WalletCreate(customer_id=current_customer.id)
-    wallet = create_wallet(db, wallet_data)
+    wallet = await create_wallet(db, wallet_data)
+    mark_write("customer", current_customer.id)
     return {"detail": "Wallet created successfully"}
 
 @router.put("/wallet/credit/")
-def credit_wallet(
+async def credit_wallet(
     amount: int,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    db: AsyncSession = Depends(get_db),
     current_customer: Customer = Depends(get_current_customer),
     ):
     """
     Credit the wallet with a specified amount.
+    Retrying with the same `Idempotency-Key` header does not credit the wallet twice.
     """
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid amount")
     
-    wallet = get_wallet_by_customer(db, current_customer.id)
+    wallet = await get_wallet_by_customer(db, current_customer.id)
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    updated_wallet = update_wallet_balance(db, wallet.id, amount)
-    return {"detail": "Wallet credited successfully", "balance": updated_wallet.balance}
+    # A replayed key rolls the session back, expiring `current_customer`; read its id first
+    customer_id = current_customer.id
+    transaction, replayed = await update_wallet_balance(db, wallet.id, amount, idempotency_key)
+    mark_write("customer", customer_id)
+    return {
+        "detail": "Wallet credited successfully",
+        "balance": transaction.balance_after,
+        "transaction_id": transaction.id,
+        "replayed": replayed,
+    }
 
 @router.put("/wallet/debit/")
-def debit_wallet(
+async def debit_wallet(
     amount: int,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    db: AsyncSession = Depends(get_db),
     current_customer: Customer = Depends(get_current_customer),
     ):
     """
     Debit the wallet by a specified amount.
+    Retrying with the same `Idempotency-Key` header does not debit the wallet twice.
     """
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid amount")
 
-    wallet = get_wallet_by_customer(db, current_customer.id)
+    wallet = await get_wallet_by_customer(db, current_customer.id)
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found")
 
-    if wallet.balance < amount:
-        raise HTTPException(status_code=400, detail="Insufficient balance")
-    
-    updated_wallet = update_wallet_balance(db, wallet.id, -amount)
-    return {"detail": "Wallet debited successfully", "balance": updated_wallet.balance}
+    # The balance check happens inside the update, against the current balance
+    customer_id = current_customer.id
+    transaction, replayed = await update_wallet_balance(db, wallet.id, -amount, idempotency_key)
+    mark_write("customer", customer_id)
+    return {
+        "detail": "Wallet debited successfully",
+        "balance": transaction.balance_after,
+        "transaction_id": transaction.id,
+        "replayed": replayed,
+    }
+
+@router.get("/wallet/transactions/", response_model=WalletTransactionPage)
+async def get_wallet_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_customer: Customer = Depends(get_current_customer),
+    ):
+    """
+    Retrieve the current customer's wallet transactions, newest first.
+    Pass the returned `next_cursor` back as `cursor` to fetch older entries.
+    """
+    wallet = await get_wallet_by_customer(db, current_customer.id)
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+    items, next_cursor = await get_wallet_transactions(db, wallet.id, limit=limit, cursor=cursor)
+    return {"items": items, "next_cursor": next_cursor}
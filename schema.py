@@ -0,0 +1,77 @@
+import logging
+import os
+from functools import lru_cache
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Schema changes are applied by Alembic migrations (see migrations/). By default the application
+# only checks on startup that the database is at the latest revision; with DB_AUTO_MIGRATE it
+# upgrades the database itself, which is convenient for development and single-instance setups.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+
+def _alembic_config() -> Config:
+    config = Config(ALEMBIC_INI)
+    # Keep the application's logging configuration instead of alembic.ini's
+    config.attributes["configure_logger"] = False
+    return config
+
+
+@lru_cache(maxsize=None)
+def _expected_heads() -> frozenset:
+    """
+    The head revision(s) of the migration scripts. Parsing the scripts is the slow part of
+    the startup check, so it is done once per process.
+    """
+    return frozenset(ScriptDirectory.from_config(_alembic_config()).get_heads())
+
+
+def _current_revisions(connection) -> set:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+async def upgrade_database():
+    """
+    Apply every pending migration to the application database.
+    """
+    config = _alembic_config()
+
+    def upgrade(connection):
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade)
+
+
+async def check_schema_revision():
+    """
+    Make sure the database schema is at the latest migration. Called once from the
+    application lifespan, in place of creating tables.
+
+    This is a single query against `alembic_version`, so startup no longer inspects or
+    creates every table. With DB_AUTO_MIGRATE set, pending migrations are applied instead.
+
+    Raises:
+        RuntimeError: If the database is behind (or ahead of) the migrations.
+    """
+    if DB_AUTO_MIGRATE:
+        await upgrade_database()
+        return
+
+    heads = _expected_heads()
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_current_revisions)
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at revision {', '.join(sorted(current)) or 'none'}, expected "
+            f"{', '.join(sorted(heads))}. Run `alembic upgrade head`; a database created by the first "
+            "release with create_all needs `alembic stamp 0001` first."
+        )
+    logger.debug("Database schema is at revision %s", ", ".join(sorted(heads)))
@@ -0,0 +1,55 @@
+from pydantic import BaseModel # type: ignore
+from datetime import date
+from enum import Enum
+from typing import Optional, Union
+
+class SalesGroupBy(str, Enum):
+    """
+    Enumeration for the ways seller sales can be grouped.
+    Enum Values:
+    - day: One bucket per UTC day the orders were placed on.
+    - product: One bucket per product.
+    - status: One bucket per order status.
+    """
+    day = "day"
+    product = "product"
+    status = "status"
+
+
+class SalesTotals(BaseModel):
+    """
+    Schema for aggregated sales figures.
+    Fields:
+    - orders: The number of orders.
+    - units: The number of items ordered.
+    - revenue: The value of the orders, at the price each was placed at.
+    """
+    orders: int = 0
+    units: int = 0
+    revenue: float = 0.0
+
+
+class SalesBucket(SalesTotals):
+    """
+    Schema for the sales figures of one group.
+    Fields:
+    - key: The day (YYYY-MM-DD), product ID or status the figures are for.
+    """
+    key: Union[date, int, str]
+
+
+class SellerAnalytics(BaseModel):
+    """
+    Schema for a seller's sales analytics.
+    Fields:
+    - group_by: How the buckets are grouped.
+    - date_from: The first day included, if the range is bounded.
+    - date_to: The first day excluded, if the range is bounded.
+    - totals: The figures summed over every bucket.
+    - buckets: The figures per group, ordered by key.
+    """
+    group_by: SalesGroupBy
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    totals: SalesTotals
+    buckets: list[SalesBucket]
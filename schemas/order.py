@@ -1,5 +1,6 @@
-from pydantic import BaseModel # type: ignore
+from pydantic import BaseModel, Field # type: ignore
 from typing import Optional
+from datetime import datetime
 from enum import Enum
 
 class OrderCreate(BaseModel):
@@ -23,6 +24,28 @@ class OrderCreate(BaseModel):
         orm_mode = True
 
 
+class OrderItem(BaseModel):
+    """
+    Schema for one line of a cart checkout.
+    Fields:
+    - product_id: The ID of the product being ordered.
+    - quantity: The number of items being ordered, at least 1.
+    """
+    product_id: int
+    quantity: int = Field(gt=0)
+
+
+class OrderBatchCreate(BaseModel):
+    """
+    Schema for checking out a cart of several products at once.
+    Fields:
+    - customer_id: The ID of the customer placing the orders.
+    - items: The cart lines, between 1 and 100 of them.
+    """
+    customer_id: int
+    items: list[OrderItem] = Field(min_length=1, max_length=100)
+
+
 class OrderResponse(BaseModel):
     """
     Schema for order responses, used to return order details.
@@ -44,6 +67,83 @@ class OrderResponse(BaseModel):
         orm_mode = True
 
 
+class OrderProductSummary(BaseModel):
+    """
+    Schema for the product details embedded in an order.
+    Fields:
+    - id: The unique identifier of the product.
+    - name: The name of the product.
+    - price: The current price of the product.
+
+    Configuration:
+    - orm_mode: Enables compatibility with SQLAlchemy ORM objects.
+    """
+    id: int
+    name: str
+    price: float
+
+    class Config:
+        orm_mode = True
+
+
+class OrderSellerSummary(BaseModel):
+    """
+    Schema for the seller details embedded in an order.
+    Fields:
+    - id: The unique identifier of the seller.
+    - store_name: The name of the seller's store.
+
+    Configuration:
+    - orm_mode: Enables compatibility with SQLAlchemy ORM objects.
+    """
+    id: int
+    store_name: str
+
+    class Config:
+        orm_mode = True
+
+
+class OrderDetailResponse(OrderResponse):
+    """
+    Schema for order history entries, with the product and seller details clients
+    would otherwise fetch one order at a time.
+    Fields:
+    - All fields from OrderResponse.
+    - created_at: When the order was placed.
+    - product: Name and price of the ordered product, or None if it has been deleted.
+    - seller: Store name of the seller.
+    """
+    created_at: datetime
+    product: Optional[OrderProductSummary] = None
+    seller: Optional[OrderSellerSummary] = None
+
+
+class OrderHistoryPage(BaseModel):
+    """
+    Schema for one page of order history, newest first.
+    Fields:
+    - items: The orders on this page.
+    - next_cursor: Opaque cursor to pass back for the next page, or None on the last page.
+    """
+    items: list[OrderDetailResponse]
+    next_cursor: Optional[str] = None
+
+
+class CheckoutResponse(BaseModel):
+    """
+    Schema for the result of a wallet-funded checkout.
+    Fields:
+    - order: The order that was placed.
+    - amount_charged: The amount debited from the wallet.
+    - balance: The wallet balance after the charge.
+    - transaction_id: The ID of the wallet ledger entry for the charge.
+    """
+    order: OrderResponse
+    amount_charged: int
+    balance: int
+    transaction_id: int
+
+
 class OrderStatus(str, Enum):
     """
     Enumeration for order status values.
@@ -66,4 +166,77 @@ class OrderUpdateStatus(BaseModel):
     Fields:
     - status: The new status of the order, selected from the OrderStatus enumeration.
     """
-    status: OrderStatus
\ No newline at end of file
+    status: OrderStatus
+
+# Most orders one bulk status update may change
+MAX_BULK_STATUS_ORDERS = 10000
+
+class OrderStatusFilter(BaseModel):
+    """
+    Schema for selecting a seller's orders by their attributes instead of by ID.
+    Fields:
+    - status: Only orders currently in this status.
+    - product_id: Only orders for this product.
+    - created_from: Only orders placed at or after this time.
+    - created_to: Only orders placed before this time.
+    """
+    status: Optional[OrderStatus] = None
+    product_id: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+
+class OrderBulkStatusUpdate(BaseModel):
+    """
+    Schema for moving many of a seller's orders to a new status at once.
+    Exactly one of `order_ids` and `filter` must be given.
+    Fields:
+    - status: The new status of the orders.
+    - order_ids: The IDs of the orders to update, up to 10,000.
+    - filter: Selects the orders to update instead; at most 10,000 are updated per request.
+    """
+    status: OrderStatus
+    order_ids: Optional[list[int]] = Field(None, min_length=1, max_length=MAX_BULK_STATUS_ORDERS)
+    filter: Optional[OrderStatusFilter] = None
+
+
+class OrderStatusOutcome(str, Enum):
+    """
+    Enumeration for the outcome of a bulk status update for one order.
+    Enum Values:
+    - updated: The order moved to the new status.
+    - unchanged: The order already had the new status.
+    - invalid_transition: The order's current status cannot move to the new one.
+    - not_found: No such order belongs to the seller.
+    """
+    updated = "updated"
+    unchanged = "unchanged"
+    invalid_transition = "invalid_transition"
+    not_found = "not_found"
+
+
+class OrderStatusResult(BaseModel):
+    """
+    Schema for the result of a bulk status update for one order.
+    Fields:
+    - order_id: The ID of the order.
+    - outcome: What happened to the order.
+    - status: The order's status after the update, or None if it was not found.
+    """
+    order_id: int
+    outcome: OrderStatusOutcome
+    status: Optional[str] = None
+
+
+class OrderBulkStatusResponse(BaseModel):
+    """
+    Schema for the result of a bulk status update.
+    Fields:
+    - status: The status the orders were moved to.
+    - updated: The number of orders updated.
+    - results: One entry per requested order ID, in request order, or one per updated
+      order when selecting by filter.
+    """
+    status: OrderStatus
+    updated: int
+    results: list[OrderStatusResult]
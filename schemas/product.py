@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from typing import Optional
+from enum import Enum
 
 class ProductBase(BaseModel):
     """
@@ -43,6 +44,9 @@ class ProductResponse(ProductBase):
     Fields:
     - id: The unique identifier of the product.
     - seller_id: The ID of the seller who owns the product.
+    - quantity: The total stock, including any stock shards.
+    - available: The stock that can still be ordered, i.e. `quantity` minus the units held by
+      cart reservations.
     - All fields from ProductBase are also included.
     
     Configuration:
@@ -50,6 +54,54 @@ class ProductResponse(ProductBase):
     """
     id: int
     seller_id: int
+    quantity: int = Field(validation_alias=AliasChoices("total_quantity", "quantity"))
+    available: int = Field(validation_alias=AliasChoices("available_quantity", "available"))
 
     class Config:
         orm_mode = True
+
+
+class ProductSort(str, Enum):
+    """
+    Enumeration for the sort orders supported by the product catalog.
+    Enum Values:
+    - id: Products in creation order.
+    - price: Products from cheapest to most expensive, ties broken by ID.
+    """
+    id = "id"
+    price = "price"
+
+class ProductPage(BaseModel):
+    """
+    Schema for one page of the product catalog.
+    Fields:
+    - items: The products on this page.
+    - next_cursor: Opaque cursor to pass back for the next page, or None on the last page.
+    """
+    items: list[ProductResponse]
+    next_cursor: Optional[str] = None
+
+
+class BulkFormat(str, Enum):
+    """
+    Enumeration for the file formats supported by bulk product import and export.
+    Enum Values:
+    - csv: Comma-separated values with a header row.
+    - ndjson: One JSON object per line.
+    """
+    csv = "csv"
+    ndjson = "ndjson"
+
+class ProductImportResult(BaseModel):
+    """
+    Schema for the outcome of a bulk product import.
+    Fields:
+    - imported: The number of products created.
+    - updated: The number of existing products updated, matched by ID.
+    - failed: The number of rows that failed validation or named an unknown product.
+    - errors: Row numbers and errors for the first failed rows.
+    """
+    imported: int
+    updated: int
+    failed: int
+    errors: list[dict]
@@ -0,0 +1,22 @@
+from pydantic import BaseModel # type: ignore
+from datetime import datetime
+
+class HoldResponse(BaseModel):
+    """
+    Schema for a stock hold.
+    Fields:
+    - id: The unique identifier of the hold, used to commit or release it.
+    - product_id: The ID of the held product.
+    - quantity: The number of units held.
+    - expires_at: When the hold lapses and its units become available again (UTC).
+
+    Configuration:
+    - orm_mode: Enables compatibility with SQLAlchemy ORM objects.
+    """
+    id: int
+    product_id: int
+    quantity: int
+    expires_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -1,4 +1,6 @@
 from pydantic import BaseModel # type: ignore
+from datetime import datetime
+from typing import Optional
 
 class WalletBase(BaseModel):
     """
@@ -29,3 +31,36 @@ class WalletResponse(WalletBase):
 
     class Config:
         orm_mode = True
+
+
+class WalletTransactionResponse(BaseModel):
+    """
+    Schema for one wallet ledger entry.
+    Fields:
+    - id: The unique identifier of the entry.
+    - amount: The balance change; positive for credits, negative for debits.
+    - balance_after: The wallet balance right after this change.
+    - idempotency_key: The client-supplied key for the request, if any.
+    - created_at: When the change was made.
+
+    Configuration:
+    - orm_mode: Ensures compatibility with SQLAlchemy models.
+    """
+    id: int
+    amount: int
+    balance_after: int
+    idempotency_key: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class WalletTransactionPage(BaseModel):
+    """
+    Schema for one page of wallet ledger entries, newest first.
+    Fields:
+    - items: The ledger entries on this page.
+    - next_cursor: Opaque cursor to pass back for the next page, or None on the last page.
+    """
+    items: list[WalletTransactionResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,40 @@
+import json
+import os
+from datetime import date, datetime
+from fastapi.responses import Response
+
+try:
+    import orjson  # Optional dependency; the standard library encoder is used without it
+except ImportError:
+    orjson = None
+
+# Opt-in fast path for list endpoints: responses are built from plain column rows and
+# encoded directly, skipping ORM hydration and per-object Pydantic validation.
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """
+    Encode `content` as compact UTF-8 JSON, with orjson when it is installed.
+    Datetimes are written in ISO 8601, matching Pydantic's output.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded with `dumps`. Used as the application's default response class
+    when FAST_JSON is enabled, and returned directly by the row-based list endpoints.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,79 @@
+import itertools
+import os
+import tempfile
+
+# The application reads its settings at import time, so the test database, fast password
+# hashing and metrics are configured before anything from the application is imported
+TEST_DB_DIR = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}")
+os.environ.setdefault("DB_AUTO_MIGRATE", "true")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("METRICS_ENABLED", "true")
+
+import httpx
+import pytest
+from main import app, lifespan
+
+_unique = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def client(anyio_backend):
+    """
+    An HTTP client for the application, with the schema migrated and the background jobs
+    running. Shared by the whole session, so tests create their own sellers and customers.
+    """
+    async with lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+
+@pytest.fixture
+async def seller(client):
+    """
+    A new seller, as a dict with its `id` and access `token`.
+    """
+    return await create_seller(client)
+
+
+@pytest.fixture
+async def customer(client):
+    """
+    A new customer with an empty wallet, as a dict with its `id` and access `token`.
+    """
+    email = f"customer{next(_unique)}@example.com"
+    response = await client.post("/register/", json={"name": "Customer", "email": email, "password": "secret"})
+    assert response.status_code == 200, response.text
+    login = await client.post("/login/", json={"email": email, "password": "secret"})
+    token = login.json()["access_token"]
+    assert (await client.post("/wallet/create/", params={"token": token})).status_code == 200
+    return {"id": response.json()["id"], "token": token}
+
+
+async def create_product(client, seller, quantity: int = 10, price: float = 10) -> int:
+    response = await client.post(
+        "/products/",
+        params={"token": seller["token"]},
+        json={"name": "Product", "description": "A product", "price": price, "quantity": quantity},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def create_seller(client) -> dict:
+    email = f"seller{next(_unique)}@example.com"
+    response = await client.post(
+        "/sellers/", json={
+            "name": "Seller", "email": email, "store_name": "Store", "business_location": "Berlin", "niche": "Books",
+            "password": "secret",
+        }
+    )
+    assert response.status_code == 200, response.text
+    login = await client.post("/sellers/login", params={"email": email, "password": "secret"})
+    return {"id": response.json()["id"], "token": login.json()["access_token"]}
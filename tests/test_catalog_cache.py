@@ -0,0 +1,41 @@
+import pytest
+from cache import MemoryBackend, ResponseCache
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_detail_read_before_a_change_cannot_overwrite_it():
+    cache = ResponseCache(MemoryBackend())
+
+    # A reader looks the key up and queries the database...
+    key = await cache.object_key("product:1")
+    # ...while a writer commits a change and invalidates the product
+    await cache.invalidate("product:1")
+    # ...and only then does the reader store what it read
+    await cache.set(key, b'{"quantity": 5}')
+
+    assert await cache.get(await cache.object_key("product:1")) is None
+
+
+async def test_detail_entries_are_served_until_invalidated(client, seller):
+    product_id = await create_product(client, seller, quantity=3)
+    first = await client.get(f"/products/{product_id}")
+    assert (await client.get(f"/products/{product_id}", headers={"If-None-Match": first.headers["ETag"]})).status_code == 304
+
+    response = await client.put(f"/products/{product_id}", params={"token": seller["token"]}, json={"quantity": 7})
+    assert response.status_code == 200, response.text
+    assert (await client.get(f"/products/{product_id}")).json()["quantity"] == 7
+
+
+async def test_generation_counters_stay_bounded_without_reviving_stale_entries():
+    backend = MemoryBackend(maxsize=10)
+    cache = ResponseCache(backend)
+    key = await cache.object_key("product:1")
+    await cache.invalidate("product:1")
+    await cache.set(key, b'{"quantity": 5}')  # Read before the change, stored after it
+
+    await cache.invalidate(*[f"product:{product_id}" for product_id in range(2, 100)])
+
+    assert len(backend._counters) == 10
+    assert await cache.get(await cache.object_key("product:1")) is None
@@ -0,0 +1,23 @@
+import asyncio
+import pytest
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+STOCK = 10
+BUYERS = 40
+
+
+async def test_concurrent_orders_never_oversell(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=STOCK)
+
+    responses = await asyncio.gather(*[
+        client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+        for _ in range(BUYERS)
+    ])
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(200) == STOCK
+    assert statuses.count(400) == BUYERS - STOCK
+    product = (await client.get(f"/products/{product_id}")).json()
+    assert product["quantity"] == 0
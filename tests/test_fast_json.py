@@ -0,0 +1,47 @@
+import json
+import pytest
+import serialization
+from crud.order import get_order_history_page
+from crud.product import get_products_page
+from database import SessionLocal
+from schemas.order import OrderHistoryPage
+from schemas.product import ProductPage
+from serialization import dumps
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def fast_and_validated(fetch, schema):
+    """
+    One page built both ways: from plain rows encoded with `dumps`, and from ORM objects
+    validated by the response schema. Both as parsed JSON.
+    """
+    async with SessionLocal() as db:
+        rows, cursor = await fetch(db, as_dicts=True)
+        objects, object_cursor = await fetch(db, as_dicts=False)
+        page = schema.model_validate({"items": objects, "next_cursor": object_cursor}, from_attributes=True)
+    return json.loads(dumps({"items": rows, "next_cursor": cursor})), json.loads(page.model_dump_json())
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+async def test_row_path_matches_the_validated_path(client, seller, customer, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    product_ids = [await create_product(client, seller, price=price) for price in (9.5, 12)]
+    for product_id in product_ids:
+        await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+
+    async def products(db, as_dicts):
+        return await get_products_page(db, limit=1, seller_id=seller["id"], as_dicts=as_dicts)
+
+    fast, validated = await fast_and_validated(products, ProductPage)
+    assert fast == validated
+    assert fast["items"][0]["id"] == product_ids[0] and fast["next_cursor"]
+
+    async def orders(db, as_dicts):
+        return await get_order_history_page(db, customer_id=customer["id"], as_dicts=as_dicts)
+
+    fast, validated = await fast_and_validated(orders, OrderHistoryPage)
+    assert fast == validated
+    assert [order["product"]["id"] for order in fast["items"]] == product_ids[::-1]
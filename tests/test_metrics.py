@@ -0,0 +1,20 @@
+import pytest
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_metrics_endpoint_reports_requests_queries_and_caches(client, seller):
+    product_id = await create_product(client, seller)
+    assert (await client.get(f"/products/{product_id}")).status_code == 200
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    # Requests are labelled by route template, not by the product id in the path
+    assert 'http_requests_total{method="GET",route="/products/{product_id}",status="200"}' in body
+    assert f"/products/{product_id}" not in body
+    assert 'http_request_db_queries_count{method="POST",route="/products/"}' in body
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in body
+    assert 'cache_hits_total{cache="catalog"}' in body
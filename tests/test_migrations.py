@@ -0,0 +1,40 @@
+from datetime import datetime
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine
+from database import Base
+from schema import _alembic_config
+
+
+@pytest.mark.filterwarnings("error::sqlalchemy.exc.SAWarning")
+def test_first_release_database_upgrades_to_the_current_schema(tmp_path):
+    """
+    A database with the first release's schema (revision 0001) and data in it ends up, after
+    `alembic upgrade head`, with exactly the schema the models describe.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'first-release.db'}")
+    config = _alembic_config()
+    with engine.begin() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, "0001")
+        conn.exec_driver_sql("INSERT INTO sellers (name, email, password, store_name) VALUES ('s', 's@x', 'p', 'Store')")
+        conn.exec_driver_sql("INSERT INTO customers (name, email) VALUES ('c', 'c@x')")
+        conn.exec_driver_sql(
+            "INSERT INTO products (name, description, price, quantity, seller_id) VALUES ('Red shoe', 'Leather', 5, 3, 1)"
+        )
+        # created_at takes the first release's CURRENT_TIMESTAMP default
+        conn.exec_driver_sql("INSERT INTO orders (product_id, seller_id, customer_id, quantity, status) VALUES (1, 1, 1, 1, 'pending')")
+
+        command.upgrade(config, "head")
+
+        differences = [
+            difference for difference in compare_metadata(MigrationContext.configure(conn), Base.metadata)
+            if "products_fts" not in str(difference)
+        ]
+        assert differences == []
+        created_at = conn.exec_driver_sql("SELECT created_at FROM orders").scalar()
+        assert datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S.%f")
+        assert conn.exec_driver_sql("SELECT rowid FROM products_fts WHERE products_fts MATCH 'shoe'").all() == [(1,)]
+    engine.dispose()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from crud.archive import archive_orders
+from database import SessionLocal
+from models.order import ArchivedOrder, Order
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def place_order(client, seller, customer, product_id: int, status: str, age_days: int) -> int:
+    response = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+    order_id = response.json()["id"]
+    # Orders are delivered after being shipped
+    for step in {"pending": [], "canceled": ["canceled"], "delivered": ["shipped", "delivered"]}[status]:
+        response = await client.put(f"/order/{order_id}/status", params={"token": seller["token"]}, json={"status": step})
+        assert response.status_code == 200, response.text
+    async with SessionLocal() as db:
+        created_at = datetime.utcnow() - timedelta(days=age_days)
+        await db.execute(update(Order).where(Order.id == order_id).values(created_at=created_at))
+        await db.commit()
+    return order_id
+
+
+async def test_archives_old_final_orders_only(client, seller, customer):
+    product_id = await create_product(client, seller)
+    delivered, canceled, pending, recent = [
+        await place_order(client, seller, customer, product_id, status, age_days)
+        for status, age_days in (("delivered", 100), ("canceled", 100), ("pending", 100), ("delivered", 1))
+    ]
+
+    # One order per transaction, to go through several batches
+    assert await archive_orders(older_than_days=30, batch_size=1) >= 2
+
+    async with SessionLocal() as db:
+        for order_id in (delivered, canceled):
+            assert await db.get(Order, order_id) is None
+            archived = await db.get(ArchivedOrder, order_id)
+            assert archived.product_id == product_id and archived.customer_id == customer["id"]
+        for order_id in (pending, recent):
+            assert await db.get(Order, order_id) is not None
+            assert await db.get(ArchivedOrder, order_id) is None
+
+    # Archived orders can still be looked up
+    response = await client.get(f"/order/{delivered}/")
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "delivered"
+
+
+async def test_archiving_is_off_without_a_retention_period(client, seller, customer):
+    product_id = await create_product(client, seller)
+    order_id = await place_order(client, seller, customer, product_id, "delivered", 100)
+
+    assert await archive_orders(older_than_days=0) == 0
+
+    async with SessionLocal() as db:
+        assert await db.get(Order, order_id) is not None
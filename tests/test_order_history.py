@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime
+import pytest
+from sqlalchemy import event, update
+from database import SessionLocal, engine
+from models.order import Order
+from tests.conftest import create_product, create_seller
+
+pytestmark = pytest.mark.anyio
+
+
+@contextmanager
+def count_statements():
+    """
+    Counts the SQL statements the application sends to the database inside the block.
+    Only the current task's statements count, not those of the background jobs.
+    """
+    statements = []
+    task = asyncio.current_task()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if asyncio.current_task() is task:
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def history_statements(client, customer) -> int:
+    params = {"token": customer["token"], "limit": 50}
+    # Warm the principal cache, so only the listing itself is counted
+    assert (await client.get("/customer/orders", params=params)).status_code == 200
+    with count_statements() as statements:
+        response = await client.get("/customer/orders", params=params)
+    assert response.status_code == 200, response.text
+    assert all(item["product"] and item["seller"] for item in response.json()["items"])
+    return len(statements)
+
+
+async def test_order_history_statement_count_does_not_grow_with_orders(client, customer):
+    counts = []
+    for _ in range(2):
+        # Each order has its own product and seller, so per-order lazy loads would show up
+        for _ in range(3):
+            product_id = await create_product(client, await create_seller(client))
+            response = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+            assert response.status_code == 200, response.text
+        counts.append(await history_statements(client, customer))
+
+    assert counts[0] == counts[1]
+
+
+async def set_created_at(order_id: int, created_at: datetime):
+    async with SessionLocal() as db:
+        await db.execute(update(Order).where(Order.id == order_id).values(created_at=created_at))
+        await db.commit()
+
+
+async def history(client, path: str, principal, **params) -> list[dict]:
+    """
+    Follows `next_cursor` through a history endpoint, returning every order seen.
+    """
+    orders, cursor = [], None
+    while True:
+        query = {"token": principal["token"], **params, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(path, params=query)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        orders.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return orders
+
+
+async def test_seller_history_pages_newest_first_with_filters(client, seller, customer):
+    product_id = await create_product(client, seller)
+    # An order for another seller, which must not show up
+    other_product_id = await create_product(client, await create_seller(client))
+    await client.post("/create/", json={"product_id": other_product_id, "customer_id": customer["id"], "quantity": 1})
+    order_ids = []
+    for day in (3, 1, 2, 4):
+        response = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+        order_ids.append(response.json()["id"])
+        await set_created_at(order_ids[-1], datetime(2024, 5, day, 12))
+    await client.put(f"/order/{order_ids[0]}/status", params={"token": seller["token"]}, json={"status": "shipped"})
+
+    orders = await history(client, "/sellers/seller/orders", seller, limit=2)
+    # Created on May 4, 3, 2 and 1
+    assert [order["id"] for order in orders] == [order_ids[3], order_ids[0], order_ids[2], order_ids[1]]
+
+    orders = await history(client, "/sellers/seller/orders", seller, status="shipped")
+    assert [order["id"] for order in orders] == [order_ids[0]]
+    orders = await history(
+        client, "/sellers/seller/orders", seller, limit=1, created_from="2024-05-02T00:00:00", created_to="2024-05-04T00:00:00"
+    )
+    assert [order["id"] for order in orders] == [order_ids[0], order_ids[2]]
+
+
+async def test_customer_history_only_lists_the_customers_orders(client, seller, customer):
+    product_id = await create_product(client, seller)
+    other = await client.post("/register/", json={"name": "Other", "email": "history-other@example.com", "password": "secret"})
+    await client.post("/create/", json={"product_id": product_id, "customer_id": other.json()["id"], "quantity": 1})
+    response = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+
+    orders = await history(client, "/customer/orders", customer)
+    assert [order["id"] for order in orders] == [response.json()["id"]]
+    assert orders[0]["product"]["id"] == product_id
@@ -0,0 +1,68 @@
+import pytest
+from tests.conftest import create_product, create_seller
+
+pytestmark = pytest.mark.anyio
+
+
+async def place_order(client, product_id: int, customer) -> int:
+    response = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def set_status(client, seller, order_id: int, status: str):
+    return await client.put(f"/order/{order_id}/status", params={"token": seller["token"]}, json={"status": status})
+
+
+async def test_single_order_follows_the_allowed_transitions(client, seller, customer):
+    order_id = await place_order(client, await create_product(client, seller), customer)
+
+    assert (await set_status(client, seller, order_id, "shipped")).status_code == 200
+    assert (await set_status(client, seller, order_id, "delivered")).status_code == 200
+    response = await set_status(client, seller, order_id, "pending")
+
+    assert response.status_code == 409, response.text
+    order = await client.get(f"/order/{order_id}/")
+    assert order.json()["status"] == "delivered"
+
+
+async def test_single_order_rejects_the_same_move_as_the_bulk_endpoint(client, seller, customer):
+    product_id = await create_product(client, seller)
+    single, bulk = [await place_order(client, product_id, customer) for _ in range(2)]
+    for order_id in (single, bulk):
+        await set_status(client, seller, order_id, "canceled")
+
+    bulk_response = await client.put(
+        "/orders/status", params={"token": seller["token"]}, json={"status": "shipped", "order_ids": [bulk]}
+    )
+    single_response = await set_status(client, seller, single, "shipped")
+
+    assert bulk_response.json()["results"][0]["outcome"] == "invalid_transition"
+    assert single_response.status_code == 409
+
+
+async def test_single_order_checks_ownership(client, seller, customer):
+    order_id = await place_order(client, await create_product(client, seller), customer)
+    other_seller = await create_seller(client)
+
+    assert (await set_status(client, other_seller, order_id, "shipped")).status_code == 403
+    assert (await set_status(client, seller, 10 ** 9, "shipped")).status_code == 404
+    assert (await set_status(client, seller, order_id, "pending")).status_code == 200
+
+
+@pytest.mark.parametrize("path, rejected", [
+    # Moves the single-order endpoint accepted before the transition rules and still accepts
+    (["processing", "shipped", "delivered"], None),
+    (["shipped", "delivered"], None),
+    (["processing", "canceled"], None),
+    # Moves it used to accept and now rejects with 409
+    (["delivered"], "delivered"),
+    (["shipped", "canceled"], "canceled"),
+    (["canceled", "processing"], "processing"),
+])
+async def test_single_order_contract(client, seller, customer, path, rejected):
+    order_id = await place_order(client, await create_product(client, seller), customer)
+
+    for status in path:
+        response = await set_status(client, seller, order_id, status)
+        assert response.status_code == (409 if status == rejected else 200), response.text
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+import anyio
+import pytest
+from sqlalchemy import func, select, update
+from crud import outbox
+from crud.outbox import add_events, dispatch_outbox
+from database import SessionLocal
+from models.outbox import DeadLetterEvent, OutboxEvent
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_event(topic: str, payload: dict) -> int:
+    async with SessionLocal() as db:
+        await add_events(db, topic, [payload])
+        await db.commit()
+        return await db.scalar(select(func.max(OutboxEvent.id)).where(OutboxEvent.topic == topic))
+
+
+async def wait_for(check):
+    """
+    Dispatches the outbox until `check()` returns something. The background dispatcher may
+    get to the event first, so the outcome is checked rather than who delivered it.
+    """
+    with anyio.fail_after(5):
+        while True:
+            await dispatch_outbox()
+            async with SessionLocal() as db:
+                result = await check(db)
+            if result:
+                return result
+            await anyio.sleep(0.05)
+
+
+async def make_due(event_id: int):
+    async with SessionLocal() as db:
+        await db.execute(update(OutboxEvent).where(OutboxEvent.id == event_id).values(available_at=datetime.utcnow()))
+        await db.commit()
+
+
+async def test_failed_delivery_is_retried_after_a_backoff(client, monkeypatch):
+    topic = "test.retry"
+    calls = []
+
+    async def flaky(event):
+        calls.append(event.id)
+        if len(calls) == 1:
+            raise RuntimeError("handler down")
+
+    monkeypatch.setitem(outbox._handlers, topic, [flaky])
+    before = datetime.utcnow()
+    event_id = await add_event(topic, {"n": 1})
+
+    async def failed_once(db):
+        event = await db.get(OutboxEvent, event_id)
+        return event if event is not None and event.last_error else None
+
+    event = await wait_for(failed_once)
+    assert event.attempts == 1
+    assert event.last_error == "RuntimeError: handler down"
+    assert event.available_at >= before + timedelta(seconds=outbox.OUTBOX_BACKOFF_SECONDS)
+
+    await make_due(event_id)
+
+    async def delivered(db):
+        return await db.get(OutboxEvent, event_id) is None
+
+    await wait_for(delivered)
+    assert calls == [event_id, event_id]
+    async with SessionLocal() as db:
+        assert await db.get(DeadLetterEvent, event_id) is None
+
+
+async def test_event_out_of_attempts_moves_to_the_dead_letter_table(client, monkeypatch):
+    topic = "test.dead-letter"
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+
+    async def broken(event):
+        raise ValueError(f"cannot handle {event.payload['n']}")
+
+    monkeypatch.setitem(outbox._handlers, topic, [broken])
+    event_id = await add_event(topic, {"n": 7})
+
+    async def failed_once(db):
+        event = await db.get(OutboxEvent, event_id)
+        return event is not None and event.attempts == 1 and event.last_error
+
+    await wait_for(failed_once)
+    await make_due(event_id)
+
+    async def dead(db):
+        return await db.get(DeadLetterEvent, event_id)
+
+    dead_letter = await wait_for(dead)
+    assert dead_letter.topic == topic
+    assert dead_letter.payload == {"n": 7}
+    assert dead_letter.attempts == 2
+    assert dead_letter.last_error == "ValueError: cannot handle 7"
+    async with SessionLocal() as db:
+        assert await db.get(OutboxEvent, event_id) is None
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_BACKOFF_SECONDS", 1)
+    monkeypatch.setattr(outbox, "OUTBOX_BACKOFF_MAX_SECONDS", 5)
+
+    assert [outbox._backoff(attempts).total_seconds() for attempts in range(1, 6)] == [1, 2, 4, 5, 5]
@@ -0,0 +1,63 @@
+import pytest
+from passlib.context import CryptContext  # type: ignore
+from database import SessionLocal
+from models.customer import Customer
+from models.seller import Seller
+from passwords import BCRYPT_ROUNDS
+
+pytestmark = pytest.mark.anyio
+
+# A hash from before the cost factor was changed
+OUTDATED_HASH = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS + 1).hash("secret")
+
+
+def rounds(hashed_password: str) -> int:
+    return int(hashed_password.split("$")[2])
+
+
+async def set_password_hash(model, principal_id: int, hashed_password: str):
+    async with SessionLocal() as db:
+        (await db.get(model, principal_id)).password = hashed_password
+        await db.commit()
+
+
+async def stored_password_hash(model, principal_id: int) -> str:
+    async with SessionLocal() as db:
+        return (await db.get(model, principal_id)).password
+
+
+async def test_seller_login_rehashes_an_outdated_password_hash(client):
+    email = "rehash-seller@example.com"
+    response = await client.post(
+        "/sellers/", json={
+            "name": "Seller", "email": email, "store_name": "Store", "business_location": "Berlin", "niche": "Books",
+            "password": "secret",
+        }
+    )
+    seller_id = response.json()["id"]
+    await set_password_hash(Seller, seller_id, OUTDATED_HASH)
+
+    login = await client.post("/sellers/login", params={"email": email, "password": "secret"})
+    assert login.status_code == 200, login.text
+    rehashed = await stored_password_hash(Seller, seller_id)
+    assert rounds(rehashed) == BCRYPT_ROUNDS
+
+    # The new hash still accepts the password, and is not replaced again
+    login = await client.post("/sellers/login", params={"email": email, "password": "secret"})
+    assert login.status_code == 200, login.text
+    assert await stored_password_hash(Seller, seller_id) == rehashed
+
+
+async def test_customer_login_rehashes_an_outdated_password_hash(client):
+    email = "rehash-customer@example.com"
+    response = await client.post("/register/", json={"name": "Customer", "email": email, "password": "secret"})
+    customer_id = response.json()["id"]
+    await set_password_hash(Customer, customer_id, OUTDATED_HASH)
+
+    wrong = await client.post("/login/", json={"email": email, "password": "wrong"})
+    assert wrong.status_code == 401
+    assert await stored_password_hash(Customer, customer_id) == OUTDATED_HASH
+
+    login = await client.post("/login/", json={"email": email, "password": "secret"})
+    assert login.status_code == 200, login.text
+    assert rounds(await stored_password_hash(Customer, customer_id)) == BCRYPT_ROUNDS
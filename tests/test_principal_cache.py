@@ -0,0 +1,59 @@
+import pytest
+from authentication import principal_cache
+from database import SessionLocal
+from models.customer import Customer
+from models.seller import Seller
+from tests.conftest import create_seller
+
+pytestmark = pytest.mark.anyio
+
+
+async def seller_profile(client, seller) -> dict:
+    response = await client.get("/sellers/me", params={"token": seller["token"]})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_updating_a_seller_drops_the_cached_principal(client, seller):
+    await seller_profile(client, seller)
+    hits = principal_cache.hits
+    assert (await seller_profile(client, seller))["store_name"] == "Store"
+    assert principal_cache.hits == hits + 1
+
+    async with SessionLocal() as db:
+        db_seller = await db.get(Seller, seller["id"])
+        db_seller.store_name = "Renamed store"
+        db_seller.email = f"renamed-{db_seller.email}"
+        await db.commit()
+
+    profile = await seller_profile(client, seller)
+    assert profile["store_name"] == "Renamed store"
+    assert profile["email"].startswith("renamed-")
+
+
+async def test_deleting_a_seller_rejects_its_token(client):
+    seller = await create_seller(client)
+    await seller_profile(client, seller)
+
+    async with SessionLocal() as db:
+        await db.delete(await db.get(Seller, seller["id"]))
+        await db.commit()
+
+    response = await client.get("/sellers/me", params={"token": seller["token"]})
+    assert response.status_code == 401
+
+
+async def test_deleting_a_customer_rejects_its_token(client):
+    email = "principal-cache-delete@example.com"
+    response = await client.post("/register/", json={"name": "Customer", "email": email, "password": "secret"})
+    customer_id = response.json()["id"]
+    token = (await client.post("/login/", json={"email": email, "password": "secret"})).json()["access_token"]
+    # Authenticated, with no orders yet
+    assert (await client.get("/customer/orders", params={"token": token})).status_code == 404
+
+    async with SessionLocal() as db:
+        await db.delete(await db.get(Customer, customer_id))
+        await db.commit()
+
+    assert (await client.get("/customer/orders", params={"token": token})).status_code == 401
+
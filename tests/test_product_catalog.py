@@ -0,0 +1,61 @@
+import pytest
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def walk(client, **params) -> list[dict]:
+    """
+    Follows `next_cursor` from the first page to the last, returning every product seen.
+    """
+    products, cursor = [], None
+    while True:
+        response = await client.get("/products/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= params.get("limit", 50)
+        products.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return products
+
+
+async def test_pages_cover_the_catalog_once_in_id_order(client, seller):
+    ids = [await create_product(client, seller) for _ in range(5)]
+
+    products = await walk(client, seller_id=seller["id"], limit=2)
+
+    assert [product["id"] for product in products] == ids
+
+
+async def test_price_order_breaks_ties_by_id_across_pages(client, seller):
+    cheap = [await create_product(client, seller, price=5) for _ in range(3)]
+    expensive = await create_product(client, seller, price=20)
+    cheapest = await create_product(client, seller, price=1)
+
+    products = await walk(client, seller_id=seller["id"], sort="price", limit=2)
+
+    assert [product["id"] for product in products] == [cheapest, *cheap, expensive]
+
+
+async def test_filters_by_price_range_and_stock(client, seller):
+    in_range = await create_product(client, seller, price=15)
+    await create_product(client, seller, price=30)
+    sold_out = await create_product(client, seller, price=15, quantity=0)
+
+    products = await walk(client, seller_id=seller["id"], min_price=10, max_price=20)
+    assert [product["id"] for product in products] == [in_range, sold_out]
+
+    products = await walk(client, seller_id=seller["id"], min_price=10, max_price=20, in_stock=True)
+    assert [product["id"] for product in products] == [in_range]
+
+
+async def test_rejects_a_cursor_from_another_sort_order(client, seller):
+    for _ in range(2):
+        await create_product(client, seller)
+    page = (await client.get("/products/", params={"seller_id": seller["id"], "limit": 1})).json()
+
+    response = await client.get("/products/", params={"cursor": page["next_cursor"], "sort": "price"})
+    assert response.status_code == 400
+    response = await client.get("/products/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
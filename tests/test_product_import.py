@@ -0,0 +1,77 @@
+import json
+import pytest
+from fastapi import HTTPException
+from crud.product import import_products
+from database import SessionLocal
+from tests.conftest import create_product, create_seller
+
+pytestmark = pytest.mark.anyio
+
+
+async def import_catalog(client, seller, body: str, **params):
+    return await client.post(
+        "/products/import", params={"token": seller["token"], **params}, content=body.encode()
+    )
+
+
+async def seller_products(client, seller) -> list[dict]:
+    response = await client.get("/products/", params={"seller_id": seller["id"], "limit": 200})
+    return response.json()["items"]
+
+
+async def test_reimporting_an_export_updates_instead_of_duplicating(client, seller):
+    for quantity in (1, 2, 3):
+        await create_product(client, seller, quantity=quantity)
+    export = (await client.get("/products/export", params={"token": seller["token"]})).text
+    header, first, *rest = export.strip().split("\r\n")
+    # Edit the first product's price in the exported file
+    fields = first.split(",")
+    fields[3] = "42.5"
+    edited = "\r\n".join([header, ",".join(fields), *rest])
+
+    response = await import_catalog(client, seller, edited, chunk_size=2)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"imported": 0, "updated": 3, "failed": 0, "errors": []}
+    products = await seller_products(client, seller)
+    assert [(product["price"], product["quantity"]) for product in products] == [(42.5, 1), (10.0, 2), (10.0, 3)]
+
+
+async def test_import_rejects_ids_of_other_sellers_products(client, seller):
+    other_product = await create_product(client, await create_seller(client))
+    body = "\n".join(json.dumps(row) for row in [
+        {"id": other_product, "name": "Taken", "price": 1, "quantity": 1},
+        {"name": "New", "price": 2, "quantity": 2},
+    ])
+
+    response = await import_catalog(client, seller, body, format="ndjson")
+
+    assert response.json()["imported"] == 1
+    assert response.json()["failed"] == 1
+    assert response.json()["errors"] == [{"row": 1, "errors": f"Product {other_product} not found"}]
+
+
+async def test_import_spreads_new_stock_over_shards(client, seller):
+    product_id = await create_product(client, seller, quantity=4)
+    await client.put(f"/products/{product_id}/stock-shards", params={"token": seller["token"], "shards": 2})
+
+    response = await import_catalog(client, seller, json.dumps({"id": product_id, "name": "P", "price": 10, "quantity": 9}), format="ndjson")
+
+    assert response.json()["updated"] == 1
+    product = (await client.get(f"/products/{product_id}")).json()
+    assert (product["quantity"], product["available"]) == (9, 9)
+
+
+async def test_import_stopping_part_way_reports_the_committed_rows(client, seller):
+    async def upload():
+        yield b'{"name": "A", "price": 1, "quantity": 1}\n'
+        yield b'{"name": "B", "price": 1, "quantity": 1}\n'
+        raise ConnectionError("client went away")
+
+    async with SessionLocal() as db:
+        with pytest.raises(HTTPException) as raised:
+            await import_products(db, seller["id"], upload(), format="ndjson", chunk_size=1)
+
+    assert raised.value.status_code == 500
+    assert (raised.value.detail["imported"], raised.value.detail["updated"]) == (2, 0)
+    assert len(await seller_products(client, seller)) == 2
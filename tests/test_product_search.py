@@ -0,0 +1,45 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_product(client, seller, name: str, description: str) -> int:
+    response = await client.post(
+        "/products/",
+        params={"token": seller["token"]},
+        json={"name": name, "description": description, "price": 10, "quantity": 1},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def search(client, q: str) -> list[int]:
+    response = await client.get("/products/search", params={"q": q})
+    assert response.status_code == 200, response.text
+    return [product["id"] for product in response.json()]
+
+
+async def test_last_word_matches_as_a_prefix(client, seller):
+    shoe = await add_product(client, seller, "Red zorblax shoe", "Leather")
+    await add_product(client, seller, "Blue zorblax shirt", "Cotton")
+
+    assert await search(client, "zorb") != []
+    assert shoe in await search(client, "zorblax sho")
+    assert await search(client, "red zorblax sho") == [shoe]
+    # Only the last word is a prefix
+    assert await search(client, "zorb shoe") == []
+
+
+async def test_name_matches_rank_above_description_matches(client, seller):
+    in_description = await add_product(client, seller, "Plain mug", "A mug with a quuxle print")
+    in_name = await add_product(client, seller, "Quuxle mug", "A plain mug")
+
+    assert await search(client, "quuxle") == [in_name, in_description]
+    assert await search(client, "quux") == [in_name, in_description]
+
+
+async def test_punctuation_and_operators_are_ignored(client, seller):
+    product = await add_product(client, seller, "Frobnitz lamp", "Desk lamp")
+
+    assert await search(client, '"frobnitz" *lam') == [product]
+    assert await search(client, "!!!") == []
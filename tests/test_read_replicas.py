@@ -0,0 +1,66 @@
+import sqlite3
+import pytest
+import replicas
+from database import engine
+from replicas import ReplicaSet, recent_writers
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def replica(client, tmp_path, monkeypatch):
+    """
+    A read replica in a second SQLite file. It only changes when `sync` copies the primary
+    over it, so between syncs it lags behind like a real replica.
+    """
+    path = tmp_path / "replica.db"
+    replica_set = ReplicaSet([f"sqlite+aiosqlite:///{path}"])
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+
+    async def sync():
+        await replica_set.dispose()
+        source, target = sqlite3.connect(engine.url.database), sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        target.close()
+
+    await sync()
+    yield replica_set.replicas[0], sync
+    await replica_set.dispose()
+    recent_writers.clear()
+
+
+async def test_history_reads_go_to_the_replica_except_after_own_writes(client, seller, customer, replica):
+    replica_db, sync = replica
+    product_id = await create_product(client, seller, quantity=5)
+    await sync()
+
+    order = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+    assert order.status_code == 200, order.text
+
+    async def history_status():
+        return (await client.get("/customer/orders", params={"token": customer["token"]})).status_code
+
+    # The customer just wrote, so they read their order from the primary
+    assert await history_status() == 200
+    # Otherwise the replica serves the read; it has not seen the order yet
+    recent_writers.clear()
+    assert await history_status() == 404
+    # An unhealthy replica is skipped
+    replica_db.healthy = False
+    assert await history_status() == 200
+
+
+async def test_lagging_replica_cannot_refill_the_catalog_cache(client, seller, replica):
+    _, sync = replica
+    product_id = await create_product(client, seller, quantity=5)
+    await sync()
+    assert (await client.get(f"/products/{product_id}")).json()["quantity"] == 5
+
+    response = await client.put(f"/products/{product_id}", params={"token": seller["token"]}, json={"quantity": 7})
+    assert response.status_code == 200, response.text
+
+    assert (await client.get(f"/products/{product_id}")).json()["quantity"] == 7
+    listed = (await client.get("/products/", params={"seller_id": seller["id"]})).json()["items"]
+    assert [product["quantity"] for product in listed] == [7]
@@ -0,0 +1,51 @@
+import pytest
+from crud.analytics import rebuild_sales_rollup, record_orders
+from database import SessionLocal
+from models.order import Order
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def analytics(client, seller, **params):
+    response = await client.get("/sellers/analytics", params={"token": seller["token"], **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_orders_without_a_recorded_price_are_counted_alike_everywhere(client, seller, customer):
+    product_id = await create_product(client, seller, price=10)
+    async with SessionLocal() as db:
+        # An order from before prices were recorded on orders
+        order = Order(product_id=product_id, seller_id=seller["id"], customer_id=customer["id"], quantity=2,
+                      status="pending", unit_price=None)
+        db.add(order)
+        await db.flush()
+        await record_orders(db, [order])
+        await db.commit()
+    placed = await analytics(client, seller, group_by="status")
+
+    response = await client.put(f"/order/{order.id}/status", params={"token": seller["token"]}, json={"status": "processing"})
+    assert response.status_code == 200, response.text
+    changed = await analytics(client, seller, group_by="status")
+    await rebuild_sales_rollup(seller_id=seller["id"])
+    rebuilt = await analytics(client, seller, group_by="status")
+
+    assert placed["buckets"] == [{"key": "pending", "orders": 1, "units": 2, "revenue": 20.0}]
+    assert changed["buckets"] == rebuilt["buckets"] == [{"key": "processing", "orders": 1, "units": 2, "revenue": 20.0}]
+
+
+async def test_canceled_orders_are_left_out_unless_asked_for(client, seller, customer):
+    product_id = await create_product(client, seller, price=10)
+    order_ids = []
+    for quantity in (1, 3):
+        response = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": quantity})
+        order_ids.append(response.json()["id"])
+    await client.put(f"/order/{order_ids[1]}/status", params={"token": seller["token"]}, json={"status": "canceled"})
+
+    summary = await analytics(client, seller, group_by="product")
+    canceled = await analytics(client, seller, group_by="product", status="canceled")
+
+    assert summary["totals"] == {"orders": 1, "units": 1, "revenue": 10.0}
+    assert summary["buckets"] == [{"key": product_id, "orders": 1, "units": 1, "revenue": 10.0}]
+    assert canceled["totals"] == {"orders": 1, "units": 3, "revenue": 30.0}
@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.util import await_only
+from database import SQLiteWriteQueue, engine_options, tune_sqlite
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_next_writer_waits_until_the_commit_has_finished(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'queue.db'}"
+    engine = create_async_engine(url, **engine_options(url))
+    tune_sqlite(engine, url)
+    SQLiteWriteQueue().install(engine)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def no_busy_wait(dbapi_connection, connection_record):
+        # Fail at once instead of waiting, so any overlap between writers shows up as an error
+        dbapi_connection.execute("PRAGMA busy_timeout=0")
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def slow_commit(conn):
+        # A slow disk: the transaction still holds SQLite's write lock while this waits
+        await_only(asyncio.sleep(0.01))
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE counters (id INTEGER PRIMARY KEY, value INTEGER)"))
+    sessions = async_sessionmaker(engine)
+
+    async def write(value):
+        async with sessions() as db:
+            await db.execute(text("INSERT INTO counters (value) VALUES (:value)"), {"value": value})
+            await db.commit()
+
+    await asyncio.gather(*[write(value) for value in range(20)])
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("SELECT count(*) FROM counters"))).scalar() == 20
+    await engine.dispose()
@@ -0,0 +1,29 @@
+import pytest
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def listed_in_stock(client, seller) -> list[int]:
+    response = await client.get("/products/", params={"seller_id": seller["id"], "in_stock": True})
+    return [product["id"] for product in response.json()["items"]]
+
+
+async def test_held_units_are_not_available(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=2)
+
+    hold = await client.post("/holds/", params={"token": customer["token"]}, json={"product_id": product_id, "quantity": 2})
+    assert hold.status_code == 200, hold.text
+
+    product = (await client.get(f"/products/{product_id}")).json()
+    assert (product["quantity"], product["available"]) == (2, 0)
+    assert product_id not in await listed_in_stock(client, seller)
+    order = await client.post("/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": 1})
+    assert order.status_code == 400
+
+    released = await client.delete(f"/holds/{hold.json()['id']}", params={"token": customer["token"]})
+    assert released.status_code == 200, released.text
+
+    product = (await client.get(f"/products/{product_id}")).json()
+    assert (product["quantity"], product["available"]) == (2, 2)
+    assert product_id in await listed_in_stock(client, seller)
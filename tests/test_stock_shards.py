@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from database import SessionLocal
+from models.product import Product, ProductStockShard
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def shard_stock(client, seller, product_id: int, shards: int) -> dict:
+    response = await client.put(
+        f"/products/{product_id}/stock-shards", params={"token": seller["token"], "shards": shards}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def stock(client, product_id: int) -> tuple:
+    product = (await client.get(f"/products/{product_id}")).json()
+    return product["quantity"], product["available"]
+
+
+async def counters(product_id: int) -> tuple:
+    """
+    The units on the product row and on each of its shards.
+    """
+    async with SessionLocal() as db:
+        row = await db.scalar(select(Product.quantity).filter(Product.id == product_id))
+        shards = (await db.scalars(
+            select(ProductStockShard.quantity).filter(ProductStockShard.product_id == product_id)
+            .order_by(ProductStockShard.shard)
+        )).all()
+    return row, shards
+
+
+async def order(client, customer, product_id: int, quantity: int):
+    return await client.post(
+        "/create/", json={"product_id": product_id, "customer_id": customer["id"], "quantity": quantity}
+    )
+
+
+async def test_sharding_spreads_the_stock_and_keeps_the_totals(client, seller):
+    product_id = await create_product(client, seller, quantity=10)
+
+    product = await shard_stock(client, seller, product_id, 4)
+    assert (product["quantity"], product["available"]) == (10, 10)
+    assert await counters(product_id) == (0, [3, 3, 2, 2])
+
+    await shard_stock(client, seller, product_id, 0)
+    assert await stock(client, product_id) == (10, 10)
+    assert await counters(product_id) == (10, [])
+
+
+async def test_orders_draw_from_the_shards_until_the_stock_runs_out(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=10)
+    await shard_stock(client, seller, product_id, 4)
+
+    # Larger than any one shard, so it drains several
+    assert (await order(client, customer, product_id, 7)).status_code == 200
+    assert await stock(client, product_id) == (3, 3)
+    assert (await order(client, customer, product_id, 4)).status_code == 400
+    assert (await order(client, customer, product_id, 3)).status_code == 200
+
+    assert await stock(client, product_id) == (0, 0)
+    row, shards = await counters(product_id)
+    assert row == 0 and shards == [0, 0, 0, 0]
+
+
+async def test_concurrent_orders_never_oversell_a_sharded_product(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=15)
+    await shard_stock(client, seller, product_id, 4)
+
+    responses = await asyncio.gather(*[order(client, customer, product_id, 1) for _ in range(25)])
+
+    assert sorted(response.status_code for response in responses) == [200] * 15 + [400] * 10
+    assert await stock(client, product_id) == (0, 0)
+    assert all(quantity >= 0 for quantity in (await counters(product_id))[1])
+
+
+async def test_holds_move_units_off_the_shards(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=10)
+    await shard_stock(client, seller, product_id, 3)
+    params = {"token": customer["token"]}
+
+    hold = await client.post("/holds/", params=params, json={"product_id": product_id, "quantity": 4})
+    assert hold.status_code == 200, hold.text
+    assert await stock(client, product_id) == (10, 6)
+    # Held units wait on the product row, not on the shards
+    row, shards = await counters(product_id)
+    assert row == 4 and sum(shards) == 6
+
+    committed = await client.post(f"/holds/{hold.json()['id']}/commit", params=params)
+    assert committed.status_code == 200, committed.text
+    assert await stock(client, product_id) == (6, 6)
+
+    hold = await client.post("/holds/", params=params, json={"product_id": product_id, "quantity": 6})
+    assert hold.status_code == 200, hold.text
+    assert (await order(client, customer, product_id, 1)).status_code == 400
+    released = await client.delete(f"/holds/{hold.json()['id']}", params=params)
+    assert released.status_code == 200, released.text
+    assert await stock(client, product_id) == (6, 6)
+
+
+async def test_updating_the_quantity_respreads_it_over_the_shards(client, seller):
+    product_id = await create_product(client, seller, quantity=10)
+    await shard_stock(client, seller, product_id, 2)
+
+    response = await client.put(f"/products/{product_id}", params={"token": seller["token"]}, json={"quantity": 21})
+    assert response.status_code == 200, response.text
+
+    assert response.json()["quantity"] == 21
+    assert await stock(client, product_id) == (21, 21)
+    assert await counters(product_id) == (0, [11, 10])
@@ -0,0 +1,94 @@
+import pytest
+from tests.conftest import create_product
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_checkout_replays_the_original_order(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=5, price=10)
+    await client.put("/wallet/credit/", params={"token": customer["token"], "amount": 100})
+    headers = {"Idempotency-Key": "checkout-replay"}
+    item = {"product_id": product_id, "quantity": 2}
+
+    first = await client.post("/orders/checkout", params={"token": customer["token"]}, json=item, headers=headers)
+    second = await client.post("/orders/checkout", params={"token": customer["token"]}, json=item, headers=headers)
+
+    assert first.status_code == 200, first.text
+    assert second.json() == first.json()
+    assert first.json()["balance"] == 80
+
+
+async def test_checkout_rejects_a_key_used_for_a_wallet_credit(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=5, price=10)
+    headers = {"Idempotency-Key": "credit-then-checkout"}
+    credit = await client.put("/wallet/credit/", params={"token": customer["token"], "amount": 100}, headers=headers)
+    assert credit.status_code == 200, credit.text
+
+    response = await client.post(
+        "/orders/checkout", params={"token": customer["token"]}, json={"product_id": product_id, "quantity": 1},
+        headers=headers,
+    )
+
+    assert response.status_code == 409, response.text
+    wallet = await client.get("/wallet/", params={"token": customer["token"]})
+    assert wallet.json()["balance"] == 100
+    product = await client.get(f"/products/{product_id}")
+    assert product.json()["quantity"] == 5
+
+
+async def test_checkout_rejects_a_key_used_for_another_item(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=5, price=10)
+    await client.put("/wallet/credit/", params={"token": customer["token"], "amount": 100})
+    headers = {"Idempotency-Key": "checkout-other-item"}
+    params = {"token": customer["token"]}
+    first = await client.post("/orders/checkout", params=params, json={"product_id": product_id, "quantity": 1}, headers=headers)
+    assert first.status_code == 200, first.text
+
+    response = await client.post(
+        "/orders/checkout", params=params, json={"product_id": product_id, "quantity": 3}, headers=headers
+    )
+
+    assert response.status_code == 409, response.text
+
+
+async def test_wallet_credit_rejects_a_key_used_for_a_checkout(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=5, price=10)
+    await client.put("/wallet/credit/", params={"token": customer["token"], "amount": 100})
+    headers = {"Idempotency-Key": "checkout-then-credit"}
+    checkout = await client.post(
+        "/orders/checkout", params={"token": customer["token"]}, json={"product_id": product_id, "quantity": 1},
+        headers=headers,
+    )
+    assert checkout.status_code == 200, checkout.text
+
+    response = await client.put("/wallet/credit/", params={"token": customer["token"], "amount": 50}, headers=headers)
+
+    assert response.status_code == 409, response.text
+    wallet = await client.get("/wallet/", params={"token": customer["token"]})
+    assert wallet.json()["balance"] == 90
+
+
+@pytest.mark.parametrize("price, quantity", [(0.4, 1), (9.99, 1)])
+async def test_checkout_rejects_a_total_that_is_not_whole_wallet_units(client, seller, customer, price, quantity):
+    product_id = await create_product(client, seller, quantity=5, price=price)
+    await client.put("/wallet/credit/", params={"token": customer["token"], "amount": 100})
+
+    response = await client.post(
+        "/orders/checkout", params={"token": customer["token"]}, json={"product_id": product_id, "quantity": quantity}
+    )
+
+    assert response.status_code == 400, response.text
+    assert (await client.get("/wallet/", params={"token": customer["token"]})).json()["balance"] == 100
+    assert (await client.get(f"/products/{product_id}")).json()["quantity"] == 5
+
+
+async def test_checkout_charges_a_fractional_price_that_adds_up_to_whole_units(client, seller, customer):
+    product_id = await create_product(client, seller, quantity=5, price=0.4)
+    await client.put("/wallet/credit/", params={"token": customer["token"], "amount": 100})
+
+    response = await client.post(
+        "/orders/checkout", params={"token": customer["token"]}, json={"product_id": product_id, "quantity": 5}
+    )
+
+    assert response.status_code == 200, response.text
+    assert (response.json()["amount_charged"], response.json()["balance"]) == (2, 98)
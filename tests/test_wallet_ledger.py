@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def ledger(client, customer, limit: int = 50) -> list[dict]:
+    entries, cursor = [], None
+    while True:
+        params = {"token": customer["token"], "limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/wallet/transactions/", params=params)).json()
+        entries.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return entries
+
+
+async def balance(client, customer) -> int:
+    return (await client.get("/wallet/", params={"token": customer["token"]})).json()["balance"]
+
+
+async def test_concurrent_debits_never_overdraw(client, customer):
+    params = {"token": customer["token"]}
+    await client.put("/wallet/credit/", params={**params, "amount": 10})
+
+    responses = await asyncio.gather(*[
+        client.put("/wallet/debit/", params={**params, "amount": 1}) for _ in range(15)
+    ])
+
+    assert sorted(response.status_code for response in responses) == [200] * 10 + [400] * 5
+    assert await balance(client, customer) == 0
+    entries = await ledger(client, customer)
+    assert len(entries) == 11
+    assert sum(entry["amount"] for entry in entries) == 0
+
+
+async def test_retried_credit_is_applied_once(client, customer):
+    params = {"token": customer["token"], "amount": 25}
+    headers = {"Idempotency-Key": "ledger-credit-retry"}
+
+    first = await client.put("/wallet/credit/", params=params, headers=headers)
+    second = await client.put("/wallet/credit/", params=params, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["replayed"] is False and second.json()["replayed"] is True
+    assert second.json()["transaction_id"] == first.json()["transaction_id"]
+    assert await balance(client, customer) == 25
+    assert [entry["idempotency_key"] for entry in await ledger(client, customer)] == ["ledger-credit-retry"]
+
+    other_amount = await client.put("/wallet/credit/", params={**params, "amount": 30}, headers=headers)
+    assert other_amount.status_code == 409
+    debit = await client.put("/wallet/debit/", params=params, headers=headers)
+    assert debit.status_code == 409
+    assert await balance(client, customer) == 25
+
+
+async def test_ledger_lists_entries_newest_first_with_running_balance(client, customer):
+    params = {"token": customer["token"]}
+    for amount in (5, 7):
+        await client.put("/wallet/credit/", params={**params, "amount": amount})
+    await client.put("/wallet/debit/", params={**params, "amount": 3})
+
+    entries = await ledger(client, customer, limit=2)
+
+    assert [(entry["amount"], entry["balance_after"]) for entry in entries] == [(-3, 9), (7, 12), (5, 5)]